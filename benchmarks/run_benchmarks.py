@@ -0,0 +1,271 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Root of the repository, where `python -m scripts...` works
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_WORKDIR = os.path.join(ROOT, '.cache', 'benchmarks')
+MEMBER = 'MachineLearningRating_v3.txt'
+
+# Metrics compared against the baseline, with the allowed relative increase
+THRESHOLDS = {'seconds': 0.25, 'peak_rss_mb': 0.10}
+
+# Stated target for the resampling tests: 10k resamples over 1M rows within this many
+# seconds (scaled linearly with the row count above 1M)
+RESAMPLING_TARGET_SECONDS = 10.0
+
+
+def data_paths(workdir: str, n_rows: int, seed: int = 0) -> dict:
+    """
+    Returns the paths of the synthetic inputs for one dataset size: the raw zip archive,
+    its Parquet extract and the cleaned Parquet file.
+    """
+    prefix = os.path.join(workdir, f'synthetic_{n_rows}_{seed}')
+    return {'zip': f'{prefix}.zip', 'raw': f'{prefix}.parquet', 'cleaned': f'{prefix}_cleaned.parquet'}
+
+
+def prepare_data(workdir: str, n_rows: int, seed: int = 0) -> dict:
+    """
+    Generates the synthetic inputs of one dataset size, unless they already exist. The raw
+    and cleaned files are produced by the pipeline itself, so every stage reads what the
+    previous stage would have written.
+    """
+    from benchmarks.synthetic import write_synthetic_zip
+    from scripts.data_processing import DataProcessing, MissingDataImputer
+    from scripts.extract_zip import write_columnar_cache
+    from scripts.schema import load_dataset
+
+    paths = data_paths(workdir, n_rows, seed)
+    if not os.path.exists(paths['zip']):
+        write_synthetic_zip(paths['zip'], n_rows, seed=seed)
+    if not os.path.exists(paths['raw']):
+        write_columnar_cache(paths['zip'], MEMBER, paths['raw'])
+    if not os.path.exists(paths['cleaned']):
+        data = load_dataset(paths['raw'])
+        summary = DataProcessing(data).missing_data_summary()
+        MissingDataImputer.from_summary(summary).fit_transform(data).to_parquet(paths['cleaned'], index=False)
+    return paths
+
+
+def bench_extract_zip(paths, output_dir):
+    from scripts.extract_zip import write_columnar_cache
+    return write_columnar_cache(paths['zip'], MEMBER, os.path.join(output_dir, 'extracted.parquet'))
+
+
+def bench_data_processing(paths, output_dir):
+    from scripts.data_processing import DataProcessing, MissingDataImputer
+    from scripts.schema import load_dataset
+    data = load_dataset(paths['raw'])
+    summary = DataProcessing(data).missing_data_summary()
+    data = MissingDataImputer.from_summary(summary).fit_transform(data)
+    data.to_parquet(os.path.join(output_dir, 'cleaned.parquet'), index=False)
+    return len(data)
+
+
+def bench_hypothesis_testing(paths, output_dir):
+    from scripts.hypothesis_testing import ABHypothesisTesting
+    tester = ABHypothesisTesting.from_file(paths['cleaned'])
+    tester.run_tests()
+    return len(tester.data)
+
+
+def bench_resampling_tests(paths, output_dir):
+    import numpy as np
+    from scripts.hypothesis_testing import ABHypothesisTesting
+    tester = ABHypothesisTesting.from_file(paths['cleaned'])
+    # Alternate rows form two groups of equal size covering the whole (continuous) metric
+    halves = np.arange(len(tester.data)) % 2 == 0
+    group_a, group_b = tester.data.loc[halves, ['TotalPremium']], tester.data.loc[~halves, ['TotalPremium']]
+    target = RESAMPLING_TARGET_SECONDS * max(len(tester.data) / 1_000_000, 1)
+    for test in (tester._permutation_test, tester._bootstrap_test):
+        start = time.perf_counter()
+        test(group_a, group_b, 'TotalPremium', n_resamples=10_000, random_state=0)
+        seconds = time.perf_counter() - start
+        if seconds > target:
+            raise RuntimeError(f'{test.__name__} took {seconds:.1f}s for 10000 resamples over {len(tester.data)} rows; '
+                               f'the target is {target:.1f}s')
+    return len(tester.data)
+
+
+def bench_data_visualization(paths, output_dir):
+    from scripts.data_visualization import DataVisualizer, use_headless_backend
+    from scripts.schema import dataset_columns, numeric_columns
+    use_headless_backend()
+    numerical_cols = numeric_columns(dataset_columns(paths['cleaned']))
+    visualizer = DataVisualizer.from_file(paths['cleaned'], columns=numerical_cols + ['CoverType', 'Province', 'make', 'VehicleType'])
+    cover_types = visualizer.data['CoverType'].value_counts().nlargest(5).index.to_list()
+    visualizer.render_dvc_plots(numerical_cols, cover_types, output_dir=output_dir, max_workers=1)
+    return len(visualizer.data)
+
+
+def bench_model_building(paths, output_dir):
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from xgboost import XGBRegressor
+    from scripts.model_building import train_models
+    from scripts.schema import dataset_columns, load_dataset, numeric_columns
+
+    features = [col for col in numeric_columns(dataset_columns(paths['cleaned']))
+                if col not in ('UnderwrittenCoverID', 'PolicyID', 'TotalPremium', 'TotalClaims')]
+    data = load_dataset(paths['cleaned'], columns=features + ['TotalPremium'])
+    split = int(len(data) * 0.8)
+    X, y = data[features], data['TotalPremium']
+    # Small fixed candidates, so that the 10M-row size stays tractable
+    registry = {
+        'Linear Regression': (LinearRegression, {}),
+        'Random Forest': (RandomForestRegressor, {'n_estimators': 10, 'max_depth': 10, 'random_state': 0}),
+        'XGBoost': (XGBRegressor, {'n_estimators': 50, 'max_depth': 6, 'random_state': 0}),
+    }
+    train_models(X.iloc[:split], y.iloc[:split], X.iloc[split:], y.iloc[split:], registry=registry, max_workers=1, n_jobs=1)
+    return len(data)
+
+
+# Benchmark name -> function(paths, output_dir) running the measured work
+BENCHMARKS = {
+    'extract_zip': bench_extract_zip,
+    'data_processing': bench_data_processing,
+    'hypothesis_testing': bench_hypothesis_testing,
+    'resampling_tests': bench_resampling_tests,
+    'data_visualization': bench_data_visualization,
+    'model_building': bench_model_building,
+}
+
+
+def run_benchmark(name: str, n_rows: int, workdir: str = DEFAULT_WORKDIR, seed: int = 0) -> dict:
+    """
+    Runs one benchmark in a fresh interpreter, so that its peak memory and imports are
+    measured in isolation.
+
+    Returns:
+        dict: 'seconds' (wall time), 'cpu_seconds' (including worker processes) and
+            'peak_rss_mb' (the largest resident set of the process or any of its workers).
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run_benchmarks', '--measure', name, '--rows', str(n_rows),
+         '--workdir', workdir, '--seed', str(seed)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_suite(sizes: list, names: list = None, workdir: str = DEFAULT_WORKDIR, repeat: int = 1, seed: int = 0) -> dict:
+    """
+    Runs every benchmark at every dataset size, keeping the best of `repeat` runs.
+
+    Returns:
+        dict: {rows: {benchmark: metrics}} with row counts as strings (JSON keys).
+    """
+    results = {}
+    for n_rows in sizes:
+        prepare_data(workdir, n_rows, seed)
+        for name in names or list(BENCHMARKS):
+            runs = [run_benchmark(name, n_rows, workdir, seed) for _ in range(repeat)]
+            results.setdefault(str(n_rows), {})[name] = {metric: min(run[metric] for run in runs) for metric in runs[0]}
+            print(f'{n_rows:>10} {name:<20} ' + ' '.join(f'{k}={v:.2f}' for k, v in results[str(n_rows)][name].items()), file=sys.stderr)
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, thresholds: dict = None) -> list:
+    """
+    Lists the metrics that grew beyond their threshold relative to the baseline. Sizes and
+    benchmarks missing from either side are skipped.
+
+    Returns:
+        list: One dict per regression with 'rows', 'benchmark', 'metric', 'baseline',
+            'current' and 'ratio'.
+    """
+    thresholds = THRESHOLDS if thresholds is None else thresholds
+    regressions = []
+    for rows, benchmarks in results.items():
+        for name, metrics in benchmarks.items():
+            reference = baseline.get(rows, {}).get(name)
+            if reference is None:
+                continue
+            for metric, threshold in thresholds.items():
+                if metric in metrics and reference.get(metric) and metrics[metric] > reference[metric] * (1 + threshold):
+                    regressions.append({'rows': rows, 'benchmark': name, 'metric': metric, 'baseline': reference[metric],
+                                        'current': metrics[metric], 'ratio': metrics[metric] / reference[metric]})
+    return regressions
+
+
+def _measure(name, n_rows, workdir, seed):
+    # Runs in the fresh interpreter started by run_benchmark and prints its metrics as JSON
+    import resource
+    import tempfile
+
+    paths = data_paths(workdir, n_rows, seed)
+    with tempfile.TemporaryDirectory(dir=workdir) as output_dir:
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        BENCHMARKS[name](paths, output_dir)
+        seconds = time.perf_counter() - start
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN)
+    print(json.dumps({
+        'seconds': seconds,
+        'cpu_seconds': time.process_time() - start_cpu + workers.ru_utime + workers.ru_stime,
+        'peak_rss_mb': max(_peak_rss_kb(), workers.ru_maxrss) / 1024,  # Linux reports kilobytes
+    }))
+
+
+def _peak_rss_kb():
+    # ru_maxrss survives exec, so it would include the launching process; VmHWM does not
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile the pipeline stages on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000],
+                        help="Dataset sizes to run, e.g. 100000 1000000 10000000.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark; the best one is kept.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR, help="Where the synthetic inputs are generated and kept.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument("--time-threshold", type=float, default=THRESHOLDS['seconds'],
+                        help="Allowed relative increase of wall time before failing.")
+    parser.add_argument("--memory-threshold", type=float, default=THRESHOLDS['peak_rss_mb'],
+                        help="Allowed relative increase of peak RSS before failing.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--measure", choices=list(BENCHMARKS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure(args.measure, args.rows[0], args.workdir, args.seed)
+        raise SystemExit(0)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = run_suite(args.rows, args.only, workdir=args.workdir, repeat=args.repeat, seed=args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.update_baseline:
+        for rows, benchmarks in results.items():
+            baseline.setdefault(rows, {}).update({name: {metric: round(value, 3) for metric, value in metrics.items()}
+                                                  for name, metrics in benchmarks.items()})
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        raise SystemExit(0)
+
+    regressions = compare_to_baseline(results, baseline, {'seconds': args.time_threshold, 'peak_rss_mb': args.memory_threshold})
+    for r in regressions:
+        print(f"REGRESSION {r['benchmark']} at {r['rows']} rows: {r['metric']} {r['baseline']:.2f} -> {r['current']:.2f} "
+              f"({r['ratio']:.2f}x)", file=sys.stderr)
+    raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,192 @@
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+from scripts.schema import CATEGORICAL_COLUMNS, DTYPES
+
+# Column order of MachineLearningRating_v3.txt
+COLUMNS = [
+    'UnderwrittenCoverID', 'PolicyID', 'TransactionMonth', 'IsVATRegistered', 'Citizenship', 'LegalType',
+    'Title', 'Language', 'Bank', 'AccountType', 'MaritalStatus', 'Gender', 'Country', 'Province',
+    'PostalCode', 'MainCrestaZone', 'SubCrestaZone', 'ItemType', 'mmcode', 'VehicleType',
+    'RegistrationYear', 'make', 'Model', 'Cylinders', 'cubiccapacity', 'kilowatts', 'bodytype',
+    'NumberOfDoors', 'VehicleIntroDate', 'CustomValueEstimate', 'AlarmImmobiliser', 'TrackingDevice',
+    'CapitalOutstanding', 'NewVehicle', 'WrittenOff', 'Rebuilt', 'Converted', 'CrossBorder',
+    'NumberOfVehiclesInFleet', 'SumInsured', 'TermFrequency', 'CalculatedPremiumPerTerm',
+    'ExcessSelected', 'CoverCategory', 'CoverType', 'CoverGroup', 'Section', 'Product',
+    'StatutoryClass', 'StatutoryRiskType', 'TotalPremium', 'TotalClaims',
+]
+
+# Rows are generated in fixed-size blocks, each with its own seed, so that a dataset only
+# depends on the seed and the row count, never on how it is chunked
+BLOCK_ROWS = 100_000
+
+PROVINCES = {
+    'Gauteng': 0.393, 'Western Cape': 0.171, 'KwaZulu-Natal': 0.170, 'North West': 0.143, 'Mpumalanga': 0.052,
+    'Eastern Cape': 0.031, 'Limpopo': 0.025, 'Free State': 0.008, 'Northern Cape': 0.007,
+}
+
+# Low-cardinality fields: category -> probability, and the share of missing values
+FIXED_CATEGORIES = {
+    'Citizenship': ({'  ': 0.895, 'ZA': 0.104, 'ZW': 0.0007, 'AF': 0.0003}, 0.0),
+    'LegalType': ({'Individual': 0.897, 'Private company': 0.053, 'Close Corporation': 0.044, 'Public company': 0.003,
+                   'Partnership': 0.002, 'Sole proprietor': 0.001}, 0.0),
+    'Title': ({'Mr': 0.933, 'Mrs': 0.042, 'Ms': 0.019, 'Miss': 0.006, 'Dr': 0.0003}, 0.0),
+    'Language': ({'English': 1.0}, 0.0),
+    'Bank': ({'First National Bank': 0.34, 'Standard Bank': 0.23, 'ABSA Bank': 0.19, 'Nedbank': 0.12, 'Capitec Bank': 0.05,
+              'Investec Bank': 0.03, 'African Bank': 0.02, 'Old Mutual': 0.01, 'RMB Private Bank': 0.01}, 0.146),
+    'AccountType': ({'Current account': 0.62, 'Savings account': 0.37, 'Transmission account': 0.01}, 0.04),
+    'MaritalStatus': ({'Not specified': 0.99, 'Single': 0.007, 'Married': 0.003}, 0.008),
+    'Gender': ({'Not specified': 0.95, 'Male': 0.042, 'Female': 0.008}, 0.0095),
+    'Country': ({'South Africa': 1.0}, 0.0),
+    'Province': (PROVINCES, 0.0),
+    'ItemType': ({'Mobility - Motor': 1.0}, 0.0),
+    'VehicleType': ({'Passenger Vehicle': 0.94, 'Medium Commercial': 0.053, 'Heavy Commercial': 0.0075,
+                     'Light Commercial': 0.0033, 'Bus': 0.0002}, 0.00055),
+    'bodytype': ({'S/D': 0.32, 'B/S': 0.28, 'H/B': 0.18, 'D/S': 0.1, 'P/V': 0.04, 'MPV': 0.03, 'S/W': 0.02, 'C/C': 0.01,
+                  'C/P': 0.008, 'CAB': 0.006, 'LDV': 0.004, 'COUPE': 0.001, 'BUS': 0.001}, 0.00055),
+    'AlarmImmobiliser': ({'Yes': 0.99, 'No': 0.01}, 0.0),
+    'TrackingDevice': ({'No': 0.7, 'Yes': 0.3}, 0.0),
+    'NewVehicle': ({'More than 6 months': 0.99, 'Less than 6 months': 0.01}, 0.153),
+    'WrittenOff': ({'No': 0.9995, 'Yes': 0.0005}, 0.642),
+    'Rebuilt': ({'No': 0.9995, 'Yes': 0.0005}, 0.642),
+    'Converted': ({'No': 0.9995, 'Yes': 0.0005}, 0.642),
+    'CrossBorder': ({'No': 1.0}, 0.9993),
+    'TermFrequency': ({'Monthly': 0.9996, 'Annual': 0.0004}, 0.0),
+    'StatutoryClass': ({'Commercial': 1.0}, 0.0),
+    'StatutoryRiskType': ({'IFRS Constant': 1.0}, 0.0),
+}
+
+# Fields with many categories: (name prefix, number of categories, Zipf exponent, share missing)
+ZIPF_CATEGORIES = {
+    'MainCrestaZone': ('Zone ', 16, 1.2, 0.0),
+    'SubCrestaZone': ('Sub ', 45, 1.1, 0.0),
+    'make': ('MAKE ', 46, 1.3, 0.00055),
+    'Model': ('MODEL ', 411, 1.1, 0.00055),
+    'VehicleIntroDate': ('', 974, 1.05, 0.00055),
+    'ExcessSelected': ('Excess ', 13, 1.4, 0.0),
+    'CoverCategory': ('Category ', 29, 1.2, 0.0),
+    'CoverType': ('Cover ', 22, 1.2, 0.0),
+    'CoverGroup': ('Group ', 14, 1.5, 0.0),
+    'Section': ('Section ', 7, 1.8, 0.0),
+    'Product': ('Product ', 7, 1.8, 0.0),
+}
+
+
+def iter_synthetic(n_rows: int, seed: int = 0, chunk_rows: int = BLOCK_ROWS):
+    """
+    Yields a synthetic MachineLearningRating_v3 dataset of `n_rows` rows in chunks of
+    `chunk_rows` (a multiple of 100,000 rows, or smaller than that). Every column of the
+    real 52-column extract is present with the declared schema dtypes, and the main
+    distributions are modelled on the real data: skewed Province and vehicle make/model
+    frequencies, about 900 postal codes, heavy-tailed sums insured and premiums, claims on
+    under 1% of rows, and the real shares of missing values (e.g. NumberOfVehiclesInFleet
+    always missing, CustomValueEstimate missing for about 78% of rows).
+
+    Args:
+        n_rows (int): Total number of rows.
+        seed (int): Seed of the generator; the same seed and `n_rows` give the same data.
+        chunk_rows (int): Rows per yielded chunk.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks with a RangeIndex continuing across chunks.
+    """
+    if chunk_rows > BLOCK_ROWS and chunk_rows % BLOCK_ROWS:
+        raise ValueError(f"chunk_rows must be a multiple of {BLOCK_ROWS} or smaller than it.")
+    blocks = (_block(start, min(BLOCK_ROWS, n_rows - start), seed) for start in range(0, n_rows, BLOCK_ROWS))
+    if chunk_rows >= BLOCK_ROWS:
+        per_chunk = chunk_rows // BLOCK_ROWS
+        pending = []
+        for block in blocks:
+            pending.append(block)
+            if len(pending) == per_chunk:
+                yield pd.concat(pending)
+                pending = []
+        if pending:
+            yield pd.concat(pending)
+        return
+    for block in blocks:
+        for start in range(0, len(block), chunk_rows):
+            yield block.iloc[start:start + chunk_rows]
+
+
+def synthetic_data(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Returns the whole synthetic dataset of `n_rows` rows as one DataFrame (see `iter_synthetic`).
+    """
+    return pd.concat(iter_synthetic(n_rows, seed=seed), ignore_index=True) if n_rows else _block(0, 0, seed)
+
+
+def write_synthetic_zip(path: str, n_rows: int, seed: int = 0, member: str = 'MachineLearningRating_v3.txt') -> str:
+    """
+    Writes the synthetic dataset as a zip archive holding a pipe-separated TXT member, in the
+    layout of `data/MachineLearningRating_v3.zip`. Rows are generated and compressed in chunks,
+    so memory does not grow with `n_rows`.
+
+    Returns:
+        str: The written archive path.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        with archive.open(member, 'w', force_zip64=True) as out:
+            for i, chunk in enumerate(iter_synthetic(n_rows, seed=seed)):
+                text = chunk.to_csv(sep='|', index=False, header=i == 0, date_format='%Y-%m-%d %H:%M:%S')
+                out.write(text.encode())
+    return path
+
+
+def _block(start, n, seed):
+    # One independently seeded block of rows starting at row `start`
+    rng = np.random.default_rng([seed, start // BLOCK_ROWS])
+    data = {}
+    data['UnderwrittenCoverID'] = np.arange(start, start + n, dtype='int32') + 1
+    # About 7,000 policies with many monthly transactions each
+    data['PolicyID'] = (rng.zipf(1.3, n) % 7000 + 1).astype('int32')
+    # Transactions between 2013-10 and 2015-08, growing over time
+    months = np.minimum(np.floor(23 * rng.power(2.5, n)).astype('int64'), 22)
+    data['TransactionMonth'] = (np.datetime64('2013-10') + months).astype('datetime64[ns]')
+    data['IsVATRegistered'] = rng.random(n) < 0.006
+
+    for col, (categories, missing) in FIXED_CATEGORIES.items():
+        data[col] = _categorical(rng, n, list(categories), np.array(list(categories.values())), missing)
+    for col, (prefix, count, exponent, missing) in ZIPF_CATEGORIES.items():
+        if col == 'VehicleIntroDate':
+            labels = [f'{12 - i % 12}/{2015 - i // 12}' for i in range(count)]  # Most recent first
+        else:
+            labels = [f'{prefix}{i + 1}' for i in range(count)]
+        weights = 1 / np.arange(1, count + 1) ** exponent
+        data[col] = _categorical(rng, n, labels, weights / weights.sum(), missing)
+
+    # About 900 postal codes, concentrated in the metros
+    codes = np.sort(np.random.default_rng(seed).choice(np.arange(1, 9999), size=888, replace=False))
+    weights = 1 / np.arange(1, codes.size + 1) ** 1.1
+    data['PostalCode'] = codes[rng.choice(codes.size, size=n, p=weights / weights.sum())].astype('int16')
+
+    vehicle_missing = rng.random(n) < 0.00055
+    data['mmcode'] = np.where(vehicle_missing, np.nan, 4_000_000 + rng.integers(0, 400, n) * 10_000.0 + 1)
+    data['RegistrationYear'] = (2015 - np.minimum(rng.geometric(0.12, n) - 1, 28)).astype('int16')
+    data['Cylinders'] = np.where(vehicle_missing, np.nan, rng.choice([4, 6, 8, 3, 5], size=n, p=[0.95, 0.03, 0.01, 0.005, 0.005]))
+    data['cubiccapacity'] = np.where(vehicle_missing, np.nan, np.round(rng.lognormal(7.85, 0.25, n), -1))
+    data['kilowatts'] = np.where(vehicle_missing, np.nan, np.round(rng.lognormal(4.5, 0.25, n)))
+    data['NumberOfDoors'] = np.where(vehicle_missing, np.nan, rng.choice([4, 2, 5, 3, 0], size=n, p=[0.94, 0.03, 0.02, 0.005, 0.005]))
+    data['CustomValueEstimate'] = np.where(rng.random(n) < 0.78, np.nan, np.round(rng.lognormal(12.0, 0.6, n), -2))
+    capital = np.round(rng.lognormal(11.5, 1.0, n), -2)
+    data['CapitalOutstanding'] = np.where(rng.random(n) < 2e-6, None, capital.astype('int64').astype(str)).astype(object)
+    data['NumberOfVehiclesInFleet'] = np.full(n, np.nan)
+
+    # Heavily skewed sums insured: mostly small values with a long tail of large ones
+    data['SumInsured'] = np.round(np.where(rng.random(n) < 0.3, 0.01, rng.lognormal(11.0, 1.6, n)), 2)
+    data['CalculatedPremiumPerTerm'] = np.round(rng.lognormal(3.5, 1.3, n), 2)
+    data['TotalPremium'] = np.where(rng.random(n) < 0.4, 0.0, data['CalculatedPremiumPerTerm'] / 1.14 * rng.uniform(0.5, 1.0, n))
+    data['TotalClaims'] = np.where(rng.random(n) < 0.0028, rng.lognormal(9.5, 1.4, n), 0.0)
+
+    frame = pd.DataFrame({col: data[col] for col in COLUMNS}, index=pd.RangeIndex(start, start + n))
+    return frame.astype({col: dtype for col, dtype in DTYPES.items() if col not in CATEGORICAL_COLUMNS})
+
+
+def _categorical(rng, n, labels, probabilities, missing):
+    # Categorical column with the given category probabilities and share of missing values
+    codes = rng.choice(len(labels), size=n, p=probabilities / probabilities.sum()).astype('int16')
+    if missing:
+        codes[rng.random(n) < missing] = -1
+    return pd.Categorical.from_codes(codes, categories=labels)
@@ -0,0 +1,208 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+# Default location of the stage cache used by the pipeline scripts (kept out of git and DVC)
+DEFAULT_CACHE_DIR = os.environ.get('ACIA_CACHE_DIR', '.cache/stages')
+
+
+def column_hashes(data) -> dict:
+    """
+    Returns a content hash per column of a DataFrame (or of a single Series), covering the
+    column name, dtype and values but not the index. Steps that read a few columns are
+    keyed on those columns only, so editing any other column keeps their entries valid.
+    """
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    hashes = {}
+    for col in data.columns:
+        series = data[col]
+        digest = hashlib.sha1(f'{col}|{series.dtype}|{len(series)}'.encode())
+        try:
+            values = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        except TypeError:
+            # Unhashable objects (e.g. lists in a column) are hashed through their repr
+            values = pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy()
+        digest.update(values.tobytes())
+        hashes[str(col)] = digest.hexdigest()
+    return hashes
+
+
+def content_hash(value) -> str:
+    """
+    Returns a stable hash of a step input: DataFrames and Series by column content,
+    NumPy arrays and SciPy sparse matrices by their buffers, anything else by its JSON
+    (or, failing that, pickled) form.
+    """
+    digest = hashlib.sha1()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(json.dumps(column_hashes(value)).encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f'{value.dtype}|{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif hasattr(value, 'tocsr') and hasattr(value, 'shape'):
+        matrix = value.tocsr()
+        digest.update(f'{matrix.dtype}|{matrix.shape}'.encode())
+        for array in (matrix.data, matrix.indices, matrix.indptr):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    else:
+        try:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+        except TypeError:
+            digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def code_fingerprint(func) -> str:
+    """
+    Returns a hash of the source file defining `func` (a function, lambda, method or class),
+    so that cache entries computed by older code are not reused after the module changes.
+    Callables without a source file are identified by their qualified name only.
+    """
+    func = getattr(func, '__func__', func)
+    try:
+        path = inspect.getsourcefile(func)
+    except TypeError:
+        path = None
+    name = f'{getattr(func, "__module__", "")}.{getattr(func, "__qualname__", type(func).__qualname__)}'
+    if path is None or not os.path.exists(path):
+        return hashlib.sha1(name.encode()).hexdigest()
+    stat = os.stat(path)
+    return _file_hash(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=None)
+def _file_hash(path, mtime_ns, size):
+    # Each module is read once per process (and again if it is edited)
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class StageCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Function-level disk cache for expensive pipeline steps. Entries are keyed by the
+        step name, a fingerprint of the code computing it, the content hashes of its inputs
+        and its parameters, and pickled one file per entry. When the cache grows past `max_bytes`, the least recently used
+        entries (by file modification time, refreshed on every hit) are evicted.
+
+        Args:
+            directory (str): Where the entries are kept.
+            max_bytes (int): Size limit of the cache directory.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, name: str, inputs=(), code=None, **params) -> str:
+        """
+        Returns the entry key of step `name`, computed by `code` (a function or class whose
+        module source is fingerprinted), applied to `inputs` with `params`.
+        """
+        fingerprint = code_fingerprint(code) if code is not None else None
+        parts = [name, fingerprint, [content_hash(value) for value in inputs], content_hash(params)]
+        return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+    def get(self, key: str, default=None):
+        """
+        Returns the value stored under `key` (marking it as recently used), or `default`.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return default
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # Evicted by another process meanwhile
+        return value
+
+    def put(self, key: str, value) -> None:
+        """
+        Stores `value` under `key` atomically, then evicts entries beyond the size limit.
+        """
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def memoize(self, name: str, compute, inputs=(), **params):
+        """
+        Returns the cached result of step `name` for these inputs and parameters, calling
+        `compute()` and storing its result on a miss. The key includes a fingerprint of the
+        module defining `compute`, so editing that module invalidates its entries.
+
+        Args:
+            name (str): The step name.
+            compute: Zero-argument callable producing the result.
+            inputs: The DataFrames, Series or arrays the step reads. Pass only the columns it
+                uses so that unrelated edits keep the entry valid.
+            **params: Everything else the result depends on.
+        """
+        key = self.key(name, inputs, code=compute, **params)
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def size(self) -> int:
+        """
+        Returns the total size of the stored entries in bytes.
+        """
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self, max_bytes: int = None) -> int:
+        """
+        Removes least recently used entries until the cache fits in `max_bytes` (default:
+        the configured limit). Returns the number of entries removed.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for _, path, size in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        self.evict(max_bytes=0)
+
+    def _entries(self):
+        # (last use, path, size) of every stored entry
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+        return entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl')
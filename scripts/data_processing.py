@@ -1,16 +1,38 @@
+import argparse
 import json
+import numpy as np
 import pandas as pd
 import os
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
+from scripts.cache import StageCache
+from scripts.instrumentation import instrument_class, instrumented, write_metrics
+from scripts.schema import iter_dataset, load_dataset, memory_footprint
+from scripts.sketches import FrequencySketch, QuantileSketch
 
+def _summarize_missing(missing_data: pd.Series, rows: int) -> pd.DataFrame:
+    """
+    Builds the missing-data summary table from per-column null counts.
+    """
+    missing_data = missing_data[missing_data > 0]
+    missing_percentage = (missing_data / rows) * 100
+    return pd.DataFrame({
+        'Missing Count': missing_data,
+        'Percentage (%)': missing_percentage
+    }).sort_values(by='Percentage (%)', ascending=False)
+
+@instrument_class
 class DataProcessing:
-    def __init__(self, data: pd.DataFrame):
+    def __init__(self, data: pd.DataFrame, cache: StageCache = None):
         """
         Initialize the DataProcessing class with the data.
 
         Args:
             data (pd.DataFrame): The input DataFrame to process.
+            cache (StageCache): Optional disk cache for the imputation statistics.
         """
         self.data = data
+        self.cache = cache
 
     def missing_data_summary(self) -> pd.DataFrame:
         """
@@ -19,53 +41,570 @@ class DataProcessing:
         Returns:
             pd.DataFrame: A DataFrame with columns 'Missing Count' and 'Percentage (%)' for columns with missing values.
         """
-        missing_data = self.data.isnull().sum()
-        missing_data = missing_data[missing_data > 0]
-        missing_percentage = (missing_data / len(self.data)) * 100
-        missing_df = pd.DataFrame({
-            'Missing Count': missing_data, 
-            'Percentage (%)': missing_percentage
-        }).sort_values(by='Percentage (%)', ascending=False)
-        return missing_df
+        # Not cached: hashing every column would cost as much as counting its nulls
+        return _summarize_missing(self.data.isnull().sum(), len(self.data))
 
     def handle_missing_data(self, missing_type: str, missing_cols: list) -> pd.DataFrame:
         """
         Handles missing data based on predefined strategies.
         """
         if missing_type == 'high':
-            self.data = self.data.drop(columns=missing_cols, errors='ignore')
-        elif missing_type == 'moderate':
-            for col in missing_cols:
-                if col in self.data.columns:
-                    if self.data[col].dtype == 'object':
-                        self.data[col] = self.data[col].fillna(self.data[col].mode()[0] if not self.data[col].mode().empty else 'Unknown')
-                    else:
-                        self.data[col] = self.data[col].fillna(self.data[col].median() if not self.data[col].isnull().all() else 0)
+            self.imputer = MissingDataImputer(drop_cols=missing_cols, cache=self.cache)
         else:
-            for col in missing_cols:
-                if col in self.data.columns:
-                    if self.data[col].dtype == 'object':
-                        self.data[col] = self.data[col].fillna(self.data[col].mode()[0] if not self.data[col].mode().empty else 'Unknown')
-                    else:
-                        self.data[col] = self.data[col].fillna(self.data[col].median() if not self.data[col].isnull().all() else 0)
+            self.imputer = MissingDataImputer(fill_cols=missing_cols, cache=self.cache)
+        self.data = self.imputer.fit_transform(self.data)
         return self.data
 
+class MissingDataImputer:
+    def __init__(self, drop_cols: list = None, fill_cols: list = None, cache: StageCache = None):
+        """
+        Plans missing-data handling: `drop_cols` are removed, `fill_cols` are filled with
+        their median (numeric and datetime columns) or mode (all other columns).
+
+        Args:
+            drop_cols (list): Columns to drop.
+            fill_cols (list): Columns to impute.
+            cache (StageCache): Optional disk cache for the fill values, keyed by the fill columns' content.
+        """
+        self.drop_cols = list(drop_cols or [])
+        self.fill_cols = list(fill_cols or [])
+        self.cache = cache
+        self.fill_values_ = None
+
+    @classmethod
+    def from_summary(cls, missing_summary: pd.DataFrame, high_threshold: float = 50, low_threshold: float = 20, **kwargs):
+        """
+        Builds a plan from `DataProcessing.missing_data_summary` with the original buckets:
+        columns above `high_threshold` percent missing are dropped, moderate (above
+        `low_threshold`) and low (below `low_threshold`) columns are imputed. Columns at
+        exactly `low_threshold` percent fall in neither bucket and are left as they are.
+        """
+        percentage = missing_summary['Percentage (%)']
+        high = percentage > high_threshold
+        fill = ~high & (percentage != low_threshold)
+        return cls(drop_cols=missing_summary.index[high].tolist(), fill_cols=missing_summary.index[fill].tolist(), **kwargs)
+
+    def fit(self, data: pd.DataFrame):
+        """
+        Computes every median and mode in one pass over the fill columns.
+
+        Args:
+            data (pd.DataFrame): The data to learn fill values from.
+
+        Returns:
+            MissingDataImputer: The fitted imputer.
+        """
+        cols = [col for col in self.fill_cols if col in data.columns and col not in self.drop_cols]
+        if self.cache is None:
+            self.fill_values_ = self._fill_values(data, cols)
+        else:
+            self.fill_values_ = self.cache.memoize('imputer_fill_values', lambda: self._fill_values(data, cols), inputs=(data[cols],))
+        return self
+
+    @staticmethod
+    def _fill_values(data, cols):
+        # Every median and mode of the fill columns
+        median_cols = [col for col in cols if pd.api.types.is_numeric_dtype(data[col]) or pd.api.types.is_datetime64_any_dtype(data[col])]
+        mode_cols = [col for col in cols if col not in set(median_cols)]
+
+        fill_values = {}
+        if median_cols:
+            fill_values.update(data[median_cols].median().fillna(0).to_dict())
+        if mode_cols:
+            modes = data[mode_cols].mode()
+            fill_values.update(modes.iloc[0].astype(object).fillna('Unknown').to_dict() if not modes.empty else dict.fromkeys(mode_cols, 'Unknown'))
+        return fill_values
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drops the planned columns and applies every fill in a single `fillna` call.
+
+        Args:
+            data (pd.DataFrame): The data to impute, e.g. a new scoring batch.
+
+        Returns:
+            pd.DataFrame: The imputed DataFrame.
+        """
+        if self.fill_values_ is None:
+            raise ValueError("MissingDataImputer must be fitted before calling transform.")
+        data = data.drop(columns=self.drop_cols, errors='ignore')
+        fill_values = {col: value for col, value in self.fill_values_.items() if col in data.columns}
+        for col, value in fill_values.items():
+            # Categoricals only accept fills that are already one of their categories
+            if isinstance(data[col].dtype, pd.CategoricalDtype) and value not in data[col].cat.categories:
+                data[col] = data[col].cat.add_categories([value])
+        return data.fillna(fill_values)
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fits the imputer on `data` and returns the imputed DataFrame.
+        """
+        return self.fit(data).transform(data)
+
+class OutlierCapper:
+    def __init__(self, columns: list, factor: float = 1.5, cache: StageCache = None):
+        """
+        Caps numerical columns to the IQR fences [Q1 - factor * IQR, Q3 + factor * IQR].
+
+        Args:
+            columns (list): The numerical columns to cap.
+            factor (float): The IQR multiplier for the fences.
+            cache (StageCache): Optional disk cache for the quartiles, keyed by the columns' content.
+        """
+        self.columns = list(columns)
+        self.factor = factor
+        self.cache = cache
+        self.lower_ = None
+        self.upper_ = None
+
+    def fit(self, data: pd.DataFrame):
+        """
+        Computes Q1 and Q3 for every column in a single quantile call and stores the fences.
+
+        Args:
+            data (pd.DataFrame): The data to learn the fences from.
+
+        Returns:
+            OutlierCapper: The fitted capper.
+        """
+        if self.cache is None:
+            quartiles = data[self.columns].quantile([0.25, 0.75])
+        else:
+            quartiles = self.cache.memoize('quartiles', lambda: data[self.columns].quantile([0.25, 0.75]), inputs=(data[self.columns],))
+        iqr = quartiles.loc[0.75] - quartiles.loc[0.25]
+        self.lower_ = quartiles.loc[0.25] - self.factor * iqr
+        self.upper_ = quartiles.loc[0.75] + self.factor * iqr
+        return self
+
+    def transform(self, data: pd.DataFrame, copy: bool = False) -> pd.DataFrame:
+        """
+        Clips the fitted columns to their fences. Float columns keep their dtype;
+        integer columns become float64, since the fences are generally fractional.
+
+        Args:
+            data (pd.DataFrame): The data to cap, e.g. a new batch.
+            copy (bool): If False, `data` is modified in place.
+
+        Returns:
+            pd.DataFrame: The capped DataFrame.
+        """
+        if self.lower_ is None:
+            raise ValueError("OutlierCapper must be fitted before calling transform.")
+        if copy:
+            data = data.copy()
+        for col in self.columns:
+            values = data[col].to_numpy()
+            dtype = values.dtype if values.dtype.kind == 'f' else 'float64'
+            data[col] = np.clip(values, self.lower_[col], self.upper_[col]).astype(dtype, copy=False)
+        return data
+
+    def fit_transform(self, data: pd.DataFrame, copy: bool = False) -> pd.DataFrame:
+        """
+        Fits the capper on `data` and returns the capped DataFrame.
+        """
+        return self.fit(data).transform(data, copy=copy)
+
+class CategoricalEncoder:
+    def __init__(self, columns: list = None):
+        """
+        Turns non-numeric columns into model inputs: categoricals, strings and booleans become
+        integer codes over the categories seen during `fit` (missing and unseen values map
+        to -1), and datetimes become `<col>_year` and `<col>_month` columns.
+
+        Args:
+            columns (list): The columns to encode. If None, every non-numeric column is encoded.
+        """
+        self.columns = None if columns is None else list(columns)
+        self.categories_ = None
+        self.datetime_cols_ = None
+
+    def fit(self, data: pd.DataFrame, y=None):
+        """
+        Learns the categories of every encoded column.
+
+        Args:
+            data (pd.DataFrame): The data to learn categories from.
+            y: Ignored; accepted so that every encoder can be fitted the same way.
+
+        Returns:
+            CategoricalEncoder: The fitted encoder.
+        """
+        columns = self.columns
+        if columns is None:
+            columns = [col for col in data.columns
+                       if not pd.api.types.is_numeric_dtype(data[col]) or pd.api.types.is_bool_dtype(data[col])]
+        self.datetime_cols_ = [col for col in columns if pd.api.types.is_datetime64_any_dtype(data[col])]
+        self.categories_ = {
+            col: data[col].astype('category').cat.categories
+            for col in columns if col not in set(self.datetime_cols_)
+        }
+        return self
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replaces the encoded columns by their numeric encodings, keeping the column order.
+
+        Args:
+            data (pd.DataFrame): The data to encode, e.g. a new scoring batch.
+
+        Returns:
+            pd.DataFrame: The encoded DataFrame.
+        """
+        if self.categories_ is None:
+            raise ValueError("CategoricalEncoder must be fitted before calling transform.")
+        encoded = {}
+        for col in data.columns:
+            if col in self.categories_:
+                encoded[col] = pd.Categorical(data[col], categories=self.categories_[col]).codes
+            elif col in self.datetime_cols_:
+                dates = pd.to_datetime(data[col])
+                encoded[f'{col}_year'] = dates.dt.year.to_numpy()
+                encoded[f'{col}_month'] = dates.dt.month.to_numpy()
+            else:
+                encoded[col] = data[col].to_numpy()
+        return pd.DataFrame(encoded, index=data.index)
+
+    def fit_transform(self, data: pd.DataFrame, y=None) -> pd.DataFrame:
+        """
+        Fits the encoder on `data` and returns the encoded DataFrame.
+        """
+        return self.fit(data, y).transform(data)
+
+class SparseEncoder:
+    def __init__(self, columns: list = None, high_cardinality: str = 'target', max_onehot: int = 50,
+                 smoothing: float = 20, n_folds: int = 5, random_state: int = 0, dtype: str = 'float64'):
+        """
+        Builds a CSR sparse design matrix from a DataFrame, as a memory-light alternative to
+        dense one-hot frames. Numeric columns are kept as they are; categorical, string and
+        boolean columns with at most `max_onehot` categories are one-hot encoded (missing and
+        unseen values get no indicator); columns with more categories (e.g. PostalCode, make,
+        Model) become a single column with `high_cardinality` encoding; datetimes become
+        `<col>_year` and `<col>_month`. Other non-numeric columns are ignored.
+
+        Numeric values are stored explicitly, including zeros, so that XGBoost (which treats
+        absent entries as missing) sees the same inputs as scikit-learn; impute missing
+        numeric values first.
+
+        Args:
+            columns (list): The columns to encode. If None, every non-numeric column is encoded.
+            high_cardinality (str): 'target' (smoothed mean of the target per category),
+                'frequency' (share of training rows per category) or None (one-hot everything).
+            max_onehot (int): Largest number of categories that is one-hot encoded.
+            smoothing (float): Weight of the global target mean in the target encoding, in rows.
+            n_folds (int): Number of folds of the out-of-fold target encoding in `fit_transform`.
+            random_state (int): Seed for the fold assignment.
+            dtype (str): dtype of the matrix values.
+        """
+        if high_cardinality not in ('target', 'frequency', None):
+            raise ValueError("high_cardinality must be 'target', 'frequency' or None.")
+        self.columns = None if columns is None else list(columns)
+        self.high_cardinality = high_cardinality
+        self.max_onehot = max_onehot
+        self.smoothing = smoothing
+        self.n_folds = n_folds
+        self.random_state = random_state
+        self.dtype = dtype
+        self.blocks_ = None
+        self.feature_names_ = None
+
+    def fit(self, data: pd.DataFrame, y=None):
+        """
+        Learns the layout of the design matrix and the per-category encodings.
+
+        Args:
+            data (pd.DataFrame): The training data.
+            y: The target; required for target encoding.
+
+        Returns:
+            SparseEncoder: The fitted encoder.
+        """
+        encoded = self.columns
+        if encoded is None:
+            encoded = [col for col in data.columns
+                       if not pd.api.types.is_numeric_dtype(data[col]) or pd.api.types.is_bool_dtype(data[col])]
+        encoded = set(encoded)
+        if y is not None:
+            y = np.asarray(y, dtype='float64')
+
+        # One (kind, column, state) block per input column, in column order
+        blocks, names = [], []
+        for col in data.columns:
+            series = data[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                blocks.append(('datetime', col, None))
+                names += [f'{col}_year', f'{col}_month']
+            elif col not in encoded:
+                if pd.api.types.is_numeric_dtype(series):
+                    blocks.append(('numeric', col, None))
+                    names.append(col)
+            else:
+                categories = series.astype('category').cat.categories
+                if self.high_cardinality is None or len(categories) <= self.max_onehot:
+                    blocks.append(('onehot', col, categories))
+                    names += [f'{col}={category}' for category in categories]
+                else:
+                    codes = pd.Categorical(series, categories=categories).codes
+                    blocks.append(('mapped', col, (categories, *self._category_values(codes, len(categories), y))))
+                    names.append(f'{col}_{self.high_cardinality}')
+        self.blocks_ = blocks
+        self.feature_names_ = names
+        return self
+
+    def _category_values(self, codes, n_categories, y):
+        # Encoded value of every category, and of missing or unseen values
+        seen = codes >= 0
+        counts = np.bincount(codes[seen], minlength=n_categories)
+        if self.high_cardinality == 'frequency':
+            return counts / len(codes), 0.0
+        if y is None:
+            raise ValueError("Target encoding requires y.")
+        known = seen & ~np.isnan(y)
+        sums = np.bincount(codes[known], weights=y[known], minlength=n_categories)
+        counts = np.bincount(codes[known], minlength=n_categories)
+        prior = y[~np.isnan(y)].mean()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = (sums + self.smoothing * prior) / (counts + self.smoothing)
+        # Categories without a known target get the prior, also without smoothing
+        return np.where(counts > 0, values, prior), prior
+
+    def transform(self, data: pd.DataFrame) -> sparse.csr_matrix:
+        """
+        Encodes `data` into the fitted layout; columns not seen during `fit` are ignored.
+
+        Args:
+            data (pd.DataFrame): The data to encode, e.g. a new scoring batch.
+
+        Returns:
+            sparse.csr_matrix: One row per input row and one column per `feature_names_` entry.
+        """
+        if self.blocks_ is None:
+            raise ValueError("SparseEncoder must be fitted before calling transform.")
+        return self._transform(data)
+
+    def _transform(self, data, mapped_values=None):
+        # Build the CSR matrix; `mapped_values` replaces the fitted encoding of mapped columns
+        mapped_values = mapped_values or {}
+        n_rows = len(data)
+        all_rows = np.arange(n_rows)
+        rows, cols, values = [], [], []
+        offset = 0
+        for kind, col, state in self.blocks_:
+            if kind == 'onehot':
+                codes = pd.Categorical(data[col], categories=state).codes
+                present = codes >= 0
+                rows.append(all_rows[present])
+                cols.append(offset + codes[present].astype('int64'))
+                values.append(np.ones(present.sum()))
+                offset += len(state)
+                continue
+            if kind == 'mapped' and col in mapped_values:
+                columns = [mapped_values[col]]
+            elif kind == 'mapped':
+                categories, category_values, default = state
+                codes = pd.Categorical(data[col], categories=categories).codes
+                columns = [np.where(codes >= 0, category_values[codes], default)]
+            elif kind == 'datetime':
+                dates = pd.to_datetime(data[col])
+                columns = [dates.dt.year.to_numpy(dtype='float64', na_value=np.nan),
+                           dates.dt.month.to_numpy(dtype='float64', na_value=np.nan)]
+            else:
+                columns = [data[col].to_numpy(dtype='float64', na_value=np.nan)]
+            for column in columns:
+                present = ~np.isnan(column)
+                rows.append(all_rows[present])
+                cols.append(np.full(present.sum(), offset))
+                values.append(column[present])
+                offset += 1
+        matrix = sparse.csr_matrix(
+            (np.concatenate(values).astype(self.dtype), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_rows, offset),
+        )
+        matrix.sort_indices()
+        return matrix
+
+    def fit_transform(self, data: pd.DataFrame, y=None) -> sparse.csr_matrix:
+        """
+        Fits the encoder on `data` and returns its design matrix. With target encoding, each
+        training row is encoded with the category means of the other `n_folds - 1` folds,
+        so that its own target does not leak into its feature; `transform` keeps using the
+        means of all training rows.
+        """
+        self.fit(data, y)
+        if self.high_cardinality != 'target':
+            return self.transform(data)
+        return self._transform(data, self._out_of_fold_values(data, np.asarray(y, dtype='float64')))
+
+    def _out_of_fold_values(self, data, y):
+        # Per-row target encoding of every mapped column, fitted without the row's own fold
+        folds = np.random.default_rng(self.random_state).permutation(len(data)) % self.n_folds
+        values = {}
+        for kind, col, state in self.blocks_:
+            if kind != 'mapped':
+                continue
+            codes = pd.Categorical(data[col], categories=state[0]).codes
+            column = np.empty(len(data))
+            for fold in range(self.n_folds):
+                held_out = folds == fold
+                category_values, default = self._category_values(codes[~held_out], len(state[0]), y[~held_out])
+                fold_codes = codes[held_out]
+                column[held_out] = np.where(fold_codes >= 0, category_values[fold_codes], default)
+            values[col] = column
+        return values
+
+class MissingDataProfiler:
+    def __init__(self, relative_accuracy: float = 0.01, capacity: int = 10_000):
+        """
+        Accumulates missing-data statistics chunk by chunk: null and row counts, plus mergeable
+        sketches for approximate medians (numeric columns) and modes (all other columns).
+        Profilers built on separate files can be merged.
+
+        Args:
+            relative_accuracy (float): Relative accuracy of the numeric quantile sketches.
+            capacity (int): Number of counters kept per frequency sketch.
+        """
+        self.relative_accuracy = relative_accuracy
+        self.capacity = capacity
+        self.rows = 0
+        self.columns = []
+        self.null_counts = pd.Series(dtype='int64')
+        self.sketches = {}
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Adds one chunk of rows to the profile.
+        """
+        self.rows += len(chunk)
+        self.columns += [col for col in chunk.columns if col not in set(self.columns)]
+        self.null_counts = self.null_counts.add(chunk.isnull().sum(), fill_value=0).astype('int64')
+        for col in chunk.columns:
+            series = chunk[col]
+            if col not in self.sketches:
+                if not series.notna().any():
+                    continue
+                self.sketches[col] = self._new_sketch(series)
+            sketch = self.sketches[col]
+            if isinstance(sketch, QuantileSketch):
+                # A column inferred as numeric in an earlier chunk may hold text in this one
+                sketch.update(pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=float('nan')))
+            else:
+                sketch.update(series.dropna())
+        return self
+
+    def merge(self, other: 'MissingDataProfiler'):
+        """
+        Merges another profile (e.g. of a different file) into this one.
+        """
+        self.rows += other.rows
+        self.columns += [col for col in other.columns if col not in set(self.columns)]
+        self.null_counts = self.null_counts.add(other.null_counts, fill_value=0).astype('int64')
+        for col, sketch in other.sketches.items():
+            if col in self.sketches:
+                self.sketches[col].merge(sketch)
+            else:
+                self.sketches[col] = sketch
+        return self
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns the same table as `DataProcessing.missing_data_summary` for the profiled rows.
+        """
+        return _summarize_missing(self.null_counts.reindex(self.columns, fill_value=0), self.rows)
+
+    def fill_values(self, cols: list) -> dict:
+        """
+        Returns approximate imputation values: the median for numeric and date columns,
+        the mode otherwise, with the same fallbacks as `MissingDataImputer`.
+        """
+        fill_values = {}
+        for col in cols:
+            sketch = self.sketches.get(col)
+            if isinstance(sketch, QuantileSketch):
+                median = sketch.quantile(0.5)
+                fill_values[col] = 0 if pd.isna(median) else median
+            elif sketch is not None and sketch.is_exact and pd.api.types.is_datetime64_any_dtype(sketch.counts.index):
+                fill_values[col] = sketch.quantile(0.5)
+            else:
+                mode = sketch.mode() if sketch is not None else None
+                fill_values[col] = 'Unknown' if mode is None else mode
+        return fill_values
+
+    def to_imputer(self, high_threshold: float = 50) -> 'MissingDataImputer':
+        """
+        Builds a fitted `MissingDataImputer` from the profile, without another pass over the data.
+        """
+        imputer = MissingDataImputer.from_summary(self.summary(), high_threshold=high_threshold)
+        imputer.fill_values_ = self.fill_values(imputer.fill_cols)
+        return imputer
+
+    @classmethod
+    def from_file(cls, file_path: str, chunksize: int = 100_000, delimiter: str = '|', **kwargs):
+        """
+        Profiles a Parquet or delimited file in a single streaming pass.
+
+        Args:
+            file_path (str): The path to a `.parquet` file or a delimited text file.
+            chunksize (int): Number of rows held in memory at a time.
+            delimiter (str): The field delimiter for text files.
+            **kwargs: Passed to the `MissingDataProfiler` constructor.
+        """
+        profiler = cls(**kwargs)
+        for chunk in iter_dataset(file_path, chunksize=chunksize, delimiter=delimiter):
+            profiler.update(chunk)
+        return profiler
+
+    def _new_sketch(self, series: pd.Series):
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return QuantileSketch(relative_accuracy=self.relative_accuracy)
+        return FrequencySketch(capacity=self.capacity)
+
+def profile_files(file_paths: list, max_workers: int = None, **kwargs) -> MissingDataProfiler:
+    """
+    Profiles several files in parallel, one process per file, and merges the results.
+
+    Args:
+        file_paths (list): Paths to Parquet or delimited text files.
+        max_workers (int): Maximum number of worker processes.
+        **kwargs: Passed to `MissingDataProfiler.from_file`.
+
+    Returns:
+        MissingDataProfiler: The merged profile.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(MissingDataProfiler.from_file, path, **kwargs) for path in file_paths]
+        profiles = [future.result() for future in futures]
+    merged = profiles[0]
+    for profile in profiles[1:]:
+        merged.merge(profile)
+    return merged
+
 if __name__ == "__main__":
-    input_file="data/extracteddata/MachineLearningRating_v3.txt"
-    df = pd.read_csv(input_file,delimiter='|',low_memory=False)
-    processor = DataProcessing(df)
+    parser = argparse.ArgumentParser(description="Summarize and clean missing data.")
+    parser.add_argument("--profile-only", nargs="*", metavar="FILE",
+                        help="Stream the given files (default: the extracted data) and only write MissingDataSummary.json.")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute the summary and fill values instead of reusing the stage cache.")
+    args = parser.parse_args()
+
+    input_file="data/extracteddata/MachineLearningRating_v3.parquet"
+    metrics_file="data/metrics/data_processing.json"
+    if args.profile_only is not None:
+        profile = instrumented(profile_files)(args.profile_only or [input_file])
+        with open ("data/extracteddata/MissingDataSummary.json","w") as f:
+            json.dump(profile.summary().to_dict(),f)
+        write_metrics(metrics_file)
+        raise SystemExit(0)
+
+    df = instrumented(load_dataset)(input_file)
+    print(memory_footprint(df).to_string())
+    cache = None if args.no_cache else StageCache()
+    processor = DataProcessing(df, cache=cache)
     missing_summary = processor.missing_data_summary()
 
     with open ("data/extracteddata/MissingDataSummary.json","w") as f:
         json.dump(missing_summary.to_dict(),f)
 
-    high_missing = missing_summary[missing_summary['Percentage (%)'] > 50].index.tolist()
-    moderate_missing = missing_summary [(missing_summary['Percentage (%)'] <= 50) &(missing_summary['Percentage (%)']>20)].index.to_list()
-    low_missing = missing_summary [missing_summary['Percentage (%)'] < 20].index.to_list()
-
-    df = processor.handle_missing_data('high',high_missing)
-    df = processor.handle_missing_data('moderate',moderate_missing)
-    df = processor.handle_missing_data('low',low_missing)
+    imputer = MissingDataImputer.from_summary(missing_summary, cache=cache)
+    df = instrumented(imputer.fit_transform, name='MissingDataImputer.fit_transform')(df)
 
     os.makedirs("data/processeddata",exist_ok=True)
-    df.to_csv("data/processeddata/cleaned_data.csv",index=False)
\ No newline at end of file
+    instrumented(df.to_parquet, name='write_cleaned_data')("data/processeddata/cleaned_data.parquet",index=False)
+    write_metrics(metrics_file)
\ No newline at end of file
@@ -1,19 +1,26 @@
-from numpy import vsplit
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+from concurrent.futures import ProcessPoolExecutor
+from scripts.data_processing import OutlierCapper
+from scripts.instrumentation import instrument_class, write_metrics
+from scripts.plot_summaries import PlotSummaries
+from scripts.sampling import ReservoirSample
+from scripts.schema import dataset_columns, iter_dataset, load_dataset, numeric_columns
 
-# Set global font style and additional customization
-plt.rcParams.update({
+# Global font style and additional customization, applied when the first figure is drawn
+PLOT_STYLE = {
     'font.family': 'Garamond',  # Set the font to Garamond
     'font.size': 12,            # Adjust global font size
     'axes.titlesize': 16,       # Title font size
     'axes.labelsize': 14,       # Label font size
     'xtick.labelsize': 12,      # X-axis tick font size
     'ytick.labelsize': 12,      # Y-axis tick font size
-})
+}
 
+_styled = False
+
+@instrument_class
 class DataVisualizer:
     def __init__(self, data: pd.DataFrame):
         """
@@ -23,7 +30,57 @@ class DataVisualizer:
             data (pd.DataFrame): The DataFrame containing the data to visualize.
         """
         self.data = data
-        sns.set(style="whitegrid", font="Garamond")  # Seaborn style with Garamond font
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self._data
+
+    @data.setter
+    def data(self, value: pd.DataFrame):
+        # Cached plot summaries describe the previous data
+        self._data = value
+        self._summaries = None
+
+    @property
+    def summaries(self) -> PlotSummaries:
+        """
+        Cached histograms, counts, box and violin stats of the current data.
+        """
+        if self._summaries is None:
+            self._summaries = PlotSummaries(self._data)
+        return self._summaries
+
+    @classmethod
+    def from_summaries(cls, summaries):
+        """
+        Creates a DataVisualizer that draws the DVC plots (`figure_jobs`, `render_dvc_plots`)
+        from precomputed summaries, e.g. the `PlotAggregates` of the incremental state,
+        without any rows.
+
+        Args:
+            summaries: A `PlotSummaries` or `PlotAggregates`.
+        """
+        visualizer = cls(pd.DataFrame())
+        visualizer._summaries = summaries
+        return visualizer
+
+    @classmethod
+    def from_file(cls, file_path: str, columns=None, sample_size: int = None):
+        """
+        Creates a DataVisualizer from a pipeline intermediate, reading only the given columns.
+
+        Args:
+            file_path (str): The path to a `.parquet` or CSV file.
+            columns (list): The columns the plots will touch. If None, every column is read.
+            sample_size (int): If given, the file is streamed and only a uniform reservoir
+                sample of this many rows is kept, for exploring files larger than memory.
+        """
+        if sample_size is None:
+            return cls(load_dataset(file_path, columns=columns))
+        reservoir = ReservoirSample(sample_size, random_state=0)
+        for chunk in iter_dataset(file_path, columns=columns):
+            reservoir.update(chunk)
+        return cls(reservoir.sample().reset_index(drop=True))
 
     def univariate_analysis(self, num_cols=None, cat_cols=None):
         """
@@ -34,8 +91,9 @@ class DataVisualizer:
             num_cols (list): List of numerical columns to plot histograms. If None, automatically detect numerical columns.
             cat_cols (list): List of categorical columns to plot bar charts. If None, automatically detect categorical columns.
         """
+        plt, sns = _plotting()
         if num_cols is None:
-            num_cols = self.data.select_dtypes(include=['float64', 'int64']).columns.tolist()
+            num_cols = self.data.select_dtypes(include='number').columns.tolist()
         
         if cat_cols is None:
             cat_cols = self.data.select_dtypes(include=['object', 'category']).columns.tolist()
@@ -43,24 +101,29 @@ class DataVisualizer:
         # Histograms for Numerical Columns
         for col in num_cols:
             plt.figure(figsize=(10, 4))
-            sns.histplot(
-                self.data[col].dropna(), kde=True, bins=30, 
+            hist = self.summaries.histogram(col, bins=30)
+            plt.bar(
+                hist['edges'][:-1], hist['counts'], width=np.diff(hist['edges']), align='edge',
                 color='#6A5ACD', edgecolor='black', alpha=0.8
             )
+            if 'kde_x' in hist:
+                plt.plot(hist['kde_x'], hist['kde_y'], color='#6A5ACD')
             plt.title(f'Distribution of {col}', fontsize=18, fontweight='bold', color='#483D8B')
             plt.xlabel(col, fontsize=14, color='#4B0082')
             plt.ylabel('Frequency', fontsize=14, color='#4B0082')
             plt.grid(axis='y', linestyle='--', alpha=0.5)
             plt.tight_layout()
             plt.show()
+            plt.close()
 
         # Bar Charts for Categorical Columns
         for col in cat_cols:
             plt.figure(figsize=(10, 5))
-            sns.countplot(
-                x=col, data=self.data, hue=col, legend=False,  # Set hue to the same column and disable legend
-                order=self.data[col].value_counts().index,
-                palette='coolwarm'  # Use a color palette
+            counts = self.summaries.value_counts(col)
+            labels = counts.index.astype(str)
+            sns.barplot(
+                x=labels, y=counts.to_numpy(), hue=labels, legend=False,  # Set hue to the same column and disable legend
+                order=labels, palette='coolwarm'  # Use a color palette
             )
             plt.title(f'Distribution of {col}', fontsize=18, fontweight='bold', color='#8B0000')
             plt.xlabel(col, fontsize=14, color='#8B0000')
@@ -69,28 +132,44 @@ class DataVisualizer:
             plt.grid(axis='y', linestyle='--', alpha=0.5)
             plt.tight_layout()
             plt.show()
+            plt.close()
 
-    def scatter_plot(self, x_col, y_col, hue_col=None):
+    def scatter_plot(self, x_col, y_col, hue_col=None, max_points=50_000, density=True):
         """
         Creates a scatter plot to visualize the relationship between two numerical variables.
+        Above `max_points` rows, the plot shows a log-scaled hexbin density of all rows
+        (without `hue_col` and with `density`), or else a cached sample of `max_points`
+        rows, stratified by `hue_col` so that every hue stays visible.
         
         Args:
             x_col (str): Name of the column for the x-axis.
             y_col (str): Name of the column for the y-axis.
             hue_col (str): Column to color the points by (optional).
+            max_points (int): Row threshold for the large-data rendering.
+            density (bool): Use hexbin density instead of a sample when there is no hue.
         """
+        plt, sns = _plotting()
         plt.figure(figsize=(10, 6))
-        sns.scatterplot(
-            data=self.data, x=x_col, y=y_col, hue=hue_col, 
-            palette='viridis', s=100, edgecolor='black'
-        )
+        large = len(self.data) > max_points
+        if large and density and hue_col is None:
+            data = self.data[[x_col, y_col]].dropna()
+            plt.hexbin(data[x_col], data[y_col], gridsize=80, bins='log', cmap='viridis', mincnt=1)
+            plt.colorbar(label='Rows')
+        else:
+            sns.scatterplot(
+                data=self.summaries.sample(max_points, strata=hue_col) if large else self.data,
+                x=x_col, y=y_col, hue=hue_col,
+                palette='viridis', s=100 if not large else 10, edgecolor='black'
+            )
         plt.title(f'Scatter Plot of {x_col} vs {y_col}', fontsize=18, fontweight='bold', color='#228B22')
         plt.xlabel(x_col, fontsize=14, color='#006400')
         plt.ylabel(y_col, fontsize=14, color='#006400')
-        plt.legend(title=hue_col, fontsize=12, title_fontsize=14)
+        if hue_col is not None:
+            plt.legend(title=hue_col, fontsize=12, title_fontsize=14)
         plt.grid(linestyle='--', alpha=0.5)
         plt.tight_layout()
         plt.show()
+        plt.close()
 
     def correlation_matrix(self, cols):
         """
@@ -99,6 +178,7 @@ class DataVisualizer:
         Args:
             cols (list): List of numerical columns to include in the correlation matrix.
         """
+        plt, sns = _plotting()
         corr_matrix = self.data[cols].corr()
         plt.figure(figsize=(12, 8))
         sns.heatmap(
@@ -107,111 +187,44 @@ class DataVisualizer:
         )
         plt.title('Correlation Matrix', fontsize=18, fontweight='bold', color='#8B4513')
         plt.tight_layout()
+        plt.savefig("Screenshots/correlation_heatmap.png",dpi = 300)  # Save before show, which clears the figure
         plt.show()
-        plt.savefig("Screenshots/correlation_heatmap.png",dpi = 300)
+        plt.close()
 
-    def plot_violin_premium_by_cover(self, x_col, y_col):
+    def plot_geographical_trends(self, cover_types):
         """
-        Creates a violin plot showing the distribution of TotalPremium by CoverType.
-        
+        Plots cover types, car makes, premiums and vehicle types by province.
+
         Args:
-            x_col (str): Categorical column for the x-axis.
-            y_col (str): Numerical column for the y-axis.
+            cover_types (list): The cover types shown in the first panel.
         """
-        plt.figure(figsize=(12, 6))
-        sns.violinplot(
-            x=x_col, y=y_col, data=self.data, palette='muted', inner='quartile'
-        )
-        plt.title(f'Distribution of {y_col} by {x_col}', fontsize=18, fontweight='bold', color='#4682B4')
-        plt.xlabel(x_col, fontsize=14, color='#1E90FF')
-        plt.ylabel(y_col, fontsize=14, color='#1E90FF')
-        plt.xticks(rotation=45)
-        plt.grid(axis='y', linestyle='--', alpha=0.5)
-        plt.tight_layout()
-        # plt.show()
-        plt.savefig("Screenshots/premium_by_cover.png",dpi = 500)
-
-    def plot_geographical_trends(self, cover_types):
-        fig, axs = plt.subplots(2, 2, figsize=(16, 12))
-        fig.suptitle('Geographical Trends in Insurance Data', fontsize=24, fontweight='bold', color='#2E8B57')
-
-        # Filter the data to include only the specified cover types
-        filtered_data = self.data[self.data['CoverType'].isin(cover_types)]
-
-        # 1. Cover Type Distribution by Province (bar plot)
-        sns.countplot(x='Province', hue='CoverType', data=filtered_data, palette='Set3', ax=axs[0, 0])
-        axs[0, 0].set_title('Common Cover Types Across Provinces', fontsize=18, fontweight='bold')
-        axs[0, 0].set_xlabel('Province', fontsize=14)
-        axs[0, 0].set_ylabel('Count', fontsize=14)
-        axs[0, 0].tick_params(axis='x', rotation=45)
-        axs[0, 0].legend(title='Cover Type', loc='upper center', bbox_to_anchor=(0.5, 0.9), ncol=2)
-
-        # 2. Car Make Distribution by Province (bar plot)
-        car_make_counts = self.data.groupby('Province')['make'].count().reset_index()
-        sns.barplot(x='Province', y='make', data=car_make_counts, ax=axs[0, 1])
-        axs[0, 1].set_title('Car Make Distribution by Province', fontsize=18, fontweight='bold')
-        axs[0, 1].set_xlabel('Province', fontsize=14)
-        axs[0, 1].set_ylabel('Count of Car Makes', fontsize=14)
-        axs[0, 1].tick_params(axis='x', rotation=45)
-
-        # 3. Total Premium by Province (box plot)
-        sns.boxplot(x='Province', y='TotalPremium', data=self.data, showmeans=True, ax=axs[1, 0])
-        axs[1, 0].set_title('Distribution of Total Premium by Province', fontsize=18, fontweight='bold')
-        axs[1, 0].set_xlabel('Province', fontsize=14)
-        axs[1, 0].set_ylabel('Total Premium', fontsize=14)
-        axs[1, 0].tick_params(axis='x', rotation=45)
-
-        # 4. Vehicle Type Distribution by Province (count plot)
-        sns.countplot(x='Province', hue='VehicleType', data=self.data, palette='Set1', ax=axs[1, 1])
-        axs[1, 1].set_title('Vehicle Type Distribution by Province', fontsize=18, fontweight='bold')
-        axs[1, 1].set_xlabel('Province', fontsize=14)
-        axs[1, 1].set_ylabel('Count of Vehicle Types', fontsize=14)
-        axs[1, 1].tick_params(axis='x', rotation=45)
-        axs[1, 1].legend(title='Vehicle Type', loc='upper center', bbox_to_anchor=(0.5, 0.9), ncol=2)
-
-        # # Adjust layout to prevent overlapping and enhance aesthetics
-        # plt.tight_layout(rect=[0, 0.03, 1, 0.95])  # Adjust layout with a title space
-        # # plt.show()
-        # plt.savefig("Screenshots/geographical_trends.png", bbox_inches = 'tight',dpi = 300)
-   
-        # Adjust layout to prevent overlapping
-        plt.tight_layout()
+        plt, sns = _plotting()
+        fig = plt.figure(figsize=(16, 12))
+        draw_geographical_trends(fig, **self._geographical_summaries(cover_types))
         plt.savefig("Screenshots/geographical_trends.png", dpi=300)
+        plt.close(fig)
+
     def plot_outliers_boxplot(self, cols):
         """
         Plots box plots to detect outliers in numerical columns.
         """
+        plt, sns = _plotting()
         # numerical_columns = ['TotalPremium', 'SumInsured', 'CalculatedPremiumPerTerm', 'TotalClaims']
-        
-        plt.figure(figsize=(12, 4))
-        
-        # Plotting a box plot for each numerical column
-        for i, col in enumerate(cols, 1):
-            plt.subplot(1, len(cols), i)
-            sns.boxplot(y=self.data[col], color='lightblue')
-            plt.title(f'Box Plot of {col}')
-            plt.tight_layout()
-
+        fig = plt.figure(figsize=(12, 4))
+        draw_boxplots(fig, [self.summaries.box_stats(col)[0] for col in cols])
         # plt.show()
         plt.savefig("Screenshots/outliers_boxplot.png",dpi = 300)
+        plt.close(fig)
     
     
     def cap_all_outliers(self, numerical_columns):
         """
         Caps the outliers for all numerical columns in the dataframe 
-        using the IQR method.
+        using the IQR method. The fitted fences are kept on `self.capper`
+        so they can be reapplied to new batches.
         """
-        for column in numerical_columns:
-            Q1 = self.data[column].quantile(0.25)
-            Q3 = self.data[column].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            # Cap the outliers
-            self.data[column] = self.data[column].apply(lambda x: lower_bound if x < lower_bound else (upper_bound if x > upper_bound else x))
-        
+        self.capper = OutlierCapper(numerical_columns).fit(self.data)
+        self.data = self.capper.transform(self.data)
         return self.data
 
     
@@ -219,46 +232,250 @@ class DataVisualizer:
         """
         Creates a violin plot showing the distribution of TotalPremium by CoverType.
         """
-        plt.figure(figsize=(10, 4))
-        sns.violinplot(x=x_col, y=y_col, data=self.data, palette='muted', inner='quartile')
-        plt.title('Distribution of TotalPremium by CoverType')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        plt, sns = _plotting()
+        fig = plt.figure(figsize=(10, 4))
+        draw_violins(fig, self.summaries.violin_stats(y_col, by=x_col), title=f'Distribution of {y_col} by {x_col}')
         # plt.show()
         plt.savefig("Screenshots/premium_by_cover.png")
-        plt.close()
+        plt.close(fig)
 
-    def plot_pairplot(self, cols):
+    def plot_pairplot(self, cols, max_points=20_000):
         """
         Creates a pair plot to explore the relationships between numerical features.
+        Above `max_points` rows, it is drawn from a cached uniform sample of `max_points`
+        rows with 2D histograms instead of scatter points.
         """
-        sns.pairplot(self.data[cols], palette='coolwarm')
+        plt, sns = _plotting()
+        large = len(self.data) > max_points
+        data = self.summaries.sample(max_points)[cols] if large else self.data[cols]
+        grid = sns.pairplot(data, palette='coolwarm', kind='hist' if large else 'scatter')
         plt.title('Pair Plot of Key Numerical Features')
         plt.tight_layout()
         # plt.show()
+        return grid
         
     def plot_correlation_heatmap(self, cols):
         """
         Creates a correlation heatmap for key numerical columns.
         """
-        plt.figure(figsize=(8, 4))
-        corr_matrix = self.data[cols].corr()
-        sns.heatmap(corr_matrix, annot=True, cmap='RdYlGn', linewidths=0.5)
-        plt.title('Correlation Heatmap')
-        plt.tight_layout()
+        plt, sns = _plotting()
+        fig = plt.figure(figsize=(8, 4))
+        draw_correlation_heatmap(fig, self.summaries.correlation(cols))
         #plt.show()
         plt.savefig("Screenshots/correlation_heatmap.png",dpi = 300)
+        plt.close(fig)
+
+    def figure_jobs(self, numerical_cols, cover_types, output_dir="Screenshots"):
+        """
+        Aggregates the data behind every DVC plot output and returns one render job per
+        figure. Jobs carry only the cached summaries (correlations, counts, box and violin
+        stats), so they are cheap to send to worker processes.
+
+        Args:
+            numerical_cols (list): Columns for the correlation heatmap and outlier box plots.
+            cover_types (list): Cover types shown in the geographical trends figure.
+            output_dir (str): Directory for the PNG files.
+
+        Returns:
+            list: Job dicts for `render_figures`.
+        """
+        summaries = self.summaries
+        return [
+            {
+                'draw': draw_correlation_heatmap, 'path': os.path.join(output_dir, 'correlation_heatmap.png'),
+                'figsize': (8, 4), 'dpi': 300,
+                'data': {'corr': summaries.correlation(numerical_cols)},
+            },
+            {
+                'draw': draw_boxplots, 'path': os.path.join(output_dir, 'outliers_boxplot.png'),
+                'figsize': (12, 4), 'dpi': 300,
+                'data': {'stats': [summaries.box_stats(col)[0] for col in numerical_cols]},
+            },
+            {
+                'draw': draw_violins, 'path': os.path.join(output_dir, 'premium_by_cover.png'),
+                'figsize': (10, 4), 'dpi': 100,
+                'data': {'stats': summaries.violin_stats('TotalPremium', by='CoverType'),
+                         'title': 'Distribution of TotalPremium by CoverType'},
+            },
+            {
+                'draw': draw_geographical_trends, 'path': os.path.join(output_dir, 'geographical_trends.png'),
+                'figsize': (16, 12), 'dpi': 300,
+                'data': self._geographical_summaries(cover_types),
+            },
+        ]
+
+    def _geographical_summaries(self, cover_types):
+        return {
+            'cover_counts': self.summaries.grouped_counts('Province', 'CoverType', hue_values=cover_types),
+            'make_counts': self.summaries.count_by('Province', 'make'),
+            'premium_stats': self.summaries.box_stats('TotalPremium', by='Province'),
+            'vehicle_counts': self.summaries.grouped_counts('Province', 'VehicleType'),
+        }
+
+    def render_dvc_plots(self, numerical_cols, cover_types, output_dir="Screenshots", max_workers=None):
+        """
+        Writes every DVC plot output, rendering the figures in parallel worker processes.
+
+        Returns:
+            list: The written file paths.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        return render_figures(self.figure_jobs(numerical_cols, cover_types, output_dir), max_workers=max_workers)
+
+
+def use_headless_backend():
+    """
+    Switches matplotlib to the non-interactive Agg backend, so figures are never shown.
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def render_figure(draw, path, figsize, dpi=300, data=None):
+    """
+    Draws one figure with `draw(fig, **data)` and saves it to `path`. The figure is drawn on
+    an Agg canvas outside pyplot, so it is rendered headlessly whatever backend the calling
+    process uses, and is never shown or kept alive by pyplot.
+
+    Returns:
+        str: The written file path.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    _plotting()
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    draw(fig, **(data or {}))
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def render_figures(jobs, max_workers=None):
+    """
+    Renders figure jobs (dicts of `render_figure` arguments) headlessly, one worker
+    process per figure, or in this process when `max_workers` is 1. The matplotlib backend
+    of this process is left as it is; only the worker processes switch to Agg.
+
+    Returns:
+        list: The written file paths, in job order.
+    """
+    if max_workers == 1:
+        return [render_figure(**job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers or max(1, min(len(jobs), os.cpu_count() or 1)),
+                             initializer=_init_render_worker) as executor:
+        futures = [executor.submit(render_figure, **job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def _init_render_worker():
+    use_headless_backend()
+    _plotting()
+
+
+def _plotting():
+    """
+    Imports pyplot and seaborn on first use and applies the plot style once per process,
+    so that importing this module neither loads them nor touches the global rcParams.
+
+    Returns:
+        tuple: The `matplotlib.pyplot` and `seaborn` modules.
+    """
+    global _styled
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    if not _styled:
+        plt.rcParams.update(PLOT_STYLE)
+        sns.set(style="whitegrid", font="Garamond")  # Seaborn style with Garamond font
+        _styled = True
+    return plt, sns
+
+
+def draw_correlation_heatmap(fig, corr):
+    plt, sns = _plotting()
+    ax = fig.subplots()
+    sns.heatmap(corr, annot=True, cmap='RdYlGn', linewidths=0.5, ax=ax)
+    ax.set_title('Correlation Heatmap')
+    fig.tight_layout()
+
+
+def draw_boxplots(fig, stats):
+    axs = np.atleast_1d(fig.subplots(1, len(stats)))
+    for ax, column_stats in zip(axs, stats):
+        ax.bxp([column_stats], patch_artist=True, boxprops={'facecolor': 'lightblue'})
+        ax.set_xticks([])
+        ax.set_ylabel(column_stats['label'])
+        ax.set_title(f"Box Plot of {column_stats['label']}")
+    fig.tight_layout()
+
+
+def draw_violins(fig, stats, title):
+    plt, sns = _plotting()
+    ax = fig.subplots()
+    positions = np.arange(len(stats))
+    parts = ax.violin(stats, positions=positions, widths=0.8, showextrema=False)
+    for body, color in zip(parts['bodies'], sns.color_palette('muted', len(stats))):
+        body.set_facecolor(color)
+        body.set_edgecolor('0.25')
+        body.set_alpha(1)
+    for position, group in zip(positions, stats):
+        # Quartile lines like seaborn's inner='quartile'
+        peak = group['vals'].max()
+        for q, style in zip([group['q1'], group['median'], group['q3']], [':', '--', ':']):
+            half_width = 0.4 * np.interp(q, group['coords'], group['vals']) / peak
+            ax.plot([position - half_width, position + half_width], [q, q], linestyle=style, color='0.25', linewidth=1)
+    ax.set_xticks(positions, [group['label'] for group in stats], rotation=45)
+    ax.set_title(title)
+    fig.tight_layout()
+
+
+def draw_geographical_trends(fig, cover_counts, make_counts, premium_stats, vehicle_counts):
+    plt, sns = _plotting()
+    axs = fig.subplots(2, 2)
+    fig.suptitle('Geographical Trends in Insurance Data', fontsize=24, fontweight='bold', color='#2E8B57')
+
+    # 1. Cover Type Distribution by Province (bar plot)
+    sns.barplot(x='Province', y='count', hue='CoverType', data=cover_counts, palette='Set3', ax=axs[0, 0])
+    axs[0, 0].set_title('Common Cover Types Across Provinces', fontsize=18, fontweight='bold')
+    axs[0, 0].set_xlabel('Province', fontsize=14)
+    axs[0, 0].set_ylabel('Count', fontsize=14)
+    axs[0, 0].tick_params(axis='x', rotation=45)
+    axs[0, 0].legend(title='Cover Type', loc='upper center', bbox_to_anchor=(0.5, 0.9), ncol=2)
+
+    # 2. Car Make Distribution by Province (bar plot)
+    sns.barplot(x=make_counts.index.astype(str), y=make_counts.to_numpy(), ax=axs[0, 1])
+    axs[0, 1].set_title('Car Make Distribution by Province', fontsize=18, fontweight='bold')
+    axs[0, 1].set_xlabel('Province', fontsize=14)
+    axs[0, 1].set_ylabel('Count of Car Makes', fontsize=14)
+    axs[0, 1].tick_params(axis='x', rotation=45)
+
+    # 3. Total Premium by Province (box plot)
+    axs[1, 0].bxp(premium_stats, showmeans=True, patch_artist=True,
+                  boxprops={'facecolor': sns.color_palette()[0]}, positions=np.arange(len(premium_stats)))
+    axs[1, 0].set_title('Distribution of Total Premium by Province', fontsize=18, fontweight='bold')
+    axs[1, 0].set_xlabel('Province', fontsize=14)
+    axs[1, 0].set_ylabel('Total Premium', fontsize=14)
+    axs[1, 0].tick_params(axis='x', rotation=45)
+
+    # 4. Vehicle Type Distribution by Province (count plot)
+    sns.barplot(x='Province', y='count', hue='VehicleType', data=vehicle_counts, palette='Set1', ax=axs[1, 1])
+    axs[1, 1].set_title('Vehicle Type Distribution by Province', fontsize=18, fontweight='bold')
+    axs[1, 1].set_xlabel('Province', fontsize=14)
+    axs[1, 1].set_ylabel('Count of Vehicle Types', fontsize=14)
+    axs[1, 1].tick_params(axis='x', rotation=45)
+    axs[1, 1].legend(title='Vehicle Type', loc='upper center', bbox_to_anchor=(0.5, 0.9), ncol=2)
+
+    fig.tight_layout()
 
 
 if __name__ == "__main__":
+    use_headless_backend()
     os.makedirs('Screenshots', exist_ok = True)
-    df = pd.read_csv ("data/processeddata/cleaned_data.csv", low_memory = False)
-    visualizer = DataVisualizer(df)
-
-    numerical_cols = df.select_dtypes(include=['float64','int64']).columns.to_list()
-    visualizer.plot_correlation_heatmap(numerical_cols)
-    visualizer.plot_outliers_boxplot(numerical_cols)
-    visualizer.plot_violin_premium_by_cover('CoverType','TotalPremium')
+    input_file = "data/processeddata/cleaned_data.parquet"
+    numerical_cols = numeric_columns(dataset_columns(input_file))
+    plot_cols = ['CoverType', 'Province', 'make', 'VehicleType']
+    visualizer = DataVisualizer.from_file(input_file, columns=numerical_cols + plot_cols)
+    df = visualizer.data
 
     common_cover_types = df['CoverType'].value_counts().nlargest(5).index.to_list()
-    visualizer.plot_geographical_trends(common_cover_types)
\ No newline at end of file
+    visualizer.render_dvc_plots(numerical_cols, common_cover_types)
+    write_metrics("data/metrics/data_visualization.json")
\ No newline at end of file
@@ -1,6 +1,10 @@
+import argparse
+import shutil
 import zipfile
 import os
+from typing import Iterator
 import pandas as pd
+from scripts.schema import read_options, read_typed_csv
 
 def extract_file_from_zip(zip_file_path: str, extract_to: str) -> None:
     """
@@ -18,7 +22,7 @@ def load_txt_from_zip(extracted_dir: str, filename: str) -> pd.DataFrame:
     Loads a pipe-separated TXT file from the extracted directory into a pandas DataFrame.
     """
     file_path = os.path.join(extracted_dir, filename)
-    return pd.read_csv(file_path, delimiter='|', low_memory=False)
+    return read_typed_csv(file_path, delimiter='|')
 
 def load_data(outer_zip_path: str, filename: str, extract_to: str = "../data/") -> pd.DataFrame:
     """
@@ -28,8 +32,137 @@ def load_data(outer_zip_path: str, filename: str, extract_to: str = "../data/")
     extract_file_from_zip(outer_zip_path, extract_to)
     return load_txt_from_zip(extract_to, filename)
 
+def stream_txt_from_zip(zip_file_path: str, filename: str, chunksize: int = 100_000, **read_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Parses a pipe-separated TXT member in chunks straight from the compressed stream,
+    without extracting the archive to disk first. Memory use is bounded by `chunksize`.
+    Unless `dtype` is given, the declared schema dtypes are applied.
+
+    Args:
+        zip_file_path (str): The path to the zip file.
+        filename (str): The name of the TXT member inside the archive.
+        chunksize (int): Number of rows per yielded DataFrame.
+        **read_kwargs: Extra keyword arguments forwarded to `pd.read_csv` (e.g. `dtype`, `usecols`).
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the TXT file.
+    """
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        if 'dtype' not in read_kwargs:
+            with zip_ref.open(filename) as member:
+                header = pd.read_csv(member, delimiter='|', nrows=0).columns
+            usecols = read_kwargs.get('usecols')
+            columns = header if usecols is None else [col for col in header if col in set(usecols)]
+            read_kwargs = {**read_options(columns), **read_kwargs}
+        with zip_ref.open(filename) as member:
+            with pd.read_csv(member, delimiter='|', chunksize=chunksize, **read_kwargs) as reader:
+                for chunk in reader:
+                    yield chunk
+
+def extract_member(zip_file_path: str, filename: str, output_path: str) -> str:
+    """
+    Copies a single member out of the archive as raw bytes. Nothing is parsed or
+    re-serialized, so the cost is one decompression pass and one write.
+
+    Args:
+        zip_file_path (str): The path to the zip file.
+        filename (str): The name of the member inside the archive.
+        output_path (str): The destination file path.
+
+    Returns:
+        str: The path of the written file.
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        with zip_ref.open(filename) as member, open(output_path, 'wb') as out:
+            shutil.copyfileobj(member, out, length=1 << 20)
+    return output_path
+
+def write_columnar_cache(zip_file_path: str, filename: str, output_path: str, chunksize: int = 100_000, **read_kwargs) -> int:
+    """
+    Streams a pipe-separated TXT member from the archive into a single Parquet file,
+    one row group per chunk. The Parquet schema is fixed before the first chunk is parsed:
+    declared schema columns keep their dtypes and every other column is read as strings,
+    so a sparse column that is all-missing in one chunk cannot be inferred as a different
+    type than in the next. Categorical columns are stored as string dictionaries with int32
+    indices so that chunks with different category sets share one schema.
+
+    Args:
+        zip_file_path (str): The path to the zip file.
+        filename (str): The name of the TXT member inside the archive.
+        output_path (str): The destination Parquet file path.
+        chunksize (int): Number of rows per row group.
+        **read_kwargs: Extra keyword arguments forwarded to `pd.read_csv`.
+
+    Returns:
+        int: The number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    read_kwargs = _pin_dtypes(zip_file_path, filename, read_kwargs)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    writer = None
+    rows = 0
+    try:
+        for chunk in stream_txt_from_zip(zip_file_path, filename, chunksize=chunksize, **read_kwargs):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, _normalize_schema(table.schema))
+            if not table.schema.equals(writer.schema):
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def _pin_dtypes(zip_file_path: str, filename: str, read_kwargs: dict) -> dict:
+    """
+    Completes the `dtype`, `converters` and `parse_dates` read options so that no column of the member is
+    left to per-chunk inference: declared schema dtypes first, then strings for the rest.
+    """
+    if 'dtype' in read_kwargs and not isinstance(read_kwargs['dtype'], dict):
+        return read_kwargs
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        with zip_ref.open(filename) as member:
+            header = pd.read_csv(member, delimiter='|', nrows=0).columns
+    usecols = read_kwargs.get('usecols')
+    columns = header if usecols is None else [col for col in header if col in set(usecols)]
+    options = read_options(columns)
+    dtype = read_kwargs.get('dtype', options['dtype'])
+    converters = read_kwargs.get('converters', options['converters'])
+    parse_dates = read_kwargs.get('parse_dates', options['parse_dates'])
+    inferred = [col for col in columns if col not in parse_dates and col not in converters]
+    dtype = {**{col: str for col in inferred}, **dtype}
+    return {**read_kwargs, 'dtype': dtype, 'converters': converters, 'parse_dates': parse_dates}
+
+def _normalize_schema(schema):
+    """
+    Widens dictionary-encoded (categorical) fields to int32 indices over string values, and
+    types all-missing (null) fields as strings so that later chunks with values still fit.
+    """
+    import pyarrow as pa
+
+    def normalize(field):
+        if pa.types.is_dictionary(field.type):
+            return field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        if pa.types.is_null(field.type):
+            return field.with_type(pa.string())
+        return field
+
+    return pa.schema([normalize(field) for field in schema], metadata=schema.metadata)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract MachineLearningRating_v3 from its zip archive.")
+    parser.add_argument("--format", choices=["txt", "parquet"], default="parquet",
+                        help="Write the raw TXT member, or a Parquet cache parsed from the compressed stream.")
+    args = parser.parse_args()
+
     zip_path="data/MachineLearningRating_v3.zip"
     output_file="MachineLearningRating_v3.txt"
-    df = load_data(zip_path,output_file)
-    df.to_csv("data/extracteddata/MachineLearningRating_v3.txt", sep='|', index=False)
\ No newline at end of file
+    if args.format == "parquet":
+        write_columnar_cache(zip_path, output_file, "data/extracteddata/MachineLearningRating_v3.parquet")
+    else:
+        extract_member(zip_path, output_file, "data/extracteddata/MachineLearningRating_v3.txt")
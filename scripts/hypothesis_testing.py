@@ -1,47 +1,163 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from scipy import stats
+from scipy import sparse
+from scripts.cache import StageCache
+from scripts.instrumentation import instrument_class
+from scripts.schema import load_dataset
+from scripts.shared_data import SharedFrame
 
+@instrument_class
 class ABHypothesisTesting:
-    def __init__(self, data):
+    # Columns touched by run_all_tests
+    REQUIRED_COLUMNS = ['Province', 'PostalCode', 'Gender', 'TotalPremium']
+
+    def __init__(self, data, metric_bins=None, cache: StageCache = None):
         """
         Initialize the class with the dataset.
+
+        Args:
+            data (pd.DataFrame): The dataset to test.
+            metric_bins (int): If set, chi-squared tests bucket the metric into this many
+                quantiles instead of treating every distinct value as a category.
+            cache (StageCache): Optional disk cache for contingency tables, keyed by the
+                content of the two columns involved.
         """
         self.data = data
+        self.metric_bins = metric_bins
+        self.cache = cache
+
+    @property
+    def data(self):
+        return self._data
 
-    def _segment_data(self, feature, value=None, exclude_values=None):
+    @data.setter
+    def data(self, data):
         """
-        Segment the data based on a feature. Optionally filter by value or exclude certain values.
+        Replace the dataset and drop the group indexes and uniqueness checks cached for the old one.
         """
-        if exclude_values is not None:
-            data_segment = self.data[~self.data[feature].isin(exclude_values)]
-        else:
-            data_segment = self.data.copy()
+        self._data = data
+        self._reset_caches()
+
+    def _reset_caches(self):
+        """
+        Clear cached group indexes and uniqueness checks. Call after editing self.data in place.
+        """
+        self._group_index = {}
+        self._null_positions = {}
+        self._identical = {}
+
+    @classmethod
+    def from_file(cls, file_path, columns=None, **kwargs):
+        """
+        Load only the columns the tests need from a pipeline intermediate and initialize the class.
+        """
+        return cls(load_dataset(file_path, columns=columns or cls.REQUIRED_COLUMNS), **kwargs)
+
+    def _group_positions(self, feature):
+        """
+        Return the cached mapping from each value of a feature to the (sorted) row positions
+        holding it, building it with a single groupby pass on first use.
+        """
+        if feature not in self._group_index:
+            self._group_index[feature] = self.data.groupby(feature, observed=True, sort=False).indices
+            self._null_positions[feature] = np.flatnonzero(self.data[feature].isna().to_numpy())
+        return self._group_index[feature]
 
+    def _segment_positions(self, feature, value=None, exclude_values=None):
+        """
+        Return the row positions of a segment, or None when the segment is the whole dataset.
+        """
+        groups = self._group_positions(feature)
         if value is not None:
-            data_segment = data_segment[data_segment[feature] == value]
-        
-        return data_segment
+            if exclude_values is not None and value in set(exclude_values):
+                return np.array([], dtype='int64')
+            return groups.get(value, np.array([], dtype='int64'))
+        if exclude_values is None:
+            return None
+        excluded = set(exclude_values)
+        # Rows with a missing feature value are kept, as with ~isin(exclude_values)
+        kept = [positions for key, positions in groups.items() if key not in excluded]
+        return np.sort(np.concatenate(kept + [self._null_positions[feature]]))
+
+    def _segment_data(self, feature, value=None, exclude_values=None, columns=None):
+        """
+        Segment the data based on a feature. Optionally filter by value or exclude certain values.
+
+        Segments are taken by position from a cached group index, so selecting one value
+        costs O(group size) instead of a full-column comparison; without filters the
+        dataset itself is returned rather than a copy. Pass `columns` (e.g. just the metric)
+        to copy only those columns of the segment instead of every column.
+        """
+        positions = self._segment_positions(feature, value, exclude_values)
+        if positions is None:
+            return self.data if columns is None else self.data[columns]
+        if columns is None:
+            return self.data.iloc[positions]
+        return self.data.iloc[positions, self.data.columns.get_indexer(columns)]
 
     def _check_identical_values(self, metric):
         """
         Check if all values for a metric are identical to avoid invalid tests.
         """
-        unique_values = self.data[metric].dropna().unique()
-        return len(unique_values) == 1
+        if metric not in self._identical:
+            self._identical[metric] = self.data[metric].nunique(dropna=True) == 1
+        return self._identical[metric]
 
-    def _chi_squared_test(self, feature, metric):
+    def _contingency_table(self, feature, metric, bins=None):
+        """
+        Build the contingency table of a feature against a metric as a sparse matrix of
+        counts from integer category codes. With `bins`, the metric is first cut into that
+        many quantile buckets instead of using one column per distinct value.
+        """
+        if self.cache is not None:
+            return self.cache.memoize('contingency_table', lambda: self._build_contingency_table(feature, metric, bins),
+                                      inputs=(self.data[[feature, metric]],), bins=bins)
+        return self._build_contingency_table(feature, metric, bins)
+
+    def _build_contingency_table(self, feature, metric, bins=None):
+        data = self.data[[feature, metric]].dropna()
+        row_codes, _ = pd.factorize(data[feature])
+        if bins is not None:
+            col_codes = pd.qcut(data[metric], q=bins, labels=False, duplicates='drop').to_numpy()
+        else:
+            col_codes, _ = pd.factorize(data[metric])
+        shape = (row_codes.max() + 1, col_codes.max() + 1) if len(data) else (0, 0)
+        counts = np.ones(len(data), dtype='int64')
+        return sparse.coo_matrix((counts, (row_codes, col_codes)), shape=shape).tocsr()
+
+    def _chi_squared_test(self, feature, metric, bins=None):
         """
         Perform chi-squared test for association between a feature and a metric.
+
+        The table is kept sparse: expected counts come from the row and column marginals,
+        and chi2 = sum(O^2 / E) - N over the non-zero cells only, so the dense
+        feature x metric matrix is never materialized.
         """
-        contingency_table = pd.crosstab(self.data[feature], self.data[metric])
-        chi2, p_value, _, _ = stats.chi2_contingency(contingency_table)
+        from scipy import stats
+        table = self._contingency_table(feature, metric, bins=self.metric_bins if bins is None else bins)
+        row_totals = np.asarray(table.sum(axis=1)).ravel()
+        col_totals = np.asarray(table.sum(axis=0)).ravel()
+        dof = ((row_totals > 0).sum() - 1) * ((col_totals > 0).sum() - 1)
+        if dof <= 1:
+            # Tiny tables keep scipy's behaviour, including Yates' correction for 2x2
+            dense = table.toarray()
+            chi2, p_value, _, _ = stats.chi2_contingency(dense[row_totals > 0][:, col_totals > 0])
+            return chi2, p_value
+
+        total = row_totals.sum()
+        cells = table.tocoo()
+        expected = row_totals[cells.row] * col_totals[cells.col] / total
+        chi2 = (cells.data.astype('float64') ** 2 / expected).sum() - total
+        p_value = stats.chi2.sf(chi2, dof)
         return chi2, p_value
 
     def _t_test(self, group_a, group_b, metric):
         """
         Perform a t-test to compare means of two groups on a metric.
         """
+        from scipy import stats
         if self._check_identical_values(metric):
             print(f"Warning: All values for {metric} are identical. Skipping t-test.")
             return None, None
@@ -53,6 +169,7 @@ class ABHypothesisTesting:
         """
         Perform a z-test for large samples (>30) to compare means of two groups.
         """
+        from scipy import stats
         mean_a, mean_b = group_a[metric].mean(), group_b[metric].mean()
         std_a, std_b = group_a[metric].std(), group_b[metric].std()
         n_a, n_b = group_a[metric].count(), group_b[metric].count()
@@ -61,6 +178,44 @@ class ABHypothesisTesting:
         p_value = 2 * (1 - stats.norm.cdf(abs(z_stat)))
         return z_stat, p_value
 
+    def _permutation_test(self, group_a, group_b, metric, n_resamples=10_000, memory_budget=256 * 2**20, n_jobs=1, random_state=None, max_bins=1024):
+        """
+        Perform a two-sided permutation test on the difference in means of two groups,
+        without assuming normality.
+
+        Resamples are drawn a batch at a time over integer-coded values (see _resample) and
+        reduced with one matrix-vector product per batch. Batches are sized to stay within
+        `memory_budget` bytes per worker, and each batch has its own seed spawned from
+        `random_state`, so results do not depend on `n_jobs`. Metrics with more than
+        `max_bins` distinct values are binned first, keeping each resample O(max_bins).
+
+        Returns:
+            tuple: (observed difference in means, p-value)
+        """
+        values_a, values_b = group_a[metric].dropna().to_numpy('float64'), group_b[metric].dropna().to_numpy('float64')
+        observed = values_a.mean() - values_b.mean()
+        resampled = _resample('permutation', values_a, values_b, n_resamples, memory_budget, n_jobs, random_state, max_bins)
+        p_value = (np.count_nonzero(np.abs(resampled) >= abs(observed)) + 1) / (n_resamples + 1)
+        return observed, p_value
+
+    def _bootstrap_test(self, group_a, group_b, metric, n_resamples=10_000, confidence=0.95, memory_budget=256 * 2**20, n_jobs=1, random_state=None, max_bins=1024):
+        """
+        Bootstrap the difference in means of two groups by resampling each group with
+        replacement. Batching, binning, parallelism and seeding work as in _permutation_test.
+
+        Returns:
+            tuple: (observed difference in means, two-sided p-value, (lower, upper) percentile
+                confidence interval)
+        """
+        values_a, values_b = group_a[metric].dropna().to_numpy('float64'), group_b[metric].dropna().to_numpy('float64')
+        observed = values_a.mean() - values_b.mean()
+        resampled = _resample('bootstrap', values_a, values_b, n_resamples, memory_budget, n_jobs, random_state, max_bins)
+        # Centre the bootstrap distribution on the null hypothesis of equal means
+        p_value = (np.count_nonzero(np.abs(resampled - observed) >= abs(observed)) + 1) / (n_resamples + 1)
+        tail = (1 - confidence) / 2
+        interval = tuple(np.quantile(resampled, [tail, 1 - tail]))
+        return observed, p_value, interval
+
     def _interpret_p_value(self, p_value, alpha=0.05):
         """
         Interpret the p-value to determine whether to reject the null hypothesis.
@@ -69,52 +224,152 @@ class ABHypothesisTesting:
             return "Test skipped due to identical values."
         return "Reject the null hypothesis." if p_value < alpha else "Fail to reject the null hypothesis."
 
-    def _risk_across_provinces(self):
+    def _result(self, method, feature, metric, statistic=None, p_value=None, n=0, message=None):
+        """
+        Build a structured test result.
+        """
+        return {
+            'method': method,
+            'feature': feature,
+            'metric': metric,
+            'statistic': None if statistic is None else float(statistic),
+            'p_value': None if p_value is None else float(p_value),
+            'n': int(n),
+            'message': message,
+        }
+
+    def _format_result(self, result):
+        """
+        Format a structured test result as the human-readable summary returned by run_all_tests.
+        """
+        if result['message'] is not None:
+            return result['message']
+        if result['method'] == 'chi-squared':
+            summary = f"Chi-squared test on {result['feature']} and {result['metric']}: chi2 = {result['statistic']}, p-value = {result['p_value']}\n"
+        elif result['method'] == 'z-test':
+            summary = f"Z-test on {result['metric']}: Z-statistic = {result['statistic']}, p-value = {result['p_value']}\n"
+        elif result['method'] in ('permutation', 'bootstrap'):
+            summary = f"{result['method'].capitalize()} test on {result['metric']}: difference in means = {result['statistic']}, p-value = {result['p_value']}\n"
+        else:
+            summary = f"T-test on {result['metric']}: T-statistic = {result['statistic']}, p-value = {result['p_value']}\n"
+        return summary + self._interpret_p_value(result['p_value'])
+
+    def _chi_squared_result(self, feature, metric):
+        """
+        Run the chi-squared test between a feature and a metric and return a structured result.
+        """
+        chi2, p_value = self._chi_squared_test(feature, metric)
+        n = self.data[[feature, metric]].notna().all(axis=1).sum()
+        return self._result('chi-squared', feature, metric, chi2, p_value, n)
+
+    def _resampling_result(self, method, feature, group_a, group_b, metric):
+        """
+        Run a permutation or bootstrap test on the difference in means of two groups and
+        return a structured result.
+        """
+        test = self._permutation_test if method == 'permutation' else self._bootstrap_test
+        observed, p_value = test(group_a, group_b, metric)[:2]
+        n = group_a[metric].count() + group_b[metric].count()
+        return self._result(method, feature, metric, observed, p_value, n)
+
+    def _risk_across_provinces_result(self):
         """
         Test for differences in risk across provinces using Chi-Squared test.
         """
-        chi2, p_value = self._chi_squared_test('Province', 'TotalPremium')
-        return f"Chi-squared test on Province and TotalPremium: chi2 = {chi2}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
+        return self._chi_squared_result('Province', 'TotalPremium')
 
-    def _risk_between_postalcodes(self):
+    def _risk_between_postalcodes_result(self):
         """
         Test for differences in risk between postal codes using Chi-Squared test.
         """
-        chi2, p_value = self._chi_squared_test('PostalCode', 'TotalPremium')
-        return f"Chi-squared test on PostalCode and TotalPremium: chi2 = {chi2}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
+        return self._chi_squared_result('PostalCode', 'TotalPremium')
 
-    def _risk_between_genders(self):
+    def _risk_between_genders_result(self, method='t'):
         """
-        Test for differences in risk between genders using t-test.
+        Test for differences in risk between genders using t-test, or a permutation or
+        bootstrap test (method='permutation'|'bootstrap'). Rows with an unspecified gender
+        fall in neither group, so the dataset itself is left untouched.
         """
-        self.data = self._segment_data('Gender', exclude_values=['Not Specified'])
-
-        group_a = self._segment_data('Gender', value='Male')
-        group_b = self._segment_data('Gender', value='Female')
+        group_a = self._segment_data('Gender', value='Male', columns=['TotalPremium'])
+        group_b = self._segment_data('Gender', value='Female', columns=['TotalPremium'])
 
         if group_a.empty or group_b.empty:
-            return "One of the gender groups is empty. Test cannot be performed."
+            return self._result('t-test', 'Gender', 'TotalPremium', message="One of the gender groups is empty. Test cannot be performed.")
+        if method != 't':
+            return self._resampling_result(method, 'Gender', group_a, group_b, 'TotalPremium')
 
         t_stat, p_value = self._t_test(group_a, group_b, 'TotalPremium')
-        return f"T-test on TotalPremium: T-statistic = {t_stat}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
-        
-    def _margin_between_postalcodes(self):
+        n = group_a['TotalPremium'].count() + group_b['TotalPremium'].count()
+        return self._result('t-test', 'Gender', 'TotalPremium', t_stat, p_value, n)
+
+    def _margin_between_postalcodes_result(self, method='t'):
         """
-        Test for margin differences between postal codes using t-test or z-test.
+        Test for margin differences between postal codes using t-test or z-test, or a
+        permutation or bootstrap test (method='permutation'|'bootstrap').
         """
         postal_codes = self.data['PostalCode'].unique()
         if len(postal_codes) < 2:
-            return "Not enough unique postal codes for testing."
+            return self._result('t-test', 'PostalCode', 'TotalPremium', message="Not enough unique postal codes for testing.")
 
-        group_a = self._segment_data('PostalCode', value=postal_codes[0])
-        group_b = self._segment_data('PostalCode', value=postal_codes[1])
-        
+        group_a = self._segment_data('PostalCode', value=postal_codes[0], columns=['TotalPremium'])
+        group_b = self._segment_data('PostalCode', value=postal_codes[1], columns=['TotalPremium'])
+        n = group_a['TotalPremium'].count() + group_b['TotalPremium'].count()
+
+        if method != 't':
+            return self._resampling_result(method, 'PostalCode', group_a, group_b, 'TotalPremium')
         if len(group_a) > 30 and len(group_b) > 30:
             z_stat, p_value = self._z_test(group_a, group_b, 'TotalPremium')
-            return f"Z-test on TotalPremium: Z-statistic = {z_stat}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
+            return self._result('z-test', 'PostalCode', 'TotalPremium', z_stat, p_value, n)
         else:
             t_stat, p_value = self._t_test(group_a, group_b, 'TotalPremium')
-            return f"T-test on TotalPremium: T-statistic = {t_stat}, p-value = {p_value}\n" + self._interpret_p_value(p_value)
+            return self._result('t-test', 'PostalCode', 'TotalPremium', t_stat, p_value, n)
+
+    def _risk_across_provinces(self):
+        """
+        Test for differences in risk across provinces using Chi-Squared test.
+        """
+        return self._format_result(self._risk_across_provinces_result())
+
+    def _risk_between_postalcodes(self):
+        """
+        Test for differences in risk between postal codes using Chi-Squared test.
+        """
+        return self._format_result(self._risk_between_postalcodes_result())
+
+    def _risk_between_genders(self):
+        """
+        Test for differences in risk between genders using t-test.
+        """
+        return self._format_result(self._risk_between_genders_result())
+
+    def _margin_between_postalcodes(self):
+        """
+        Test for margin differences between postal codes using t-test or z-test.
+        """
+        return self._format_result(self._margin_between_postalcodes_result())
+
+    def pairwise_margin_tests(self, feature='PostalCode', metric='TotalPremium', mode='pairs', correction='holm', alpha=0.05):
+        """
+        Test margin differences between every group of a feature, either for all pairs of
+        groups (mode='pairs') or each group against all remaining rows (mode='one_vs_rest').
+
+        Per-group count, mean and variance come from a single groupby pass; the z-tests
+        (both groups > 30 rows) and pooled t-tests for all comparisons are then evaluated as
+        array operations, and p-values are corrected for multiple comparisons.
+
+        Args:
+            feature (str): The grouping column.
+            metric (str): The numeric column to compare.
+            mode (str): 'pairs' or 'one_vs_rest'.
+            correction (str): 'holm', 'bonferroni', 'fdr_bh' or None.
+            alpha (float): Significance level applied to the adjusted p-values.
+
+        Returns:
+            pd.DataFrame: One row per comparison with group sizes, means, test, statistic,
+                raw and adjusted p-values, and whether the null hypothesis is rejected.
+        """
+        groups = self.data.groupby(feature, observed=True)[metric].agg(['count', 'mean', 'var'])
+        return pairwise_tests(groups, mode=mode, correction=correction, alpha=alpha)
 
     def run_all_tests(self):
         """
@@ -127,3 +382,339 @@ class ABHypothesisTesting:
             'Risk Differences Between Women and Men': self._risk_between_genders(),
         }
         return results
+
+    def run_tests(self, parallel=False, max_workers=None, method='t'):
+        """
+        Run every test in TESTS as an independent job and return structured results
+        (method, statistic, p-value, n, seconds) keyed by test name.
+
+        `method` selects how the tests comparing two group means (MEAN_TESTS) are run:
+        't' for the t-/z-tests, 'permutation' or 'bootstrap' for the resampling tests,
+        which do not assume normality. The chi-squared tests are unaffected.
+
+        With parallel=True the jobs run in a process pool. The required columns are written
+        once to memory-mapped arrays that every worker maps read-only, instead of pickling
+        the dataset into each process.
+        """
+        if method not in TEST_METHODS:
+            raise ValueError(f"Unknown test method '{method}'. Use one of {TEST_METHODS}.")
+        if not parallel:
+            return {name: _timed(self, test, method) for name, test in TESTS.items()}
+
+        columns = [col for col in self.REQUIRED_COLUMNS if col in self.data.columns]
+        with SharedFrame(self.data, columns=columns) as shared:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {name: executor.submit(_run_shared_test, type(self), shared, test, self.metric_bins, self.cache, method) for name, test in TESTS.items()}
+                return {name: future.result() for name, future in futures.items()}
+
+
+# Test name -> method returning a structured result
+TESTS = {
+    'Risk Differences Across Provinces': '_risk_across_provinces_result',
+    'Risk Differences Between Postal Codes': '_risk_between_postalcodes_result',
+    'Margin Differences Between Postal Codes': '_margin_between_postalcodes_result',
+    'Risk Differences Between Women and Men': '_risk_between_genders_result',
+}
+
+# Tests comparing two group means, which take a `method` from TEST_METHODS
+MEAN_TESTS = {'_margin_between_postalcodes_result', '_risk_between_genders_result'}
+TEST_METHODS = ('t', 'permutation', 'bootstrap')
+
+
+class GroupMoments:
+    # Feature/metric pairs compared by the margin and risk tests
+    DEFAULT_PAIRS = [('PostalCode', 'TotalPremium'), ('Gender', 'TotalPremium'), ('Province', 'TotalPremium'),
+                     ('PostalCode', 'TotalClaims'), ('Gender', 'TotalClaims'), ('Province', 'TotalClaims')]
+
+    def __init__(self, pairs: list = None):
+        """
+        Mergeable per-group count, mean and sum of squared deviations of a metric, for
+        (feature, metric) pairs. Chunks and separately built instances are combined with
+        the parallel update of Chan et al., so the moments of new rows can be folded into
+        earlier ones without rereading them.
+
+        Args:
+            pairs (list): (feature, metric) pairs to track. Defaults to DEFAULT_PAIRS.
+        """
+        self.pairs = [tuple(pair) for pair in (self.DEFAULT_PAIRS if pairs is None else pairs)]
+        self.moments = {pair: pd.DataFrame({'count': pd.Series(dtype='int64'), 'mean': pd.Series(dtype='float64'),
+                                            'm2': pd.Series(dtype='float64')}) for pair in self.pairs}
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Adds one chunk of rows. Pairs whose columns are missing from the chunk are skipped.
+        """
+        for feature, metric in self.pairs:
+            if feature not in chunk.columns or metric not in chunk.columns:
+                continue
+            groups = chunk.groupby(feature, observed=True)[metric].agg(['count', 'mean', 'var'])
+            groups = groups[groups['count'] > 0]
+            groups.index = groups.index.astype(object)
+            moments = pd.DataFrame({'count': groups['count'].astype('int64'), 'mean': groups['mean'],
+                                    'm2': (groups['var'] * (groups['count'] - 1)).fillna(0.0)})
+            self.moments[(feature, metric)] = _combine_moments(self.moments[(feature, metric)], moments)
+        return self
+
+    def merge(self, other: 'GroupMoments'):
+        """
+        Merges another instance (e.g. built on other months) into this one.
+        """
+        for pair, moments in other.moments.items():
+            if pair in self.moments:
+                self.moments[pair] = _combine_moments(self.moments[pair], moments)
+            else:
+                self.pairs.append(pair)
+                self.moments[pair] = moments
+        return self
+
+    def table(self, feature: str, metric: str) -> pd.DataFrame:
+        """
+        Returns 'count', 'mean' and 'var' (sample variance) per group, as
+        `data.groupby(feature)[metric].agg(['count', 'mean', 'var'])` would.
+        """
+        moments = self.moments[(feature, metric)].sort_index()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = moments['m2'] / (moments['count'] - 1)
+        return pd.DataFrame({'count': moments['count'], 'mean': moments['mean'], 'var': var.where(moments['count'] > 1)})
+
+    def pairwise_tests(self, feature: str = 'PostalCode', metric: str = 'TotalPremium', mode: str = 'pairs',
+                       correction: str = 'holm', alpha: float = 0.05) -> pd.DataFrame:
+        """
+        Same as `ABHypothesisTesting.pairwise_margin_tests`, from the accumulated moments.
+        """
+        return pairwise_tests(self.table(feature, metric), mode=mode, correction=correction, alpha=alpha)
+
+
+def _combine_moments(left, right):
+    # Chan et al.: n = na + nb, mean = ma + d * nb / n, M2 = M2a + M2b + d^2 * na * nb / n
+    if left.empty:
+        return right.copy()
+    if right.empty:
+        return left.copy()
+    index = left.index.union(right.index)
+    left, right = left.reindex(index), right.reindex(index)
+    n_a, n_b = left['count'].fillna(0), right['count'].fillna(0)
+    mean_a, mean_b = left['mean'].fillna(0.0), right['mean'].fillna(0.0)
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    return pd.DataFrame({
+        'count': n.astype('int64'),
+        'mean': mean_a + delta * n_b / n,
+        'm2': left['m2'].fillna(0.0) + right['m2'].fillna(0.0) + delta ** 2 * n_a * n_b / n,
+    })
+
+
+def pairwise_tests(groups: pd.DataFrame, mode: str = 'pairs', correction: str = 'holm', alpha: float = 0.05) -> pd.DataFrame:
+    """
+    Runs the z-tests (both groups > 30 rows) and pooled t-tests behind
+    `ABHypothesisTesting.pairwise_margin_tests` from per-group moments alone.
+
+    Args:
+        groups (pd.DataFrame): 'count', 'mean' and 'var' per group, indexed by group label.
+        mode (str): 'pairs' or 'one_vs_rest'.
+        correction (str): 'holm', 'bonferroni', 'fdr_bh' or None.
+        alpha (float): Significance level applied to the adjusted p-values.
+
+    Returns:
+        pd.DataFrame: One row per comparison (see `pairwise_margin_tests`).
+    """
+    from scipy import stats
+    groups = groups[groups['count'] > 0]
+    labels = groups.index.to_numpy()
+    n, mean, var = (groups[col].to_numpy(dtype='float64') for col in ['count', 'mean', 'var'])
+
+    if mode == 'pairs':
+        a, b = np.triu_indices(len(groups), k=1)
+        label_a, label_b = labels[a], labels[b]
+        n_a, mean_a, var_a = n[a], mean[a], var[a]
+        n_b, mean_b, var_b = n[b], mean[b], var[b]
+    elif mode == 'one_vs_rest':
+        total_n = n.sum()
+        total_mean = (n * mean).sum() / total_n
+        # Total sum of squared deviations, then remove each group's share (Chan et al.)
+        m2 = np.nan_to_num(var * (n - 1))
+        total_m2 = m2.sum() + (n * (mean - total_mean) ** 2).sum()
+        label_a, label_b = labels, np.full(len(labels), 'rest', dtype=object)
+        n_a, mean_a, var_a = n, mean, var
+        n_b = total_n - n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_b = (total_n * total_mean - n * mean) / n_b
+            m2_b = total_m2 - m2 - n * n_b / total_n * (mean - mean_b) ** 2
+            var_b = m2_b / (n_b - 1)
+    else:
+        raise ValueError("mode must be 'pairs' or 'one_vs_rest'.")
+
+    use_z = (n_a > 30) & (n_b > 30)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_stat = (mean_a - mean_b) / np.sqrt(var_a / n_a + var_b / n_b)
+        dof = n_a + n_b - 2
+        pooled = ((n_a - 1) * var_a + (n_b - 1) * var_b) / dof
+        t_stat = (mean_a - mean_b) / np.sqrt(pooled * (1 / n_a + 1 / n_b))
+    statistic = np.where(use_z, z_stat, t_stat)
+    p_value = np.where(use_z, 2 * stats.norm.sf(np.abs(z_stat)), 2 * stats.t.sf(np.abs(t_stat), dof))
+    p_adjusted = adjust_p_values(p_value, correction)
+
+    return pd.DataFrame({
+        'group_a': label_a,
+        'group_b': label_b,
+        'n_a': n_a.astype('int64'),
+        'n_b': n_b.astype('int64'),
+        'mean_a': mean_a,
+        'mean_b': mean_b,
+        'test': np.where(use_z, 'z-test', 't-test'),
+        'statistic': statistic,
+        'p_value': p_value,
+        'p_adjusted': p_adjusted,
+        'reject': p_adjusted < alpha,
+    })
+
+
+def adjust_p_values(p_values, method='holm'):
+    """
+    Adjust p-values for multiple comparisons ('holm', 'bonferroni', 'fdr_bh' or None).
+    Missing p-values are ignored and stay missing.
+    """
+    p_values = np.asarray(p_values, dtype='float64')
+    if method is None:
+        return p_values.copy()
+    adjusted = np.full_like(p_values, np.nan)
+    valid = ~np.isnan(p_values)
+    p = p_values[valid]
+    m = len(p)
+    if m == 0:
+        return adjusted
+    order = np.argsort(p)
+    ranked = p[order]
+    if method == 'bonferroni':
+        result = ranked * m
+    elif method == 'holm':
+        result = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    elif method == 'fdr_bh':
+        result = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError("method must be 'holm', 'bonferroni', 'fdr_bh' or None.")
+    unsorted = np.empty(m)
+    unsorted[order] = np.minimum(result, 1.0)
+    adjusted[valid] = unsorted
+    return adjusted
+
+
+def _resample(kind, values_a, values_b, n_resamples, memory_budget, n_jobs, random_state, max_bins=1024):
+    """
+    Draw `n_resamples` resampled differences in means in memory-bounded batches, optionally
+    spread over a process pool that memory-maps the integer-coded data.
+
+    The pooled values are coded once into at most `max_bins` bins with per-group counts (see
+    _code_values). A permutation then only needs how many values of each bin land in group A
+    (a multivariate hypergeometric draw), and a bootstrap resample how many times each bin
+    is drawn (a multinomial draw), so the cost per resample is O(number of bins) rather than
+    O(rows). With at most `max_bins` distinct values every bin holds one value and the
+    resampling distribution is exact.
+    """
+    coded = _code_values(values_a, values_b, max_bins)
+    # One int64 draw and its float64 cast per bin (twice for the two bootstrap groups)
+    bytes_per_resample = len(coded) * (16 if kind == 'permutation' else 32)
+    batch_size = int(min(max(memory_budget // bytes_per_resample, 1), n_resamples))
+    sizes = [batch_size] * (n_resamples // batch_size)
+    if n_resamples % batch_size:
+        sizes.append(n_resamples % batch_size)
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    if n_jobs == 1:
+        batches = [_resample_batch(kind, coded, size, seed) for size, seed in zip(sizes, seeds)]
+    else:
+        with SharedFrame(coded) as shared:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(_shared_resample_batch, kind, shared, size, seed) for size, seed in zip(sizes, seeds)]
+                batches = [future.result() for future in futures]
+    return np.concatenate(batches)
+
+
+def _code_values(values_a, values_b, max_bins):
+    """
+    Code the pooled values of two groups as bins: the distinct values when there are at most
+    `max_bins` of them, else equal-count quantile bins of the pooled values (e.g. for a
+    continuous metric such as TotalPremium, where nearly every row is distinct).
+
+    Returns:
+        pd.DataFrame: One row per bin with the per-group counts, and the mean and population
+            variance of the bin's values pooled ('value', 'var') and per group ('value_a',
+            'var_a', 'value_b', 'var_b'). Variances are zero when every bin is one value.
+    """
+    pooled = np.concatenate([values_a, values_b])
+    uniques, codes = np.unique(pooled, return_inverse=True)
+    exact = max_bins is None or len(uniques) <= max_bins
+    if not exact:
+        edges = np.unique(np.quantile(pooled, np.linspace(0, 1, max_bins + 1)[1:-1]))
+        codes = np.unique(np.searchsorted(edges, pooled, side='right'), return_inverse=True)[1]  # Drop empty bins
+    n_bins = codes.max() + 1 if len(codes) else 0
+    coded = {}
+    for suffix, part in (('', slice(None)), ('_a', slice(0, len(values_a))), ('_b', slice(len(values_a), None))):
+        part_codes, part_values = codes[part], pooled[part]
+        counts = np.bincount(part_codes, minlength=n_bins)
+        if exact:
+            means, variances = uniques, np.zeros(n_bins)
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.nan_to_num(np.bincount(part_codes, weights=part_values, minlength=n_bins) / counts)
+                variances = np.nan_to_num(np.bincount(part_codes, weights=(part_values - means[part_codes]) ** 2, minlength=n_bins) / counts)
+        coded[f'value{suffix}'], coded[f'var{suffix}'] = means, variances
+        if suffix:
+            coded[f'count{suffix}'] = counts
+    return pd.DataFrame(coded)
+
+
+def _resample_batch(kind, coded, size, seed):
+    """
+    Compute one batch of resampled differences in means from integer-coded data.
+
+    Bin counts are drawn exactly. For bins holding several distinct values, the sum of the
+    values drawn from a bin is its count times the bin mean plus a normal term with the
+    exact variance of that sum (with or without replacement), so the resampling variance
+    is preserved.
+    """
+    rng = np.random.default_rng(seed)
+    count_a, count_b = coded['count_a'].to_numpy(), coded['count_b'].to_numpy()
+    n_a, n_b = count_a.sum(), count_b.sum()
+    if kind == 'permutation':
+        values, variances, counts = coded['value'].to_numpy(), coded['var'].to_numpy(), count_a + count_b
+        drawn_a = rng.multivariate_hypergeometric(counts, n_a, size=size, method='marginals')
+        sum_a = drawn_a @ values
+        if variances.any():
+            # Variance of the sum of k values drawn without replacement from a bin of N values
+            scale = np.where(counts > 1, variances * counts / np.maximum(counts - 1, 1), 0.0)
+            sum_a += rng.standard_normal(size) * np.sqrt(drawn_a * (counts - drawn_a) / np.maximum(counts, 1) @ scale)
+        return sum_a / n_a - (counts @ values - sum_a) / n_b
+    drawn_a = rng.multinomial(n_a, count_a / n_a, size=size)
+    drawn_b = rng.multinomial(n_b, count_b / n_b, size=size)
+    sum_a, sum_b = drawn_a @ coded['value_a'].to_numpy(), drawn_b @ coded['value_b'].to_numpy()
+    var_a, var_b = coded['var_a'].to_numpy(), coded['var_b'].to_numpy()
+    if var_a.any() or var_b.any():
+        # Variance of the sum of k values drawn with replacement from a bin
+        sum_a += rng.standard_normal(size) * np.sqrt(drawn_a @ var_a)
+        sum_b += rng.standard_normal(size) * np.sqrt(drawn_b @ var_b)
+    return sum_a / n_a - sum_b / n_b
+
+
+def _shared_resample_batch(kind, shared, size, seed):
+    """
+    Worker entry point: map the coded data and compute one batch.
+    """
+    return _resample_batch(kind, shared.load(), size, seed)
+
+
+def _timed(tester, test, method='t'):
+    """
+    Run one test and add its wall time to the result.
+    """
+    start = time.perf_counter()
+    result = getattr(tester, test)(method) if test in MEAN_TESTS else getattr(tester, test)()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _run_shared_test(tester_class, shared, test, metric_bins=None, cache=None, method='t'):
+    """
+    Worker entry point: map the shared columns and run one test on them.
+    """
+    return _timed(tester_class(shared.load(), metric_bins=metric_bins, cache=cache), test, method)
@@ -0,0 +1,287 @@
+import argparse
+import glob
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from scripts.data_processing import MissingDataProfiler
+from scripts.hypothesis_testing import GroupMoments
+from scripts.instrumentation import instrument_class, write_metrics
+from scripts.plot_summaries import PlotAggregates
+from scripts.schema import iter_dataset
+
+# Column the data grows by; one partition per calendar month of it
+MONTH_COLUMN = 'TransactionMonth'
+
+# Default location of the persisted state (aggregates.pkl and state.json)
+DEFAULT_STATE_DIR = 'data/incremental'
+
+# Bumped whenever the pickled aggregates change shape, so that old states are rebuilt
+STATE_VERSION = 1
+
+
+def month_keys(values) -> np.ndarray:
+    """
+    Returns the 'YYYY-MM' month of every date in `values` ('NaT' for missing dates).
+    """
+    return np.asarray(values, dtype='datetime64[ns]').astype('datetime64[M]').astype(str)
+
+
+def partition_path(directory: str, month: str) -> str:
+    """
+    Returns the path of one month's partition file.
+    """
+    return os.path.join(directory, f'{MONTH_COLUMN}={month}.parquet')
+
+
+def month_partitions(directory: str) -> dict:
+    """
+    Lists the month partitions of a directory written by `write_month_partitions`.
+
+    Returns:
+        dict: {month: path}, in month order.
+    """
+    prefix = f'{MONTH_COLUMN}='
+    paths = glob.glob(os.path.join(directory, f'{prefix}*.parquet'))
+    return dict(sorted((os.path.basename(path)[len(prefix):-len('.parquet')], path) for path in paths))
+
+
+def write_month_partitions(file_path: str, output_dir: str, chunksize: int = 100_000, delimiter: str = ',') -> dict:
+    """
+    Splits a Parquet or delimited file into one Parquet file per month of TransactionMonth,
+    streaming it chunk by chunk. Monthly deliveries can then be dropped into the same
+    directory as new partition files.
+
+    Args:
+        file_path (str): The path to a `.parquet` file or a delimited text file.
+        output_dir (str): Directory of the partition files (existing months are overwritten).
+        chunksize (int): Number of rows held in memory at a time.
+        delimiter (str): The field delimiter for text files.
+
+    Returns:
+        dict: {month: rows written}.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from scripts.extract_zip import _normalize_schema
+
+    os.makedirs(output_dir, exist_ok=True)
+    writers, rows = {}, {}
+    try:
+        for chunk in iter_dataset(file_path, chunksize=chunksize, delimiter=delimiter):
+            months = month_keys(chunk[MONTH_COLUMN])
+            for month, positions in pd.Series(months).groupby(months).indices.items():
+                table = pa.Table.from_pandas(chunk.iloc[positions], preserve_index=False)
+                if month not in writers:
+                    writers[month] = pq.ParquetWriter(partition_path(output_dir, month), _normalize_schema(table.schema))
+                writers[month].write_table(table.cast(writers[month].schema))
+                rows[month] = rows.get(month, 0) + len(positions)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return dict(sorted(rows.items()))
+
+
+class MonthlyAggregates:
+    def __init__(self, relative_accuracy: float = 0.01, capacity: int = 10_000, random_state: int = 0):
+        """
+        Every statistic the pipeline needs, as mergeable aggregates: missing-value counts and
+        imputation sketches (`MissingDataProfiler`), per-group moments for the hypothesis
+        tests (`GroupMoments`) and the DVC plot summaries (`PlotAggregates`).
+
+        Args:
+            relative_accuracy (float): Relative accuracy of the quantile sketches.
+            capacity (int): Number of counters kept per frequency sketch.
+            random_state (int): Seed of the plot samples; use a different one per month.
+        """
+        self.profile = MissingDataProfiler(relative_accuracy=relative_accuracy, capacity=capacity)
+        self.moments = GroupMoments()
+        self.plots = PlotAggregates(relative_accuracy=relative_accuracy, random_state=random_state)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Adds one chunk of rows.
+        """
+        self.profile.update(chunk)
+        self.moments.update(chunk)
+        self.plots.update(chunk)
+        return self
+
+    def merge(self, other: 'MonthlyAggregates'):
+        """
+        Merges the aggregates of other rows (e.g. a new month) into these.
+        """
+        self.profile.merge(other.profile)
+        self.moments.merge(other.moments)
+        self.plots.merge(other.plots)
+        return self
+
+
+@instrument_class
+class IncrementalState:
+    def __init__(self, directory: str = DEFAULT_STATE_DIR):
+        """
+        Aggregates of every month ingested so far, persisted between pipeline runs. Each run
+        reads only the months that are not in the state yet and merges their aggregates in,
+        so a monthly refresh costs O(new data) instead of O(all data).
+
+        A month is ingested once, as a whole; corrections to an already ingested month need
+        a rebuild (`clear` and ingest everything again).
+
+        Args:
+            directory (str): Where `aggregates.pkl` and `state.json` are kept.
+        """
+        self.directory = directory
+        self.months = {}
+        self.aggregates = MonthlyAggregates()
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_STATE_DIR):
+        """
+        Loads the persisted state, or returns an empty one if there is none (or it was
+        written by an incompatible version). The months come from `aggregates.pkl`, which
+        always matches the aggregates.
+        """
+        state = cls(directory)
+        state_path, aggregates_path = state._paths()
+        if not (os.path.exists(state_path) and os.path.exists(aggregates_path)):
+            return state
+        with open(state_path) as f:
+            meta = json.load(f)
+        if meta.get('version') != STATE_VERSION:
+            return state
+        with open(aggregates_path, 'rb') as f:
+            parts = pickle.load(f)
+        state.aggregates.profile, state.aggregates.moments, state.aggregates.plots = parts['profile'], parts['moments'], parts['plots']
+        state.months = parts['months']
+        return state
+
+    def save(self) -> None:
+        """
+        Writes the aggregates together with the months they cover in one atomic replace,
+        then `state.json`, a readable copy of the months list.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        state_path, aggregates_path = self._paths()
+        tmp_path = f'{aggregates_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            # The parts, not MonthlyAggregates itself, so the file also loads when this module runs as __main__
+            parts = {'months': self.months, 'profile': self.aggregates.profile, 'moments': self.aggregates.moments,
+                     'plots': self.aggregates.plots}
+            pickle.dump(parts, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, aggregates_path)
+        tmp_path = f'{state_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': STATE_VERSION, 'rows': self.rows, 'months': self.months}, f, indent=2)
+        os.replace(tmp_path, state_path)
+
+    def clear(self) -> None:
+        """
+        Forgets every ingested month.
+        """
+        self.months = {}
+        self.aggregates = MonthlyAggregates()
+
+    @property
+    def rows(self) -> int:
+        return sum(self.months.values())
+
+    def ingest_partitions(self, directory: str, chunksize: int = 100_000) -> list:
+        """
+        Ingests the month partition files of `directory` that are not in the state yet.
+        Files of months already ingested are not opened.
+
+        Returns:
+            list: The newly ingested months.
+        """
+        new = {month: path for month, path in month_partitions(directory).items() if month not in self.months}
+        for month, path in new.items():
+            aggregates = MonthlyAggregates(random_state=_month_seed(month))
+            rows = 0
+            for chunk in iter_dataset(path, chunksize=chunksize):
+                aggregates.update(chunk)
+                rows += len(chunk)
+            self.aggregates.merge(aggregates)
+            self.months[month] = rows
+        return list(new)
+
+    def ingest(self, chunks) -> list:
+        """
+        Ingests the rows of `chunks` (DataFrames with a TransactionMonth column) whose month
+        is not in the state yet; rows of already ingested months are skipped. The months
+        of this call are only added to the state once every chunk has been read.
+
+        Returns:
+            list: The newly ingested months.
+        """
+        pending = {}
+        for chunk in chunks:
+            months = month_keys(chunk[MONTH_COLUMN])
+            for month, positions in pd.Series(months).groupby(months).indices.items():
+                if month in self.months:
+                    continue
+                if month not in pending:
+                    pending[month] = [MonthlyAggregates(random_state=_month_seed(month)), 0]
+                pending[month][0].update(chunk.iloc[positions])
+                pending[month][1] += len(positions)
+        for month, (aggregates, rows) in sorted(pending.items()):
+            self.aggregates.merge(aggregates)
+            self.months[month] = rows
+        return sorted(pending)
+
+    def ingest_file(self, file_path: str, chunksize: int = 100_000, delimiter: str = ',') -> list:
+        """
+        Streams a Parquet or delimited file through `ingest`. The whole file is read; use
+        month partitions (`ingest_partitions`) to read only the new months.
+        """
+        return self.ingest(iter_dataset(file_path, chunksize=chunksize, delimiter=delimiter))
+
+    def _paths(self):
+        return os.path.join(self.directory, 'state.json'), os.path.join(self.directory, 'aggregates.pkl')
+
+
+def _month_seed(month):
+    # Distinct, reproducible sample seeds per month, so that merged samples stay uniform
+    return int(month.replace('-', '')) if month[:4].isdigit() else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest new TransactionMonth partitions into the persisted aggregates.")
+    parser.add_argument("--partitions", default="data/partitions", help="Directory of monthly partition files.")
+    parser.add_argument("--split", metavar="FILE", help="First split this file into monthly partitions.")
+    parser.add_argument("--split-only", action="store_true", help="Only write the partitions of --split; do not ingest them.")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="Forget the ingested months and ingest every partition again.")
+    parser.add_argument("--plots", metavar="DIR", help="Also render the DVC plots from the aggregates into this directory.")
+    args = parser.parse_args()
+
+    if args.split_only and not args.split:
+        parser.error("--split-only requires --split")
+    if args.split:
+        partitions = write_month_partitions(args.split, args.partitions)
+        print(f"Wrote {len(partitions)} month partition(s), {sum(partitions.values())} rows, to {args.partitions}.")
+        if args.split_only:
+            raise SystemExit(0)
+    state = IncrementalState.load(args.state_dir)
+    if args.rebuild:
+        state.clear()
+    months = state.ingest_partitions(args.partitions)
+    state.save()
+    print(f"Ingested {len(months)} new month(s): {', '.join(months) or '-'}; {len(state.months)} month(s), {state.rows} rows in total.")
+
+    aggregates = state.aggregates
+    with open(os.path.join(args.state_dir, "MissingDataSummary.json"), "w") as f:
+        json.dump(aggregates.profile.summary().to_dict(), f)
+    imputer = aggregates.profile.to_imputer()
+    with open(os.path.join(args.state_dir, "fill_values.json"), "w") as f:
+        json.dump({'drop_cols': imputer.drop_cols, 'fill_values': imputer.fill_values_}, f, indent=2, default=str)
+    aggregates.moments.pairwise_tests(mode='one_vs_rest').to_csv(os.path.join(args.state_dir, "margin_tests.csv"), index=False)
+
+    if args.plots:
+        from scripts.data_visualization import DataVisualizer, use_headless_backend
+        use_headless_backend()
+        numerical_cols = [col for col in aggregates.plots.numeric_cols if col not in set(imputer.drop_cols)]
+        cover_types = aggregates.plots.value_counts('CoverType').nlargest(5).index.to_list()
+        DataVisualizer.from_summaries(aggregates.plots).render_dvc_plots(numerical_cols, cover_types, output_dir=args.plots)
+    write_metrics("data/metrics/incremental.json")
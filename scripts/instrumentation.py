@@ -0,0 +1,211 @@
+import functools
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from collections import deque
+
+# The most recent per-call records, in completion order (bounded for long-running processes)
+CALLS = deque(maxlen=10_000)
+
+# Per-name aggregates of every recorded call
+TOTALS = {}
+
+# Depth of nested instrumented calls; the peak RSS is only reset by the outermost one
+_depth = 0
+
+
+def instrumented(func=None, *, name: str = None):
+    """
+    Decorator recording, for every call of `func`: wall and CPU time (including worker
+    processes that finished during the call), peak and net change of the resident set size,
+    the traced memory peak when `tracemalloc` is tracing (e.g. under `python -X tracemalloc`),
+    and the number of input rows.
+
+    The peak RSS is reset when an outermost instrumented call starts, so nested calls report
+    the peak since their outermost caller started. Input rows come from the first argument
+    with a `shape` (DataFrame, array, sparse matrix), else from `self.data`, else from the
+    result. Calls that raise are not recorded.
+
+    Args:
+        func: The function to wrap (when used as `@instrumented`).
+        name (str): The metric name. Defaults to the function's qualified name.
+    """
+    if func is None:
+        return lambda f: instrumented(f, name=name)
+    key = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _depth
+        if _depth == 0:
+            reset_peak_rss()
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        rss_start = _rss_mb()
+        _depth += 1
+        start, start_cpu = time.perf_counter(), _cpu_seconds()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            _depth -= 1
+        wall, cpu = time.perf_counter() - start, _cpu_seconds() - start_cpu
+        rss_end = _rss_mb()
+        record = {
+            'name': key,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'peak_rss_mb': peak_rss_mb(),
+            'rss_delta_mb': rss_end - rss_start if rss_start is not None else None,
+            'rows': _rows(args, kwargs, result),
+        }
+        if tracemalloc.is_tracing():
+            record['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        CALLS.append(record)
+        _accumulate(TOTALS, record)
+        return result
+    return wrapper
+
+
+def instrument_class(cls):
+    """
+    Class decorator applying `instrumented` to every public method and classmethod defined
+    in the class body, named `<class>.<method>` (properties and private methods are left
+    as they are).
+    """
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_'):
+            continue
+        if isinstance(value, classmethod):
+            setattr(cls, attr, classmethod(instrumented(value.__func__, name=f'{cls.__name__}.{attr}')))
+        elif inspect.isfunction(value):
+            setattr(cls, attr, instrumented(value, name=f'{cls.__name__}.{attr}'))
+    return cls
+
+
+def summarize_calls(calls=None) -> dict:
+    """
+    Aggregates call records per name: number of calls, total wall and CPU seconds, the largest
+    peak RSS, RSS increase and traced peak, and the largest number of input rows.
+
+    Args:
+        calls: Call records. If None, the totals of every call recorded so far are returned.
+
+    Returns:
+        dict: {name: metrics}, in order of first completion.
+    """
+    if calls is None:
+        return {name: dict(metrics) for name, metrics in TOTALS.items()}
+    summary = {}
+    for call in calls:
+        _accumulate(summary, call)
+    return summary
+
+
+def write_metrics(path: str, reset: bool = True) -> dict:
+    """
+    Writes the per-name summary of the recorded calls as a JSON metrics file (for
+    `dvc metrics show` / `dvc metrics diff`), rounded to three decimals.
+
+    Args:
+        path (str): The metrics file to write.
+        reset (bool): Clear the recorded calls afterwards.
+
+    Returns:
+        dict: The written summary.
+    """
+    summary = {
+        name: {field: round(value, 3) if isinstance(value, float) else value for field, value in metrics.items()}
+        for name, metrics in summarize_calls().items()
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    if reset:
+        reset_metrics()
+    return summary
+
+
+def reset_metrics() -> None:
+    """
+    Clears the recorded calls and totals.
+    """
+    CALLS.clear()
+    TOTALS.clear()
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of this process in MB, since it started or since the
+    last reset_peak_rss.
+    """
+    peak = _status_kb('VmHWM:')
+    if peak is None:
+        import resource
+        # Peak of the whole process; ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else peak / 1024
+    return peak / 1024
+
+
+def reset_peak_rss() -> None:
+    """
+    Resets the peak resident set size to the current one, so that peak_rss_mb measures the
+    work that follows. Only supported on Linux; elsewhere the peak keeps accumulating.
+    """
+    # Linux resets VmHWM to the current RSS when "5" is written to clear_refs
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _accumulate(summary, call):
+    metrics = summary.setdefault(call['name'], {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+    metrics['calls'] += 1
+    metrics['wall_seconds'] += call['wall_seconds']
+    metrics['cpu_seconds'] += call['cpu_seconds']
+    for field in ('peak_rss_mb', 'rss_delta_mb', 'traced_peak_mb', 'rows'):
+        if call.get(field) is not None:
+            metrics[field] = max(metrics.get(field, call[field]), call[field])
+
+
+def _rows(args, kwargs, result):
+    # Rows of the first array-like input, of self.data, or of the result
+    for value in (*args, *kwargs.values()):
+        shape = getattr(value, 'shape', None)
+        if isinstance(shape, tuple) and shape:
+            return int(shape[0])
+    for value in (getattr(args[0], 'data', None) if args else None, result, getattr(result, 'data', None)):
+        shape = getattr(value, 'shape', None)
+        if isinstance(shape, tuple) and shape:
+            return int(shape[0])
+    return None
+
+
+def _cpu_seconds():
+    # CPU time of this process and of its reaped child processes
+    try:
+        import resource
+    except ImportError:
+        return time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def _status_kb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _rss_mb():
+    rss = _status_kb('VmRSS:')
+    return rss / 1024 if rss is not None else None
@@ -0,0 +1,248 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Per-node arrays of a CompactForest, each stored as its own .npy file
+FOREST_ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'missing_left', 'roots']
+
+
+class CompactForest:
+    def __init__(self, left, right, feature, threshold, value, missing_left, roots, n_features, feature_names=None):
+        """
+        Prediction-only regression forest stored as flat per-node arrays covering all trees.
+        Leaves point to themselves, so every row can descend every tree in lockstep.
+
+        Args:
+            left, right: Global index of each node's children (the node itself for leaves).
+            feature: Feature tested at each node.
+            threshold: Split threshold; rows with x <= threshold go left.
+            value: Prediction stored at each node.
+            missing_left: Whether missing values go left at each node.
+            roots: Global index of each tree's root node.
+            n_features (int): Number of input columns.
+            feature_names (list): Input column names, used to reorder DataFrame input.
+        """
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.n_features_in_ = int(n_features)
+        self.feature_names = None if feature_names is None else list(feature_names)
+
+    @classmethod
+    def from_sklearn(cls, model, threshold_dtype: str = 'float32') -> 'CompactForest':
+        """
+        Converts a fitted single-output `RandomForestRegressor` (or other forest, or a single
+        `DecisionTreeRegressor`). scikit-learn compares float32 inputs against float64
+        thresholds; rounding each threshold down to the nearest float32 keeps every
+        comparison, and therefore every prediction, identical.
+
+        Args:
+            model: The fitted scikit-learn tree model.
+            threshold_dtype (str): 'float32' (compact) or 'float64'.
+
+        Returns:
+            CompactForest: The converted forest.
+        """
+        trees = [est.tree_ for est in getattr(model, 'estimators_', [model])]
+        if trees[0].n_outputs != 1:
+            raise ValueError("CompactForest only supports single-output regressors.")
+        sizes = np.array([tree.node_count for tree in trees])
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype('int64')
+        n_features = model.n_features_in_
+        index_dtype = 'int32' if sizes.sum() < 2 ** 31 else 'int64'
+
+        left, right, feature, threshold, value, missing_left = [], [], [], [], [], []
+        for root, tree in zip(roots, trees):
+            nodes = np.arange(tree.node_count) + root
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, nodes, tree.children_left + root))
+            right.append(np.where(is_leaf, nodes, tree.children_right + root))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            value.append(tree.value[:, 0, 0])
+            missing_left.append(tree.missing_go_to_left.astype(bool) if hasattr(tree, 'missing_go_to_left')
+                                else np.zeros(tree.node_count, dtype=bool))
+
+        threshold = np.concatenate(threshold)
+        if np.dtype(threshold_dtype) == np.float32:
+            rounded = threshold.astype('float32')
+            above = rounded > threshold
+            rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+            threshold = rounded
+        return cls(
+            left=np.concatenate(left).astype(index_dtype),
+            right=np.concatenate(right).astype(index_dtype),
+            feature=np.concatenate(feature).astype('int16' if n_features < 2 ** 15 else 'int32'),
+            threshold=threshold,
+            value=np.concatenate(value),
+            missing_left=np.concatenate(missing_left),
+            roots=roots,
+            n_features=n_features,
+            feature_names=getattr(model, 'feature_names_in_', None),
+        )
+
+    def predict(self, X, batch_size: int = 10_000) -> np.ndarray:
+        """
+        Returns the mean prediction over trees, processing `batch_size` rows at a time.
+        Sparse input is densified one batch at a time (absent entries are zeros).
+        """
+        if isinstance(X, pd.DataFrame) and self.feature_names is not None:
+            X = X[self.feature_names]
+        is_sparse = sparse.issparse(X)
+        # scikit-learn also evaluates trees on float32 input
+        X = sparse.csr_matrix(X, dtype='float32') if is_sparse else np.asarray(X, dtype='float32')
+        predictions = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], batch_size):
+            batch = X[start:start + batch_size]
+            predictions[start:start + batch_size] = self._predict_batch(batch.toarray() if is_sparse else batch)
+        return predictions
+
+    def _predict_batch(self, X):
+        # Descend all (tree, row) pairs together, dropping pairs as they reach a leaf
+        n_trees, n_rows = len(self.roots), len(X)
+        leaves = np.repeat(np.asarray(self.roots), n_rows)
+        rows = np.tile(np.arange(n_rows), n_trees)
+        active = np.arange(leaves.size)
+        nodes = leaves.copy()
+        while active.size:
+            x = X[rows[active], self.feature[nodes]]
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & self.missing_left[nodes])
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            moved = children != nodes
+            leaves[active[~moved]] = nodes[~moved]
+            active, nodes = active[moved], children[moved]
+        return self.value[leaves].reshape(n_trees, n_rows).mean(axis=0)
+
+    def save(self, directory: str) -> None:
+        """
+        Writes every array as an uncompressed `.npy` file so that it can be memory-mapped.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        _write_meta(directory, {'kind': 'forest', 'n_features': self.n_features_in_, 'feature_names': self.feature_names})
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'CompactForest':
+        """
+        Loads a saved forest; with `mmap`, arrays are paged in lazily from disk and shared
+        between processes.
+        """
+        meta = _read_meta(directory)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                  for name in FOREST_ARRAYS}
+        return cls(**arrays, n_features=meta['n_features'], feature_names=meta['feature_names'])
+
+
+def save_model(model, directory: str, threshold_dtype: str = 'float32') -> str:
+    """
+    Saves a model from `model_building` in its most compact form: scikit-learn trees and
+    forests as a `CompactForest`, XGBoost models in XGBoost's binary UBJSON format, and
+    anything else (e.g. linear models, which are small) with pickle.
+
+    Args:
+        model: The fitted model.
+        directory (str): The artifact directory to create.
+        threshold_dtype (str): Threshold precision for tree models.
+
+    Returns:
+        str: The artifact directory.
+    """
+    from xgboost import XGBRegressor
+
+    os.makedirs(directory, exist_ok=True)
+    if hasattr(model, 'tree_') or (hasattr(model, 'estimators_') and hasattr(model.estimators_[0], 'tree_')):
+        CompactForest.from_sklearn(model, threshold_dtype=threshold_dtype).save(directory)
+    elif isinstance(model, XGBRegressor):
+        model.save_model(os.path.join(directory, 'model.ubj'))
+        _write_meta(directory, {'kind': 'xgboost'})
+    else:
+        with open(os.path.join(directory, 'model.pkl'), 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _write_meta(directory, {'kind': 'pickle'})
+    return directory
+
+
+def load_model(path: str, mmap: bool = True):
+    """
+    Loads an artifact written by `save_model`, or a plain pickle file.
+
+    Args:
+        path (str): The artifact directory or a pickle file.
+        mmap (bool): Memory-map forest arrays instead of reading them into RAM.
+
+    Returns:
+        A model with a `predict` method.
+    """
+    if not os.path.isdir(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    kind = _read_meta(path)['kind']
+    if kind == 'forest':
+        return CompactForest.load(path, mmap=mmap)
+    if kind == 'xgboost':
+        from xgboost import XGBRegressor
+        model = XGBRegressor()
+        model.load_model(os.path.join(path, 'model.ubj'))
+        return model
+    with open(os.path.join(path, 'model.pkl'), 'rb') as f:
+        return pickle.load(f)
+
+
+def artifact_size(path: str) -> int:
+    """
+    Returns the on-disk size of an artifact directory or file in bytes.
+    """
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def benchmark_load(path: str, n_rows: int = 1, mmap: bool = True) -> dict:
+    """
+    Measures a scoring worker's cold start in a fresh interpreter: importing this module,
+    loading the model from `path`, and scoring `n_rows` rows of zeros.
+
+    Returns:
+        dict: 'load_seconds', 'first_predict_seconds', 'rss_mb' (resident memory of the fresh
+            process after the first prediction; peak RSS where /proc is unavailable) and
+            'size_mb' (on disk).
+    """
+    script = (
+        "import json, resource, sys, time\n"
+        "import numpy as np\n"
+        "start = time.perf_counter()\n"
+        "from scripts.model_artifacts import load_model\n"
+        "model = load_model(sys.argv[1], mmap=sys.argv[3] == '1')\n"
+        "loaded = time.perf_counter()\n"
+        "model.predict(np.zeros((int(sys.argv[2]), model.n_features_in_), dtype='float32'))\n"
+        "done = time.perf_counter()\n"
+        "try:\n"
+        "    rss = int(open('/proc/self/statm').read().split()[1]) * resource.getpagesize() / 1024 ** 2\n"
+        "except OSError:\n"
+        "    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024\n"
+        "print(json.dumps({'load_seconds': loaded - start, 'first_predict_seconds': done - loaded, 'rss_mb': rss}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', script, path, str(n_rows), '1' if mmap else '0'],
+                            cwd=root, capture_output=True, text=True, check=True).stdout
+    return {**json.loads(output.strip().splitlines()[-1]), 'size_mb': artifact_size(path) / 1024 ** 2}
+
+
+def _write_meta(directory, meta):
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+
+def _read_meta(directory):
+    with open(os.path.join(directory, 'meta.json')) as f:
+        return json.load(f)
@@ -1,12 +1,43 @@
 # Import necessary libraries
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-from sklearn.metrics import r2_score
-import shap  # Import SHAP for model interpretation
+# scikit-learn, XGBoost and SHAP take seconds to import, so they are imported where they are used
+import functools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scripts.cache import content_hash
+from scripts.instrumentation import instrumented, peak_rss_mb, reset_peak_rss
+from scripts.sampling import stratified_sample
+from scripts.shared_data import SharedFrame
 
+
+@functools.lru_cache(maxsize=None)
+def _model_registry():
+    # Candidate models for train_models: name -> (estimator class, constructor parameters),
+    # built on first use so that importing this module does not load the estimator libraries
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from xgboost import XGBRegressor
+    return {
+        'Linear Regression': (LinearRegression, {}),
+        'Random Forest': (RandomForestRegressor, {'random_state': 42}),
+        'XGBoost': (XGBRegressor, {'random_state': 42}),
+    }
+
+
+def __getattr__(name):
+    # `model_building.MODEL_REGISTRY` is an alias of the cached registry
+    if name == 'MODEL_REGISTRY':
+        return _model_registry()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@instrumented
 def linear_regression(X_train, y_train, X_test, y_test):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_squared_error
     model = LinearRegression()  # Initialize the Linear Regression model
     model.fit(X_train, y_train)  # Fit the model to the training data
     predictions = model.predict(X_test)  # Make predictions on the test set
@@ -14,15 +45,21 @@ def linear_regression(X_train, y_train, X_test, y_test):
     return model, mse  # Return the trained model and the error
 
 
+@instrumented
 def random_forest(X_train, y_train, X_test, y_test):
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error
     model = RandomForestRegressor(random_state=42)  # Initialize the Random Forest model
     model.fit(X_train, y_train)  # Fit the model to the training data
     predictions = model.predict(X_test)  # Make predictions on the test set
     mse = mean_squared_error(y_test, predictions)  # Calculate mean squared error
     return model, mse  # Return the trained model and the error
 
- 
+
+@instrumented
 def xgboost_model(X_train, y_train, X_test, y_test):
+    from sklearn.metrics import mean_squared_error
+    from xgboost import XGBRegressor
     model = XGBRegressor(random_state=42)  # Initialize the XGBoost model
     model.fit(X_train, y_train)  # Fit the model to the training data
     predictions = model.predict(X_test)  # Make predictions on the test set
@@ -30,14 +67,215 @@ def xgboost_model(X_train, y_train, X_test, y_test):
     return model, mse  # Return the trained model and the error
 
 
-def evaluate_model(model, X_test, y_test):
-    predictions = model.predict(X_test)  # Make predictions on the test set
+@instrumented
+def evaluate_model(model, X_test, y_test, predictions=None):
+    from sklearn.metrics import mean_squared_error, r2_score
+    if predictions is None:  # Reuse cached predictions when the caller already has them
+        predictions = model.predict(X_test)  # Make predictions on the test set
     mse = mean_squared_error(y_test, predictions)  # Calculate mean squared error
     r2 = r2_score(y_test, predictions)  # Calculate R² score
     return {"mse": mse, "r2": r2}  # Return the evaluation metrics
 
 
-def explain_model_shap(model, X_train):
+@instrumented
+def train_models(X_train, y_train, X_test, y_test, registry=None, max_workers=None, n_jobs=None, cache=None):
+    """
+    Train every candidate in `registry` (default MODEL_REGISTRY) concurrently, one process
+    per model, each limited to `n_jobs` threads (default: the CPUs split evenly between
+    the workers). Each model predicts on the test set exactly once. With a `StageCache`,
+    candidates already fitted on identical data and parameters are loaded instead of refit,
+    keeping the timings of their original fit. X_train and X_test may be DataFrames or
+    SciPy sparse matrices such as the design matrix of `SparseEncoder`; every function in
+    this module except the SHAP helpers accepts both.
+
+    Returns:
+        tuple: (fitted models, cached test predictions, comparison table with mse, r2,
+            fit/predict/wall seconds and peak RSS per model)
+    """
+    registry = _model_registry() if registry is None else registry
+    max_workers = max_workers or min(len(registry), os.cpu_count() or 1)
+    n_jobs = n_jobs or max(1, (os.cpu_count() or 1) // max_workers)
+
+    runs, keys = {}, {}
+    if cache is not None:
+        data_hash = [content_hash(X_train), content_hash(y_train), content_hash(X_test)]  # Hashed once for every candidate
+        for name, (estimator, params) in registry.items():
+            keys[name] = cache.key('fit_candidate', code=_fit_candidate, data=data_hash, estimator=f'{estimator.__module__}.{estimator.__qualname__}', params=params)
+            run = cache.get(keys[name])
+            if run is not None:
+                runs[name] = run
+    pending = {name: candidate for name, candidate in registry.items() if name not in runs}
+    max_workers = max(1, min(max_workers, len(pending)))
+
+    if max_workers == 1:
+        runs.update({name: _fit_candidate(estimator, params, n_jobs, X_train, y_train, X_test)
+                     for name, (estimator, params) in pending.items()})
+    else:
+        # DataFrames are written once to memory-mapped files instead of being pickled per model
+        shared = [SharedFrame(frame) if isinstance(frame, pd.DataFrame) else frame
+                  for frame in (X_train, y_train.to_frame() if isinstance(y_train, pd.Series) else y_train, X_test)]
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=1) as executor:
+                futures = {name: executor.submit(_fit_shared_candidate, estimator, params, n_jobs, *shared)
+                           for name, (estimator, params) in pending.items()}
+                runs.update({name: future.result() for name, future in futures.items()})
+        finally:
+            for frame in shared:
+                if isinstance(frame, SharedFrame):
+                    frame.close()
+
+    if cache is not None:
+        for name in pending:
+            cache.put(keys[name], runs[name])
+    runs = {name: runs[name] for name in registry}
+
+    models = {name: run['model'] for name, run in runs.items()}
+    predictions = {name: run['predictions'] for name, run in runs.items()}
+    comparison = pd.DataFrame({
+        name: {**evaluate_model(run['model'], X_test, y_test, predictions=run['predictions']), **run['timings']}
+        for name, run in runs.items()
+    }).T
+    return models, predictions, comparison
+
+
+def _fit_candidate(estimator, params, n_jobs, X_train, y_train, X_test):
+    # Fit and predict one candidate, recording wall time and the peak resident set size.
+    # RSS includes the native buffers of XGBoost and scikit-learn that tracemalloc does not
+    # see; in a worker (one task per child) it is the candidate's own peak.
+    model = estimator(**params)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_jobs)  # Per-model CPU budget
+    reset_peak_rss()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fitted = time.perf_counter()
+    predictions = model.predict(X_test)
+    done = time.perf_counter()
+    return {
+        'model': model,
+        'predictions': predictions,
+        'timings': {
+            'fit_seconds': fitted - start,
+            'predict_seconds': done - fitted,
+            'wall_seconds': done - start,
+            'peak_rss_mb': peak_rss_mb(),
+            'n_jobs': n_jobs,
+        },
+    }
+
+
+def _fit_shared_candidate(estimator, params, n_jobs, X_train, y_train, X_test):
+    # Worker entry point: map shared frames, then fit and predict
+    X_train, y_train, X_test = (frame.load() if isinstance(frame, SharedFrame) else frame for frame in (X_train, y_train, X_test))
+    if isinstance(y_train, pd.DataFrame):
+        y_train = y_train.iloc[:, 0]
+    return _fit_candidate(estimator, params, n_jobs, X_train, y_train, X_test)
+
+
+@instrumented
+def explain_model_shap(model, X_train, fast=False, **kwargs):
+    import shap  # Import SHAP for model interpretation
+    if fast:  # Tree-specific SHAP on a sample stratified by prediction deciles or `strata`, see fast_shap_values
+        shap_values, sample, _ = fast_shap_values(model, X_train, **kwargs)
+        shap.summary_plot(np.asarray(shap_values), sample)  # Create a summary plot of SHAP values
+        return
     explainer = shap.Explainer(model, X_train)  # Initialize SHAP explainer with the model
     shap_values = explainer(X_train)  # Calculate SHAP values for the training data
-    shap.summary_plot(shap_values, X_train)  # Create a summary plot of SHAP values
\ No newline at end of file
+    shap.summary_plot(shap_values, X_train)  # Create a summary plot of SHAP values
+
+
+@instrumented
+def fast_shap_values(model, X, sample_size=10_000, strata=None, n_strata=10, batch_size=2_000, max_workers=1,
+                     output_path=None, random_state=42):
+    """
+    SHAP values for a stratified sample of X using the tree-specific algorithms: XGBoost's
+    native `pred_contribs` and `shap.TreeExplainer` for scikit-learn forests. Other models fall
+    back to `shap.Explainer` with a 100-row background. Batches are explained in parallel and
+    written straight into a float32 `.npy` file at `output_path`, while global importance
+    (mean |SHAP|) is accumulated batch by batch. Without `output_path`, the file is written
+    to a temporary directory that is removed before returning.
+
+    The sample is stratified by `strata` (a column name or an array aligned with X) when
+    given, else by `n_strata` quantile bins of the model's predictions on X, so that rare
+    high and low predictions are explained too. With `n_strata=None` and no `strata` the
+    sample is uniform.
+
+    Returns:
+        tuple: (read-only memmap of SHAP values, or an in-memory array without `output_path`,
+            the explained sample, mean |SHAP| per feature sorted descending)
+    """
+    if strata is None and n_strata is not None and sample_size < len(X):
+        strata = pd.qcut(_predict(model, X), n_strata, labels=False, duplicates='drop')
+    sample = stratified_sample(X, sample_size, strata=strata, random_state=random_state)
+    if output_path is None:
+        with tempfile.TemporaryDirectory(prefix='shap_') as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'shap_values.npy')
+            importance = _write_shap_values(model, sample, batch_size, max_workers, output_path)
+            return np.load(output_path), sample, importance
+    importance = _write_shap_values(model, sample, batch_size, max_workers, output_path)
+    return np.load(output_path, mmap_mode='r'), sample, importance
+
+
+def _predict(model, X):
+    # Predictions of an estimator or of a raw XGBoost Booster
+    import xgboost as xgb
+    if isinstance(model, xgb.Booster):
+        return model.predict(xgb.DMatrix(X, enable_categorical=True))
+    return model.predict(X)
+
+
+def _write_shap_values(model, sample, batch_size, max_workers, output_path):
+    # Allocate the output on disk; batches are written in place
+    np.lib.format.open_memmap(output_path, mode='w+', dtype='float32', shape=sample.shape).flush()
+
+    explainer = _shap_explainer(model, sample)
+    batches = [(start, sample.iloc[start:start + batch_size]) for start in range(0, len(sample), batch_size)]
+    if max_workers == 1:
+        abs_sums = [_explain_batch(explainer, batch, output_path, start) for start, batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_shap_worker, initargs=(explainer,)) as executor:
+            abs_sums = list(executor.map(_explain_shared_batch, *zip(*[(batch, output_path, start) for start, batch in batches])))
+
+    importance = pd.Series(np.sum(abs_sums, axis=0) / len(sample), index=sample.columns)
+    return importance.sort_values(ascending=False)
+
+
+def _shap_explainer(model, sample):
+    # Pick the fastest exact explainer for the model type
+    import shap
+    import xgboost as xgb
+    from xgboost import XGBRegressor
+    if isinstance(model, (XGBRegressor, xgb.Booster)):
+        return model.get_booster() if isinstance(model, XGBRegressor) else model
+    if hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+        return shap.TreeExplainer(model)
+    return shap.Explainer(model, shap.sample(sample, 100, random_state=0))
+
+
+def _explain_batch(explainer, batch, output_path, start):
+    # Explain one batch, write it into the output file and return its column sums of |SHAP|
+    import shap
+    import xgboost as xgb
+    if isinstance(explainer, xgb.Booster):
+        values = explainer.predict(xgb.DMatrix(batch, enable_categorical=True), pred_contribs=True)[:, :-1]  # Drop the bias column
+    elif isinstance(explainer, shap.TreeExplainer):
+        values = explainer.shap_values(batch, check_additivity=False)
+    else:
+        values = explainer(batch).values
+    output = np.load(output_path, mmap_mode='r+')
+    output[start:start + len(batch)] = values
+    output.flush()
+    return np.abs(values).sum(axis=0)
+
+
+_SHAP_EXPLAINER = None
+
+
+def _init_shap_worker(explainer):
+    # The explainer (and model) is sent once per worker instead of once per batch
+    global _SHAP_EXPLAINER
+    _SHAP_EXPLAINER = explainer
+
+
+def _explain_shared_batch(batch, output_path, start):
+    return _explain_batch(_SHAP_EXPLAINER, batch, output_path, start)
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from scripts.model_building import _fit_candidate
+
+
+def data_fingerprint(X, y) -> str:
+    """
+    Returns a content hash of the features and target, used to key cached CV results.
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps([list(map(str, X.columns)), X.shape]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: str):
+        """
+        On-disk store of finished (configuration, fold) results, one small JSON file per
+        pair. Files are written atomically, so an interrupted search loses at most the fit
+        that was running.
+
+        Args:
+            directory (str): Where the result files are kept.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(**parts) -> str:
+        """
+        Returns a stable hash of the keyword arguments (configuration, fold, data fingerprint, ...).
+        """
+        return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns the stored record for `key`, or None.
+        """
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, record) -> None:
+        """
+        Stores `record` (any JSON-serializable value) under `key`.
+        """
+        tmp_path = f'{self._path(key)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self._path(key))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+
+class XGBoostFolds:
+    def __init__(self, X: pd.DataFrame, y, n_splits: int = 5, random_state: int = 42, cache: ResultCache = None, n_jobs: int = None):
+        """
+        K-fold evaluation of XGBoost configurations over one prebuilt DMatrix. Each fold's
+        train/validation matrices are sliced from it once per round of evaluation and
+        shared by every configuration, and only one fold is held in memory at a time.
+
+        Args:
+            X (pd.DataFrame): The features.
+            y: The target.
+            n_splits (int): Number of folds.
+            random_state (int): Seed for the fold assignment.
+            cache (ResultCache): Optional store of finished (configuration, fold) results.
+            n_jobs (int): Threads per booster (xgboost `nthread`). If None, all cores are used.
+        """
+        import xgboost as xgb
+        from sklearn.model_selection import KFold
+        self.n_splits = n_splits
+        self.random_state = random_state
+        self.cache = cache
+        self.n_jobs = n_jobs
+        self.fingerprint = data_fingerprint(X, y) if cache is not None else None
+        self.splits = list(KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(np.arange(len(X))))
+        self.dmatrix = xgb.DMatrix(X, label=np.asarray(y), enable_categorical=True)
+        self.fits = 0
+
+    def evaluate(self, configs: list, num_boost_round: int, early_stopping_rounds: int = 20) -> pd.DataFrame:
+        """
+        Cross-validates every configuration with up to `num_boost_round` boosting rounds and
+        early stopping on the held-out fold.
+
+        Returns:
+            pd.DataFrame: One row per configuration with 'mse' (mean over folds), 'mse_std'
+                and 'best_iteration' (mean), in the order of `configs`.
+        """
+        results = [[None] * self.n_splits for _ in configs]
+        for fold, (train_idx, valid_idx) in enumerate(self.splits):
+            pending = []
+            for i, params in enumerate(configs):
+                results[i][fold] = self._lookup(params, fold, num_boost_round, early_stopping_rounds)
+                if results[i][fold] is None:
+                    pending.append(i)
+            if not pending:
+                continue
+            dtrain, dvalid = self.dmatrix.slice(train_idx), self.dmatrix.slice(valid_idx)
+            for i in pending:
+                results[i][fold] = self._fit(configs[i], fold, dtrain, dvalid, num_boost_round, early_stopping_rounds)
+
+        return pd.DataFrame([{
+            'mse': np.mean([r['mse'] for r in fold_results]),
+            'mse_std': np.std([r['mse'] for r in fold_results]),
+            'best_iteration': np.mean([r['best_iteration'] for r in fold_results]),
+        } for fold_results in results])
+
+    def _cache_key(self, params, fold, early_stopping_rounds):
+        return ResultCache.key(params=params, fold=fold, n_splits=self.n_splits, random_state=self.random_state,
+                               early_stopping_rounds=early_stopping_rounds, data=self.fingerprint)
+
+    def _lookup(self, params, fold, num_boost_round, early_stopping_rounds):
+        # A fit that stopped early under a smaller budget is final: more rounds would not change it
+        if self.cache is None:
+            return None
+        record = self.cache.get(self._cache_key(params, fold, early_stopping_rounds)) or {}
+        for budget, result in record.items():
+            if int(budget) == num_boost_round or (result['stopped_early'] and int(budget) <= num_boost_round):
+                return result
+        return None
+
+    def _fit(self, params, fold, dtrain, dvalid, num_boost_round, early_stopping_rounds):
+        import xgboost as xgb
+        train_params = {'objective': 'reg:squarederror', **params, 'eval_metric': 'rmse'}
+        if self.n_jobs is not None:
+            train_params['nthread'] = self.n_jobs
+        booster = xgb.train(train_params, dtrain, num_boost_round=num_boost_round, evals=[(dvalid, 'valid')],
+                            early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+        self.fits += 1
+        result = {
+            'mse': float(booster.best_score) ** 2,
+            'best_iteration': int(booster.best_iteration),
+            'stopped_early': booster.num_boosted_rounds() < num_boost_round,
+        }
+        if self.cache is not None:
+            key = self._cache_key(params, fold, early_stopping_rounds)
+            record = self.cache.get(key) or {}
+            record[str(num_boost_round)] = result
+            self.cache.put(key, record)
+        return result
+
+
+def successive_halving(X: pd.DataFrame, y, configs: list, n_splits: int = 5, min_rounds: int = 50, max_rounds: int = 1000,
+                       factor: int = 3, early_stopping_rounds: int = 20, cache_dir: str = None, random_state: int = 42,
+                       n_jobs: int = None):
+    """
+    Searches XGBoost configurations by successive halving over boosting rounds: every
+    configuration is cross-validated with `min_rounds`, the best 1/`factor` are kept and
+    re-evaluated with `factor` times the budget, until one remains or `max_rounds` is reached.
+
+    Args:
+        X (pd.DataFrame): The features.
+        y: The target.
+        configs (list): Candidate parameter dicts for `xgb.train`.
+        n_splits (int): Number of CV folds.
+        min_rounds (int): Boosting rounds in the first rung.
+        max_rounds (int): Largest number of boosting rounds.
+        factor (int): Budget growth and reduction factor between rungs.
+        early_stopping_rounds (int): Patience on the held-out fold.
+        cache_dir (str): If given, finished (configuration, fold) results are kept there and
+            reused by later or resumed searches on the same data.
+        random_state (int): Seed for the fold assignment.
+        n_jobs (int): Threads per booster.
+
+    Returns:
+        tuple: (best configuration, DataFrame with one row per configuration and rung)
+    """
+    cache = ResultCache(cache_dir) if cache_dir else None
+    folds = XGBoostFolds(X, y, n_splits=n_splits, random_state=random_state, cache=cache, n_jobs=n_jobs)
+    survivors = list(range(len(configs)))
+    budget = min_rounds
+    history = []
+    for rung in range(len(configs)):
+        scores = folds.evaluate([configs[i] for i in survivors], budget, early_stopping_rounds)
+        scores.insert(0, 'config', survivors)
+        scores.insert(1, 'rung', rung)
+        scores.insert(2, 'num_boost_round', budget)
+        history.append(scores)
+        if len(survivors) == 1 or budget >= max_rounds:
+            break
+        survivors = scores.nsmallest(max(1, len(survivors) // factor), 'mse')['config'].tolist()
+        budget = min(budget * factor, max_rounds)
+
+    history = pd.concat(history, ignore_index=True)
+    best = history[history['rung'] == history['rung'].max()].nsmallest(1, 'mse')['config'].iloc[0]
+    return configs[best], history
+
+
+def cross_validate(estimator, params: dict, X: pd.DataFrame, y, n_splits: int = 5, random_state: int = 42,
+                   cache_dir: str = None, n_jobs: int = 1) -> dict:
+    """
+    K-fold cross-validation of any scikit-learn style regressor (e.g. an entry of
+    MODEL_REGISTRY), with the same per-fold result cache as the XGBoost search.
+
+    Args:
+        estimator: The estimator class.
+        params (dict): Constructor parameters.
+        X (pd.DataFrame): The features.
+        y: The target.
+        n_splits (int): Number of folds.
+        random_state (int): Seed for the fold assignment.
+        cache_dir (str): Optional directory for finished fold results.
+        n_jobs (int): CPU budget passed to estimators that accept `n_jobs`.
+
+    Returns:
+        dict: 'mse' (mean over folds), 'mse_std' and the per-fold 'fold_mse' list.
+    """
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import KFold
+    cache = ResultCache(cache_dir) if cache_dir else None
+    fingerprint = data_fingerprint(X, y) if cache is not None else None
+    y = pd.Series(np.asarray(y))
+    fold_mse = []
+    for fold, (train_idx, valid_idx) in enumerate(KFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X)):
+        key = ResultCache.key(estimator=f'{estimator.__module__}.{estimator.__name__}', params=params, fold=fold,
+                              n_splits=n_splits, random_state=random_state, data=fingerprint)
+        record = cache.get(key) if cache is not None else None
+        if record is None:
+            run = _fit_candidate(estimator, params, n_jobs, X.iloc[train_idx], y.iloc[train_idx], X.iloc[valid_idx])
+            record = {'mse': float(mean_squared_error(y.iloc[valid_idx], run['predictions']))}
+            if cache is not None:
+                cache.put(key, record)
+        fold_mse.append(record['mse'])
+    return {'mse': float(np.mean(fold_mse)), 'mse_std': float(np.std(fold_mse)), 'fold_mse': fold_mse}
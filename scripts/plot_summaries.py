@@ -0,0 +1,382 @@
+import numpy as np
+import pandas as pd
+from scripts.sampling import ReservoirSample, stratified_sample
+from scripts.schema import numeric_columns
+
+
+def binned_kde(values, gridsize: int = 200, cut: float = 3, max_bins: int = 2 ** 20):
+    """
+    Gaussian KDE with Scott's bandwidth (as `scipy.stats.gaussian_kde`, which seaborn uses),
+    evaluated by binning the data on a fine grid and convolving with the kernel via FFT.
+    The cost is O(n + bins log bins) instead of O(n * gridsize).
+
+    Args:
+        values: The sample (missing values must already be removed).
+        gridsize (int): Number of evaluation points.
+        cut (float): How many bandwidths the grid extends past the data.
+        max_bins (int): Upper bound on the number of fine bins.
+
+    Returns:
+        tuple: (grid coordinates, density values)
+    """
+    from scipy.signal import fftconvolve
+
+    values = np.asarray(values, dtype='float64')
+    bandwidth = values.std(ddof=1) * values.size ** (-1 / 5)
+    low, high = values.min() - cut * bandwidth, values.max() + cut * bandwidth
+    # Bins a quarter bandwidth wide keep the binning error far below the kernel width
+    n_bins = int(min(max_bins, max(2048, np.ceil(4 * (high - low) / bandwidth))))
+    counts, edges = np.histogram(values, bins=n_bins, range=(low, high))
+    width = edges[1] - edges[0]
+    offsets = np.arange(-np.ceil(4 * bandwidth / width), np.ceil(4 * bandwidth / width) + 1) * width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    density = fftconvolve(counts, kernel, mode='same') / values.size
+    coords = np.linspace(low, high, gridsize)
+    return coords, np.clip(np.interp(coords, (edges[:-1] + edges[1:]) / 2, density), 0, None)
+
+
+class PlotSummaries:
+    def __init__(self, data: pd.DataFrame):
+        """
+        Computes the statistics plots need (histograms, densities, box and violin stats,
+        grouped counts, correlations) once with vectorized pandas/NumPy operations and
+        caches them, so figures are drawn from small summaries instead of raw rows.
+
+        Args:
+            data (pd.DataFrame): The data to summarize. It must not be modified afterwards;
+                build a new PlotSummaries instead.
+        """
+        self.data = data
+        self._cache = {}
+
+    def histogram(self, col: str, bins: int = 30, kde: bool = True, gridsize: int = 200) -> dict:
+        """
+        Returns 'counts' and 'edges' of a `bins`-bin histogram and, with `kde`, the density
+        curve scaled to counts ('kde_x', 'kde_y'), as `sns.histplot(kde=True)` draws it.
+        """
+        def compute():
+            values = self.data[col].dropna().to_numpy(dtype='float64')
+            counts, edges = np.histogram(values, bins=bins)
+            summary = {'counts': counts, 'edges': edges}
+            if kde and values.size > 1 and values.std() > 0:
+                # histplot clips its KDE to the data range and scales it by n * bin width
+                coords, density = binned_kde(values, gridsize=gridsize, cut=0)
+                summary.update(kde_x=coords, kde_y=density * values.size * (edges[1] - edges[0]))
+            return summary
+        return self._cached(('histogram', col, bins, kde, gridsize), compute)
+
+    def value_counts(self, col: str) -> pd.Series:
+        """
+        Returns the non-zero counts of every category, most frequent first.
+        """
+        def compute():
+            counts = self.data[col].value_counts()
+            return counts[counts > 0]
+        return self._cached(('value_counts', col), compute)
+
+    def grouped_counts(self, x: str, hue: str, hue_values=None) -> pd.DataFrame:
+        """
+        Returns row counts per (x, hue) pair in long form ('count' column), optionally only
+        for the given `hue_values`, as `sns.countplot(x=x, hue=hue)` would compute them.
+        """
+        def compute():
+            counts = self.data.groupby([x, hue], observed=True).size().rename('count').reset_index()
+            counts = counts[counts['count'] > 0]
+            if hue_values is not None:
+                counts = counts[counts[hue].isin(hue_values)]
+            return counts.reset_index(drop=True)
+        key = None if hue_values is None else tuple(hue_values)
+        return self._cached(('grouped_counts', x, hue, key), compute)
+
+    def count_by(self, by: str, col: str) -> pd.Series:
+        """
+        Returns the number of non-missing `col` values per `by` group.
+        """
+        return self._cached(('count_by', by, col), lambda: self.data.groupby(by, observed=True)[col].count())
+
+    def correlation(self, cols: list) -> pd.DataFrame:
+        """
+        Returns the Pearson correlation matrix of `cols`.
+        """
+        return self._cached(('correlation', tuple(cols)), lambda: self.data[list(cols)].corr())
+
+    def box_stats(self, col: str, by: str = None, whis: float = 1.5) -> list:
+        """
+        Returns `Axes.bxp` statistics for `col`, one dict per `by` group (or one overall).
+        Quartiles come from a single grouped quantile call and whiskers from a masked
+        grouped min/max. Flier values are deduplicated, which draws identically.
+        """
+        def compute():
+            values = self.data[col]
+            keys = self.data[by] if by is not None else pd.Series(col, index=self.data.index)
+            valid = values.notna()
+            values, keys = values[valid], keys[valid]
+            grouped = values.groupby(keys, observed=True)
+            quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+            means = grouped.mean()
+            iqr = quartiles[0.75] - quartiles[0.25]
+            lower = (quartiles[0.25] - whis * iqr).reindex(keys.to_numpy()).to_numpy()
+            upper = (quartiles[0.75] + whis * iqr).reindex(keys.to_numpy()).to_numpy()
+            raw = values.to_numpy()
+            inside = (raw >= lower) & (raw <= upper)
+            whisker_low = values[inside].groupby(keys[inside], observed=True).min()
+            whisker_high = values[inside].groupby(keys[inside], observed=True).max()
+            outside = values[~inside].groupby(keys[~inside], observed=True)
+            fliers = {label: np.unique(group.to_numpy()) for label, group in outside}
+            return [{
+                'label': label,
+                'q1': quartiles.loc[label, 0.25], 'med': quartiles.loc[label, 0.5], 'q3': quartiles.loc[label, 0.75],
+                'mean': means[label], 'iqr': iqr[label],
+                'whislo': whisker_low.get(label, quartiles.loc[label, 0.25]),
+                'whishi': whisker_high.get(label, quartiles.loc[label, 0.75]),
+                'fliers': fliers.get(label, np.array([])),
+            } for label in quartiles.index]
+        return self._cached(('box_stats', col, by, whis), compute)
+
+    def violin_stats(self, col: str, by: str, gridsize: int = 100, cut: float = 2) -> list:
+        """
+        Returns `Axes.violin` statistics for `col` per `by` group, with densities from
+        `binned_kde` on seaborn's violin grid and quartiles for the inner lines.
+        """
+        def compute():
+            stats = []
+            for label, group in self.data[col].groupby(self.data[by], observed=True):
+                values = group.dropna().to_numpy(dtype='float64')
+                if values.size == 0:
+                    continue
+                q1, median, q3 = np.percentile(values, [25, 50, 75])
+                summary = {'label': label, 'mean': values.mean(), 'median': median, 'min': values.min(),
+                           'max': values.max(), 'q1': q1, 'q3': q3}
+                if values.size < 2 or values.std() == 0:
+                    summary.update(coords=np.array([values.min(), values.max()]), vals=np.ones(2))
+                else:
+                    summary['coords'], summary['vals'] = binned_kde(values, gridsize=gridsize, cut=cut)
+                stats.append(summary)
+            return stats
+        return self._cached(('violin_stats', col, by, gridsize, cut), compute)
+
+    def sample(self, size: int, strata: str = None, random_state: int = 0) -> pd.DataFrame:
+        """
+        Returns a cached sample of about `size` rows for point-level plots: stratified by the
+        `strata` column (every group keeps at least one row) or uniform (reservoir sample).
+        """
+        def compute():
+            if len(self.data) <= size:
+                return self.data
+            if strata is not None:
+                return stratified_sample(self.data, size, strata=strata, random_state=random_state)
+            reservoir = ReservoirSample(size, random_state=random_state)
+            reservoir.update(self.data)
+            return reservoir.sample()
+        return self._cached(('sample', size, strata, random_state), compute)
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+
+class PlotAggregates:
+    def __init__(self, numeric_cols: list = None, box_by: list = None, violin_by: list = None,
+                 grouped: list = None, count_by: list = None, value_cols: list = None,
+                 sample_size: int = 20_000, relative_accuracy: float = 0.01, random_state: int = 0):
+        """
+        Mergeable counterpart of `PlotSummaries` for the DVC plots, built chunk by chunk so
+        that the summaries of new rows can be folded into earlier ones without rereading
+        them. Counts are exact; correlations come from merged pairwise co-moments (Chan
+        et al.); box statistics come from quantile sketches, with whiskers clipped to the
+        data range and no fliers; violins are drawn from a per-group reservoir sample.
+
+        Args:
+            numeric_cols (list): Columns for the correlation matrix and overall box plots.
+                Defaults to the declared numeric schema columns of the first chunk, so that
+                instances built on different chunks or months agree on them.
+            box_by (list): (column, group) pairs for grouped box plots.
+            violin_by (list): (column, group) pairs for violin plots.
+            grouped (list): (x, hue) pairs for grouped counts.
+            count_by (list): (group, column) pairs for non-missing counts per group.
+            value_cols (list): Columns whose category counts are kept.
+            sample_size (int): Rows kept per violin group.
+            relative_accuracy (float): Relative accuracy of the quantile sketches.
+            random_state (int): Seed of the violin samples; merged instances should use different seeds.
+        """
+        self.numeric_cols = numeric_cols
+        self.box_by = [tuple(pair) for pair in (box_by or [('TotalPremium', 'Province')])]
+        self.violin_by = [tuple(pair) for pair in (violin_by or [('TotalPremium', 'CoverType')])]
+        self.grouped = [tuple(pair) for pair in (grouped or [('Province', 'CoverType'), ('Province', 'VehicleType')])]
+        self.count_by_pairs = [tuple(pair) for pair in (count_by or [('Province', 'make')])]
+        self.value_cols = list(value_cols or ['CoverType'])
+        self.sample_size = sample_size
+        self.relative_accuracy = relative_accuracy
+        self.random_state = random_state
+        self.counts = {}
+        self.sketches = {}
+        self.sums = {}
+        self.samples = {}
+        self.comoments = None
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Adds one chunk of rows.
+        """
+        from scripts.sketches import QuantileSketch
+
+        if self.numeric_cols is None:
+            self.numeric_cols = numeric_columns(chunk.columns)
+        for col in self.value_cols:
+            self._add_counts(('value_counts', col), chunk[col].value_counts())
+        for x, hue in self.grouped:
+            self._add_counts(('grouped_counts', x, hue), chunk.groupby([x, hue], observed=True).size())
+        for by, col in self.count_by_pairs:
+            self._add_counts(('count_by', by, col), chunk.groupby(by, observed=True)[col].count())
+
+        groups = [(col, None, pd.Series(col, index=chunk.index)) for col in self.numeric_cols]
+        groups += [(col, by, chunk[by]) for col, by in self.box_by]
+        for col, by, keys in groups:
+            values = chunk[col].to_numpy(dtype='float64', na_value=np.nan)
+            for label, positions in pd.Series(np.arange(len(chunk))).groupby(keys.to_numpy(), observed=True).indices.items():
+                group = values[positions]
+                sketch = self.sketches.setdefault((col, by, label), QuantileSketch(relative_accuracy=self.relative_accuracy))
+                sketch.update(group)
+                self.sums[(col, by, label)] = self.sums.get((col, by, label), 0.0) + float(np.nansum(group))
+
+        for col, by in self.violin_by:
+            rows = chunk[[by, col]].dropna()
+            rows = rows.astype({by: object})
+            for label, group in rows.groupby(by):
+                sample = self.samples.get((col, by, label))
+                if sample is None:
+                    seed = [self.random_state, len(self.samples)]
+                    sample = self.samples[(col, by, label)] = ReservoirSample(self.sample_size, random_state=seed)
+                sample.update(group)
+
+        comoments = _chunk_comoments(chunk[self.numeric_cols].to_numpy(dtype='float64', na_value=np.nan))
+        self.comoments = comoments if self.comoments is None else _combine_comoments(self.comoments, comoments)
+        return self
+
+    def merge(self, other: 'PlotAggregates'):
+        """
+        Merges another instance (e.g. built on other months) into this one. Both must
+        cover the same numeric columns.
+        """
+        if self.numeric_cols is not None and other.numeric_cols is not None and list(self.numeric_cols) != list(other.numeric_cols):
+            raise ValueError(f"Cannot merge PlotAggregates over different numeric columns: "
+                             f"{list(self.numeric_cols)} and {list(other.numeric_cols)}.")
+        for key, counts in other.counts.items():
+            self._add_counts(key, counts)
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = sketch
+            self.sums[key] = self.sums.get(key, 0.0) + other.sums[key]
+        for key, sample in other.samples.items():
+            if key in self.samples:
+                self.samples[key].merge(sample)
+            else:
+                self.samples[key] = sample
+        if self.numeric_cols is None:
+            self.numeric_cols = other.numeric_cols
+        if other.comoments is not None:
+            self.comoments = other.comoments if self.comoments is None else _combine_comoments(self.comoments, other.comoments)
+        return self
+
+    def value_counts(self, col: str) -> pd.Series:
+        """
+        Returns the non-zero counts of every category, most frequent first.
+        """
+        return self.counts[('value_counts', col)].sort_values(ascending=False, kind='stable')
+
+    def grouped_counts(self, x: str, hue: str, hue_values=None) -> pd.DataFrame:
+        """
+        Returns row counts per (x, hue) pair in long form ('count' column), optionally only
+        for the given `hue_values`.
+        """
+        counts = self.counts[('grouped_counts', x, hue)].rename('count')
+        counts.index = counts.index.set_names([x, hue])
+        counts = counts.reset_index()
+        if hue_values is not None:
+            counts = counts[counts[hue].isin(hue_values)]
+        return counts.reset_index(drop=True)
+
+    def count_by(self, by: str, col: str) -> pd.Series:
+        """
+        Returns the number of non-missing `col` values per `by` group.
+        """
+        return self.counts[('count_by', by, col)].rename(col).rename_axis(by)
+
+    def correlation(self, cols: list) -> pd.DataFrame:
+        """
+        Returns the Pearson correlation matrix of `cols` over pairwise complete rows, as
+        `DataFrame.corr` computes it.
+        """
+        n, _, m2, comoment = self.comoments
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(n > 1, comoment / np.sqrt(m2 * m2.T), np.nan)
+        corr = pd.DataFrame(np.clip(corr, -1, 1), index=self.numeric_cols, columns=self.numeric_cols)
+        return corr.loc[list(cols), list(cols)]
+
+    def box_stats(self, col: str, by: str = None, whis: float = 1.5) -> list:
+        """
+        Returns approximate `Axes.bxp` statistics for `col`, one dict per `by` group (or one
+        overall), from the quantile sketches. Whiskers are the IQR fences clipped to the
+        data range, and fliers are not kept.
+        """
+        stats = []
+        for (key_col, key_by, label), sketch in sorted(self.sketches.items(), key=lambda item: str(item[0][2])):
+            if key_col != col or key_by != by or sketch.count == 0:
+                continue
+            q1, med, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            stats.append({
+                'label': label if by is not None else col, 'q1': q1, 'med': med, 'q3': q3,
+                'mean': self.sums[(key_col, key_by, label)] / sketch.count, 'iqr': iqr,
+                'whislo': max(sketch.min, q1 - whis * iqr), 'whishi': min(sketch.max, q3 + whis * iqr),
+                'fliers': np.array([]),
+            })
+        return stats
+
+    def violin_stats(self, col: str, by: str, gridsize: int = 100, cut: float = 2) -> list:
+        """
+        Returns `Axes.violin` statistics for `col` per `by` group, computed on the group samples.
+        """
+        samples = [sample.sample() for (key_col, key_by, _), sample in self.samples.items() if (key_col, key_by) == (col, by)]
+        return PlotSummaries(pd.concat(samples)).violin_stats(col, by, gridsize=gridsize, cut=cut) if samples else []
+
+    def _add_counts(self, key, counts):
+        counts = counts[counts > 0]
+        if isinstance(counts.index, pd.MultiIndex):
+            counts.index = counts.index.set_levels([level.astype(object) for level in counts.index.levels])
+        else:
+            counts.index = counts.index.astype(object)
+        merged = counts if key not in self.counts else self.counts[key].add(counts, fill_value=0)
+        self.counts[key] = merged.astype('int64').sort_index()
+
+
+def _chunk_comoments(values):
+    # Pairwise-complete n, means, sums of squared deviations and co-moments; entry [i, j] is
+    # over the rows where both column i and column j are present
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    center = np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    centered = np.where(present, values - center, 0.0)
+    mask = present.astype('float64')
+    n = mask.T @ mask
+    sums = centered.T @ mask
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = np.where(n > 0, sums / n, 0.0)
+    m2 = (centered ** 2).T @ mask - means * sums
+    comoment = centered.T @ centered - means * sums.T
+    return n, center[:, None] + means, m2, comoment
+
+
+def _combine_comoments(left, right):
+    # Chan et al. parallel update, applied entry by entry
+    n_a, mean_a, m2_a, c_a = left
+    n_b, mean_b, m2_b, c_b = right
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(n > 0, n_a * n_b / n, 0.0)
+        mean = np.where(n > 0, mean_a + delta * np.where(n > 0, n_b / n, 0.0), 0.0)
+    return n, mean, m2_a + m2_b + delta ** 2 * weight, c_a + c_b + delta * delta.T * weight
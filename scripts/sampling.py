@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+def stratified_sample(X: pd.DataFrame, sample_size: int, strata=None, random_state=42) -> pd.DataFrame:
+    """
+    Draws about `sample_size` rows of X, proportionally from every stratum (a column name or
+    an array aligned with X) and at least one row per stratum. Without strata the sample is
+    uniform. Rows keep their original order.
+    """
+    if sample_size >= len(X):
+        return X
+    rng = np.random.default_rng(random_state)
+    if strata is None:
+        positions = rng.choice(len(X), size=sample_size, replace=False)
+    else:
+        strata = X[strata] if isinstance(strata, str) else pd.Series(np.asarray(strata))
+        fraction = sample_size / len(X)
+        groups = pd.Series(np.arange(len(X))).groupby(np.asarray(strata), observed=True, dropna=False).indices
+        positions = np.concatenate([
+            rng.choice(members, size=max(1, round(len(members) * fraction)), replace=False)
+            for members in groups.values()
+        ])
+    return X.iloc[np.sort(positions)]
+
+
+class ReservoirSample:
+    def __init__(self, size: int, random_state=None):
+        """
+        Uniform sample of at most `size` rows from a stream of DataFrame chunks. Every row
+        gets a random key and the rows with the `size` smallest keys are kept (bottom-k
+        reservoir sampling), so samples of separate streams can be merged.
+
+        Args:
+            size (int): Maximum number of rows kept.
+            random_state: Seed for the row keys. Use different seeds for samples that will be merged.
+        """
+        self.size = size
+        self.rng = np.random.default_rng(random_state)
+        self.keys = np.empty(0)
+        self.rows = None
+        self.count = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """
+        Offers the rows of `chunk` to the sample.
+        """
+        keys = self.rng.random(len(chunk))
+        self.count += len(chunk)
+        if len(self.keys) >= self.size:
+            # Only rows whose key beats the current largest kept key can enter
+            candidates = keys < self.keys.max()
+            chunk, keys = chunk[candidates], keys[candidates]
+        self._keep_smallest(chunk, keys)
+
+    def merge(self, other: 'ReservoirSample') -> 'ReservoirSample':
+        """
+        Merges `other` into this sample in place and returns it.
+        """
+        self.count += other.count
+        if other.rows is not None:
+            self._keep_smallest(other.rows, other.keys)
+        return self
+
+    def sample(self) -> pd.DataFrame:
+        """
+        Returns the sampled rows in arrival order.
+        """
+        return self.rows
+
+    def _keep_smallest(self, chunk, keys):
+        if len(chunk) == 0:
+            return
+        rows = chunk if self.rows is None else pd.concat([self.rows, chunk])
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size - 1)[:self.size])
+            rows, keys = rows.iloc[keep], keys[keep]
+        self.rows, self.keys = rows, keys
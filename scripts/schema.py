@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+# Low-cardinality string fields, stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    'Citizenship', 'LegalType', 'Title', 'Language', 'Bank', 'AccountType',
+    'MaritalStatus', 'Gender', 'Country', 'Province', 'MainCrestaZone',
+    'SubCrestaZone', 'ItemType', 'VehicleType', 'make', 'Model', 'bodytype',
+    'VehicleIntroDate', 'AlarmImmobiliser', 'TrackingDevice', 'NewVehicle',
+    'WrittenOff', 'Rebuilt', 'Converted', 'CrossBorder', 'TermFrequency',
+    'ExcessSelected', 'CoverCategory', 'CoverType', 'CoverGroup', 'Section',
+    'Product', 'StatutoryClass', 'StatutoryRiskType',
+]
+
+# Identifiers and small counts that never have missing values in the source
+INTEGER_COLUMNS = {
+    'UnderwrittenCoverID': 'int32',
+    'PolicyID': 'int32',
+    'PostalCode': 'int16',
+    'RegistrationYear': 'int16',
+}
+
+# Vehicle attributes tolerate single precision; mmcode and monetary columns keep float64
+# so that sums over a million rows and exact value matching (e.g. crosstabs) are unaffected
+FLOAT_COLUMNS = {
+    'mmcode': 'float64',
+    'Cylinders': 'float32',
+    'cubiccapacity': 'float32',
+    'kilowatts': 'float32',
+    'NumberOfDoors': 'float32',
+    'CustomValueEstimate': 'float64',
+    'NumberOfVehiclesInFleet': 'float32',
+    'SumInsured': 'float64',
+    'CalculatedPremiumPerTerm': 'float64',
+    'TotalPremium': 'float64',
+    'TotalClaims': 'float64',
+    'CapitalOutstanding': 'float64',
+}
+
+BOOLEAN_COLUMNS = ['IsVATRegistered']
+
+DATE_COLUMNS = ['TransactionMonth']
+
+
+def parse_amount(value: str) -> float:
+    """
+    Parses a monetary amount that may carry thousands separators (e.g. '1,000'). Empty or
+    non-numeric values become NaN, as `pd.to_numeric(errors='coerce')` does in the notebooks.
+    """
+    try:
+        return float(value.replace(',', ''))
+    except ValueError:
+        return np.nan
+
+# Columns parsed value by value instead of by dtype, because the raw text is not a plain number
+CONVERTERS = {
+    'CapitalOutstanding': parse_amount,
+}
+
+DTYPES = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **INTEGER_COLUMNS,
+    **FLOAT_COLUMNS,
+    **{col: 'bool' for col in BOOLEAN_COLUMNS},
+}
+
+
+def read_options(columns=None) -> dict:
+    """
+    Returns the `dtype`, `converters` and `parse_dates` keyword arguments for `pd.read_csv`.
+
+    Args:
+        columns (list): Columns present in (or selected from) the file. If None, the full
+            MachineLearningRating_v3 schema is used.
+
+    Returns:
+        dict: Keyword arguments to unpack into `pd.read_csv`.
+    """
+    columns = set(DTYPES) | set(DATE_COLUMNS) if columns is None else set(columns)
+    return {
+        'dtype': {col: dtype for col, dtype in DTYPES.items() if col in columns and col not in CONVERTERS},
+        'converters': {col: converter for col, converter in CONVERTERS.items() if col in columns},
+        'parse_dates': [col for col in DATE_COLUMNS if col in columns],
+    }
+
+
+def read_typed_csv(file_path: str, delimiter: str = ',', usecols=None, **kwargs) -> pd.DataFrame:
+    """
+    Reads a CSV/TXT file with the declared dtypes applied to whichever schema columns it contains.
+
+    Args:
+        file_path (str): The path to the delimited file.
+        delimiter (str): The field delimiter ('|' for the raw extract, ',' for processed data).
+        usecols (list): Optional subset of columns to read.
+        **kwargs: Extra keyword arguments forwarded to `pd.read_csv`.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+    """
+    header = pd.read_csv(file_path, delimiter=delimiter, nrows=0).columns
+    columns = header if usecols is None else [col for col in header if col in set(usecols)]
+    return pd.read_csv(file_path, delimiter=delimiter, usecols=usecols, **read_options(columns), **kwargs)
+
+
+def memory_footprint(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reports the deep memory usage of every column, largest first.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to measure.
+
+    Returns:
+        pd.DataFrame: A DataFrame with columns 'dtype' and 'Memory (MB)', indexed by column name.
+    """
+    usage = df.memory_usage(deep=True, index=False) / 1024 ** 2
+    return pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'Memory (MB)': usage,
+    }).sort_values(by='Memory (MB)', ascending=False)
+
+
+def dataset_columns(file_path: str, delimiter: str = ',') -> list:
+    """
+    Lists the columns of a Parquet or delimited file without reading its rows.
+
+    Args:
+        file_path (str): The path to a `.parquet` file or a delimited text file.
+        delimiter (str): The field delimiter for text files.
+
+    Returns:
+        list: The column names in file order.
+    """
+    if file_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_schema(file_path).names
+    return pd.read_csv(file_path, delimiter=delimiter, nrows=0).columns.tolist()
+
+
+def load_dataset(file_path: str, columns=None, delimiter: str = ',') -> pd.DataFrame:
+    """
+    Loads a pipeline intermediate, reading only `columns` when given. Parquet files are
+    read with column projection; delimited text files fall back to `read_typed_csv`.
+
+    Args:
+        file_path (str): The path to a `.parquet` file or a delimited text file.
+        columns (list): Optional subset of columns to read.
+        delimiter (str): The field delimiter for text files.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+    """
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path, columns=columns)
+    return read_typed_csv(file_path, delimiter=delimiter, usecols=columns)
+
+
+def iter_dataset(file_path: str, chunksize: int = 100_000, columns=None, delimiter: str = ','):
+    """
+    Streams a pipeline intermediate in chunks of at most `chunksize` rows. Parquet files are
+    read batch by batch with column projection; delimited text files with the declared dtypes.
+
+    Args:
+        file_path (str): The path to a `.parquet` file or a delimited text file.
+        chunksize (int): Number of rows per yielded DataFrame.
+        columns (list): Optional subset of columns to read.
+        delimiter (str): The field delimiter for text files.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the file.
+    """
+    if file_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    header = dataset_columns(file_path, delimiter=delimiter)
+    selected = header if columns is None else [col for col in header if col in set(columns)]
+    with pd.read_csv(file_path, delimiter=delimiter, chunksize=chunksize, usecols=columns, **read_options(selected)) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def numeric_columns(columns) -> list:
+    """
+    Returns the declared integer and float columns among `columns`, in their original order.
+    """
+    numeric = set(INTEGER_COLUMNS) | set(FLOAT_COLUMNS)
+    return [col for col in columns if col in numeric]
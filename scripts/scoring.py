@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scripts.data_processing import CategoricalEncoder, DataProcessing, MissingDataImputer, OutlierCapper, SparseEncoder
+from scripts.model_artifacts import load_model, save_model
+from scripts.schema import iter_dataset
+
+# Columns that are never model inputs: identifiers and the claims outcome
+NON_FEATURE_COLUMNS = ['UnderwrittenCoverID', 'PolicyID', 'TotalClaims']
+
+
+class ScoringPipeline:
+    def __init__(self, model, imputer: MissingDataImputer, capper: OutlierCapper, encoder, features: list):
+        """
+        A trained premium model together with the preprocessing fitted alongside it, so that
+        raw rows (as extracted, or as sent by a client) can be scored directly.
+
+        Args:
+            model: A fitted regressor with a `predict` method.
+            imputer (MissingDataImputer): The fitted missing-data handling.
+            capper (OutlierCapper): The fitted outlier fences.
+            encoder: The fitted categorical encoding (`CategoricalEncoder` or `SparseEncoder`).
+            features (list): The model's input columns, in training order.
+        """
+        self.model = model
+        self.imputer = imputer
+        self.capper = capper
+        self.encoder = encoder
+        self.features = list(features)
+
+    @classmethod
+    def fit(cls, data: pd.DataFrame, model, target: str = 'TotalPremium', high_threshold: float = 50, encoder=None):
+        """
+        Fits the preprocessing steps and then `model` on `data`.
+
+        Args:
+            data (pd.DataFrame): Raw training rows including the target column.
+            model: An unfitted regressor, e.g. an entry of `MODEL_REGISTRY` instantiated.
+            target (str): The column to predict.
+            high_threshold (float): Columns with more missing values (percent) are dropped.
+            encoder: An unfitted encoder; `CategoricalEncoder()` by default. A `SparseEncoder`
+                makes the model train on (and be scored with) a CSR design matrix.
+
+        Returns:
+            ScoringPipeline: The fitted pipeline.
+        """
+        y = data[target]
+        X = data.drop(columns=[target, *NON_FEATURE_COLUMNS], errors='ignore')
+        imputer = MissingDataImputer.from_summary(DataProcessing(X).missing_data_summary(), high_threshold=high_threshold)
+        X = imputer.fit_transform(X)
+        numeric = [col for col in X.columns
+                   if pd.api.types.is_numeric_dtype(X[col]) and not pd.api.types.is_bool_dtype(X[col])]
+        capper = OutlierCapper(numeric)
+        X = capper.fit_transform(X, copy=True)
+        encoder = CategoricalEncoder() if encoder is None else encoder
+        X = encoder.fit_transform(X, y)  # Out-of-fold target encoding for the training rows
+        model.fit(X, y)
+        features = encoder.feature_names_ if isinstance(encoder, SparseEncoder) else X.columns
+        return cls(model, imputer, capper, encoder, features)
+
+    def transform(self, data: pd.DataFrame):
+        """
+        Applies imputation, capping and encoding, and returns the model's input columns
+        (a DataFrame, or a CSR matrix with a `SparseEncoder`).
+        """
+        data = self.imputer.transform(data)
+        data = self.capper.transform(data, copy=True)
+        data = self.encoder.transform(data)
+        return data if sparse.issparse(data) else data[self.features]
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Scores raw rows.
+        """
+        return self.model.predict(self.transform(data))
+
+    def save(self, path: str, compact: bool = True) -> None:
+        """
+        Persists the pipeline. The preprocessing is pickled to `path`; with `compact`, the
+        model goes to a `save_model` artifact next to it (`<path>.model`) so that workers
+        load it quickly, otherwise it is pickled too.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        model = self.model
+        if compact:
+            save_model(model, f'{path}.model')
+            self.model = None
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            self.model = model
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> 'ScoringPipeline':
+        """
+        Loads a pipeline written by `save`, memory-mapping a compact model artifact if present.
+        """
+        with open(path, 'rb') as f:
+            pipeline = pickle.load(f)
+        if pipeline.model is None:
+            pipeline.model = load_model(f'{path}.model', mmap=mmap)
+        return pipeline
+
+
+def score_file(pipeline_path: str, input_path: str, output_path: str, chunksize: int = 100_000, max_workers: int = None,
+               delimiter: str = '|', id_column: str = 'UnderwrittenCoverID') -> dict:
+    """
+    Scores a Parquet or delimited file in streamed chunks spread over worker processes and
+    writes one 'PredictedPremium' per row (next to `id_column` when the input has it) to a
+    Parquet or CSV file. At most two chunks per worker are in flight, so memory stays bounded.
+
+    Args:
+        pipeline_path (str): A pipeline saved with `ScoringPipeline.save`.
+        input_path (str): The rows to score.
+        output_path (str): Where to write the predictions (`.parquet` or CSV).
+        chunksize (int): Rows per chunk.
+        max_workers (int): Worker processes. If 1, chunks are scored in this process.
+        delimiter (str): The field delimiter for text input.
+        id_column (str): Identifier copied to the output if present.
+
+    Returns:
+        dict: 'rows', 'seconds' and 'rows_per_second'.
+    """
+    start = time.perf_counter()
+    max_workers = max_workers or os.cpu_count() or 1
+    writer = _PredictionWriter(output_path)
+    rows = 0
+    try:
+        if max_workers == 1:
+            pipeline = ScoringPipeline.load(pipeline_path)
+            for chunk in iter_dataset(input_path, chunksize=chunksize, delimiter=delimiter):
+                rows += writer.write(_identifiers(chunk, id_column), pipeline.predict(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_scoring_worker, initargs=(pipeline_path,)) as executor:
+                in_flight = deque()
+                for chunk in iter_dataset(input_path, chunksize=chunksize, delimiter=delimiter):
+                    in_flight.append((_identifiers(chunk, id_column), executor.submit(_score_chunk, chunk)))
+                    if len(in_flight) >= 2 * max_workers:
+                        ids, future = in_flight.popleft()
+                        rows += writer.write(ids, future.result())
+                while in_flight:
+                    ids, future = in_flight.popleft()
+                    rows += writer.write(ids, future.result())
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds else float('inf')}
+
+
+def _identifiers(chunk, id_column):
+    return chunk[id_column].to_numpy() if id_column in chunk.columns else None
+
+
+class _PredictionWriter:
+    # Appends prediction chunks to a Parquet or CSV file in order
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.writer = None
+        self.header = True
+
+    def write(self, ids, predictions):
+        frame = pd.DataFrame({'PredictedPremium': np.asarray(predictions, dtype='float64')})
+        if ids is not None:
+            frame.insert(0, 'UnderwrittenCoverID', ids)
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+            self.header = False
+        return len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+_PIPELINE = None
+
+
+def _init_scoring_worker(pipeline_path):
+    # Each worker loads the pipeline once
+    global _PIPELINE
+    _PIPELINE = ScoringPipeline.load(pipeline_path)
+
+
+def _score_chunk(chunk):
+    return _PIPELINE.predict(chunk)
+
+
+class MicroBatcher:
+    def __init__(self, pipeline: ScoringPipeline, max_batch_size: int = 256, max_wait_ms: float = 2.0):
+        """
+        Groups concurrent single-row requests into one vectorized `predict` call. A batch is
+        scored as soon as it holds `max_batch_size` rows or its first row has waited `max_wait_ms`.
+        If the batch fails, its requests are scored one by one so that only the bad ones fail.
+
+        Args:
+            pipeline (ScoringPipeline): The pipeline used to score batches.
+            max_batch_size (int): Largest number of rows per `predict` call.
+            max_wait_ms (float): Longest time a request waits for others to join its batch.
+        """
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, records: list) -> Future:
+        """
+        Queues raw rows (a list of dicts) and returns a future resolving to their predictions.
+        """
+        future = Future()
+        self.requests.put((records, future))
+        return future
+
+    def predict(self, records: list) -> list:
+        """
+        Scores raw rows through the shared batch and blocks until the result is ready.
+        """
+        return self.submit(records).result()
+
+    def close(self) -> None:
+        """
+        Stops the batching thread after the queued requests are scored.
+        """
+        self.requests.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+            batch = [item]
+            size = len(item[0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    item = self.requests.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.requests.put(None)
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            predictions = self.pipeline.predict(pd.DataFrame([row for records, _ in batch for row in records])).tolist()
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+                return
+            # One malformed request must not fail the others: score each request on its own
+            for item in batch:
+                self._score([item])
+            return
+        offset = 0
+        for records, future in batch:
+            future.set_result(predictions[offset:offset + len(records)])
+            offset += len(records)
+
+
+def make_server(pipeline: ScoringPipeline, host: str = '127.0.0.1', port: int = 8000, **batch_kwargs) -> ThreadingHTTPServer:
+    """
+    Builds a local HTTP server that prices quotes: POST /predict with one JSON object (a raw
+    row) or a list of them returns {"predictions": [...]}. Concurrent requests are scored
+    together through a `MicroBatcher`.
+
+    Args:
+        pipeline (ScoringPipeline): The pipeline to serve.
+        host (str): The interface to bind.
+        port (int): The port to bind (0 picks a free one).
+        **batch_kwargs: Passed to `MicroBatcher`.
+
+    Returns:
+        ThreadingHTTPServer: The server; call `serve_forever()` to start it.
+    """
+    batcher = MicroBatcher(pipeline, **batch_kwargs)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/predict':
+                self.send_error(404)
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                records = body if isinstance(body, list) else [body]
+                response = {'predictions': batcher.predict(records)}
+                status = 200
+            except Exception as error:
+                response, status = {'error': str(error)}, 400
+            payload = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.batcher = batcher
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score rows with a saved premium model.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    score = subcommands.add_parser("score", help="Score a Parquet or pipe-delimited file in streamed chunks.")
+    score.add_argument("pipeline")
+    score.add_argument("input")
+    score.add_argument("output")
+    score.add_argument("--chunksize", type=int, default=100_000)
+    score.add_argument("--workers", type=int, default=None)
+    serve = subcommands.add_parser("serve", help="Serve POST /predict on a local HTTP port.")
+    serve.add_argument("pipeline")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == "score":
+        stats = score_file(args.pipeline, args.input, args.output, chunksize=args.chunksize, max_workers=args.workers)
+        print(f"Scored {stats['rows']} rows in {stats['seconds']:.2f} s ({stats['rows_per_second']:.0f} rows/sec)")
+    else:
+        server = make_server(ScoringPipeline.load(args.pipeline), host=args.host, port=args.port)
+        print(f"Serving on http://{args.host}:{server.server_address[1]}/predict")
+        server.serve_forever()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Frames already mapped in this process, keyed by directory
+_LOADED = {}
+
+
+class SharedFrame:
+    def __init__(self, data: pd.DataFrame, columns: list = None, directory: str = None):
+        """
+        Writes DataFrame columns once to `.npy` files so that worker processes can
+        memory-map them instead of receiving pickled copies. Numeric and boolean columns
+        are stored as-is, datetimes as int64 nanoseconds, and everything else as integer
+        category codes plus a (small) list of categories.
+
+        Args:
+            data (pd.DataFrame): The data to share.
+            columns (list): Columns to share. If None, every column is shared.
+            directory (str): Where to write the arrays. If None, a temporary directory is created.
+        """
+        self.directory = directory or tempfile.mkdtemp(prefix='shared_frame_')
+        os.makedirs(self.directory, exist_ok=True)
+        self.columns = list(data.columns if columns is None else columns)
+        self.index = data.index if not isinstance(data.index, pd.RangeIndex) else None
+        self.categories = {}
+        self.datetimes = {}
+        for i, col in enumerate(self.columns):
+            series = data[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                self.datetimes[col] = series.dtype
+                values = series.to_numpy().view('int64')
+            elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                values = series.to_numpy()
+            else:
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+                else:
+                    codes, categories = pd.factorize(series)
+                self.categories[col] = categories
+                values = codes
+            np.save(self._path(i), np.ascontiguousarray(values))
+
+    def load(self) -> pd.DataFrame:
+        """
+        Returns a read-only DataFrame backed by the memory-mapped arrays. Numeric columns
+        are not copied; the mapping is reused for later calls in the same process.
+        """
+        if self.directory in _LOADED:
+            return _LOADED[self.directory]
+        columns = {}
+        for i, col in enumerate(self.columns):
+            values = np.load(self._path(i), mmap_mode='r')
+            if col in self.categories:
+                columns[col] = pd.Categorical.from_codes(values, self.categories[col])
+            elif col in self.datetimes:
+                columns[col] = values.view(self.datetimes[col])
+            else:
+                columns[col] = values
+        frame = pd.DataFrame(columns, index=self.index, copy=False)
+        _LOADED[self.directory] = frame
+        return frame
+
+    def close(self) -> None:
+        """
+        Removes the backing files.
+        """
+        _LOADED.pop(self.directory, None)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _path(self, position: int) -> str:
+        return os.path.join(self.directory, f'{position}.npy')
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+
+def _interpolated_quantile(values, counts, q: float):
+    """
+    Returns the `q` quantile of sorted `values` with multiplicities `counts`, interpolating
+    linearly between order statistics like `pd.Series.quantile`.
+    """
+    cumulative = np.cumsum(counts)
+    rank = q * (cumulative[-1] - 1)
+    lower, upper = int(np.floor(rank)), int(np.ceil(rank))
+    low_value = values[np.searchsorted(cumulative, lower, side='right')]
+    high_value = values[np.searchsorted(cumulative, upper, side='right')]
+    return low_value + (high_value - low_value) * (rank - lower)
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01, max_exact: int = 1024):
+        """
+        Mergeable quantile sketch for numeric columns. Value counts are kept exactly while a
+        column has at most `max_exact` distinct values; beyond that they collapse into
+        logarithmic buckets (as in DDSketch) with the given relative accuracy.
+
+        Args:
+            relative_accuracy (float): Maximum relative error of quantiles once bucketed.
+            max_exact (int): Number of distinct values tracked exactly.
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.exact = pd.Series(dtype='int64')
+        self.positive = pd.Series(dtype='int64')
+        self.negative = pd.Series(dtype='int64')
+        self.zero_count = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values) -> None:
+        """
+        Adds the non-missing entries of `values` to the sketch.
+        """
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self.exact is not None:
+            self.exact = self.exact.add(pd.Series(values).value_counts(), fill_value=0).astype('int64')
+            if len(self.exact) > self.max_exact:
+                self._collapse()
+        else:
+            self._add_to_buckets(values, np.ones(values.size, dtype='int64'))
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Merges `other` into this sketch in place and returns it.
+        """
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.exact is not None and other.exact is not None:
+            self.exact = self.exact.add(other.exact, fill_value=0).astype('int64')
+            if len(self.exact) > self.max_exact:
+                self._collapse()
+            return self
+        if self.exact is not None:
+            self._collapse()
+        if other.exact is not None:
+            self._add_to_buckets(other.exact.index.to_numpy(dtype='float64'), other.exact.to_numpy())
+        else:
+            self.positive = self.positive.add(other.positive, fill_value=0).astype('int64')
+            self.negative = self.negative.add(other.negative, fill_value=0).astype('int64')
+            self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns the approximate `q` quantile (exact while the sketch is in exact mode).
+        """
+        if self.count == 0:
+            return np.nan
+        if self.exact is not None:
+            exact = self.exact.sort_index()
+            return float(_interpolated_quantile(exact.index.to_numpy(dtype='float64'), exact.to_numpy(), q))
+
+        negative = self.negative.sort_index(ascending=False)
+        positive = self.positive.sort_index()
+        values = np.concatenate([
+            -self._bucket_value(negative.index.to_numpy()),
+            [0.0] if self.zero_count else [],
+            self._bucket_value(positive.index.to_numpy()),
+        ])
+        counts = np.concatenate([
+            negative.to_numpy(),
+            [self.zero_count] if self.zero_count else [],
+            positive.to_numpy(),
+        ])
+        return float(np.clip(_interpolated_quantile(values, counts, q), self.min, self.max))
+
+    def _bucket_value(self, keys):
+        return 2 * self.gamma ** keys.astype('float64') / (self.gamma + 1)
+
+    def _bucket_keys(self, values):
+        return np.ceil(np.log(values) / np.log(self.gamma)).astype('int64')
+
+    def _add_to_buckets(self, values, weights) -> None:
+        positive = values > 0
+        negative = values < 0
+        self.zero_count += int(weights[~positive & ~negative].sum())
+        if positive.any():
+            buckets = pd.Series(weights[positive]).groupby(self._bucket_keys(values[positive])).sum()
+            self.positive = self.positive.add(buckets, fill_value=0).astype('int64')
+        if negative.any():
+            buckets = pd.Series(weights[negative]).groupby(self._bucket_keys(-values[negative])).sum()
+            self.negative = self.negative.add(buckets, fill_value=0).astype('int64')
+
+    def _collapse(self) -> None:
+        exact, self.exact = self.exact, None
+        self._add_to_buckets(exact.index.to_numpy(dtype='float64'), exact.to_numpy())
+
+
+class FrequencySketch:
+    def __init__(self, capacity: int = 10_000):
+        """
+        Mergeable heavy-hitter sketch (Misra-Gries) for categorical, boolean and date columns.
+        Counts are exact while there are at most `capacity` distinct values.
+
+        Args:
+            capacity (int): Maximum number of counters kept.
+        """
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.count = 0
+        self.is_exact = True
+
+    def update(self, values) -> None:
+        """
+        Adds the non-missing entries of `values` to the sketch.
+        """
+        counts = pd.Series(values).value_counts()
+        counts = counts[counts > 0]
+        if isinstance(counts.index, pd.CategoricalIndex):
+            counts.index = counts.index.astype(object)
+        self.count += int(counts.sum())
+        self._add(counts)
+
+    def merge(self, other: 'FrequencySketch') -> 'FrequencySketch':
+        """
+        Merges `other` into this sketch in place and returns it.
+        """
+        self.count += other.count
+        self.is_exact = self.is_exact and other.is_exact
+        self._add(other.counts)
+        return self
+
+    def mode(self):
+        """
+        Returns the most frequent value (the smallest one on ties, like `pd.Series.mode`),
+        or None if the sketch is empty.
+        """
+        if self.counts.empty:
+            return None
+        candidates = self.counts.index[self.counts == self.counts.max()]
+        try:
+            return sorted(candidates)[0]
+        except TypeError:
+            return candidates[0]
+
+    def quantile(self, q: float):
+        """
+        Returns the `q` quantile of an orderable column. Only available while counts are exact.
+        """
+        if not self.is_exact:
+            raise ValueError("Quantiles need exact counts; the sketch exceeded its capacity.")
+        if self.counts.empty:
+            return None
+        counts = self.counts.sort_index()
+        return _interpolated_quantile(counts.index, counts.to_numpy(), q)
+
+    def _add(self, counts: pd.Series) -> None:
+        merged = self.counts.add(counts, fill_value=0).astype('int64')
+        if len(merged) > self.capacity:
+            # Misra-Gries reduction: subtract the (capacity + 1)-th largest count from every counter
+            self.is_exact = False
+            merged = merged - merged.nlargest(self.capacity + 1).iloc[-1]
+            merged = merged[merged > 0]
+        self.counts = merged
@@ -0,0 +1,48 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+from benchmarks.run_benchmarks import compare_to_baseline
+from benchmarks.synthetic import COLUMNS, iter_synthetic, synthetic_data, write_synthetic_zip
+from scripts.extract_zip import stream_txt_from_zip
+from scripts.schema import DTYPES
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_data_matches_schema(self):
+        data = synthetic_data(5000, seed=1)
+        self.assertListEqual(list(data.columns), COLUMNS)
+        self.assertEqual(len(COLUMNS), 52)
+        for col, dtype in DTYPES.items():
+            self.assertEqual(str(data[col].dtype), dtype, col)
+        self.assertTrue(data['NumberOfVehiclesInFleet'].isna().all())
+        self.assertTrue(0.7 < data['CustomValueEstimate'].isna().mean() < 0.85)
+        self.assertGreater(data['SumInsured'].mean(), 2 * data['SumInsured'].median())  # Right-skewed
+        pd.testing.assert_frame_equal(synthetic_data(5000, seed=1), data)
+
+    def test_chunking_does_not_change_the_data(self):
+        whole = synthetic_data(1500, seed=2)
+        chunks = list(iter_synthetic(1500, seed=2, chunk_rows=400))
+        self.assertListEqual([len(chunk) for chunk in chunks], [400, 400, 400, 300])
+        pd.testing.assert_frame_equal(pd.concat(chunks), whole)
+
+    def test_synthetic_zip_reads_with_declared_dtypes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_synthetic_zip(os.path.join(tmp, 'data.zip'), 300)
+            data = pd.concat(stream_txt_from_zip(path, 'MachineLearningRating_v3.txt'))
+        self.assertEqual(data.shape, (300, 52))
+        self.assertEqual(str(data['TransactionMonth'].dtype), 'datetime64[ns]')
+        self.assertEqual(str(data['PostalCode'].dtype), 'int16')
+
+    def test_compare_to_baseline_flags_regressions(self):
+        baseline = {'1000': {'extract_zip': {'seconds': 1.0, 'peak_rss_mb': 100.0}}}
+        results = {
+            '1000': {'extract_zip': {'seconds': 1.2, 'peak_rss_mb': 150.0}, 'model_building': {'seconds': 9.0}},
+            '5000': {'extract_zip': {'seconds': 9.0, 'peak_rss_mb': 900.0}},
+        }
+        regressions = compare_to_baseline(results, baseline, {'seconds': 0.25, 'peak_rss_mb': 0.1})
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]['metric'], 'peak_rss_mb')
+        self.assertAlmostEqual(regressions[0]['ratio'], 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
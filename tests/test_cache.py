@@ -0,0 +1,97 @@
+import unittest
+import importlib.util
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from scripts.cache import StageCache, code_fingerprint, column_hashes, content_hash
+from scripts.data_processing import MissingDataImputer, OutlierCapper
+from scripts.hypothesis_testing import ABHypothesisTesting
+
+class TestStageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = StageCache(self.tmp_dir.name)
+        self.data = pd.DataFrame({
+            'TotalPremium': [10.0, 20.0, None, 40.0, 1000.0],
+            'Province': pd.Categorical(['Gauteng', None, 'Gauteng', 'Limpopo', 'Limpopo']),
+            'Gender': ['Male', 'Female', 'Male', 'Female', 'Male'],
+        })
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_column_hashes_follow_content_only(self):
+        hashes = column_hashes(self.data)
+        edited = self.data.copy()
+        edited.loc[0, 'Gender'] = 'Female'
+        edited.index = edited.index + 10
+        changed = column_hashes(edited)
+        self.assertEqual(hashes['TotalPremium'], changed['TotalPremium'])
+        self.assertNotEqual(hashes['Gender'], changed['Gender'])
+        self.assertNotEqual(content_hash(np.arange(3)), content_hash(np.arange(3.0)))
+
+    def test_memoize_reuses_unchanged_inputs(self):
+        calls = []
+        compute = lambda: calls.append(1) or self.data['TotalPremium'].sum()
+        for _ in range(2):
+            self.cache.memoize('total', compute, inputs=(self.data[['TotalPremium']],), scale=1)
+        self.assertEqual(len(calls), 1)
+        self.cache.memoize('total', compute, inputs=(self.data[['TotalPremium']],), scale=2)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_memoize_is_keyed_on_the_code_version(self):
+        # Editing the module that computes a step invalidates its entries
+        module_path = os.path.join(self.tmp_dir.name, 'step_module.py')
+
+        def load_step(body):
+            with open(module_path, 'w') as f:
+                f.write(f'def step():\n    return {body}\n')
+            os.utime(module_path, ns=(0, time.time_ns() + len(body)))  # Distinct mtime even within one tick
+            spec = importlib.util.spec_from_file_location('step_module', module_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module.step
+
+        old_step = load_step('1')
+        old_fingerprint = code_fingerprint(old_step)
+        self.assertEqual(self.cache.memoize('step', old_step), 1)
+        self.assertEqual(self.cache.memoize('step', old_step), 1)
+        new_step = load_step('2 + 0')
+        self.assertNotEqual(code_fingerprint(new_step), old_fingerprint)
+        self.assertEqual(self.cache.memoize('step', new_step), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        payload = np.zeros(1000)
+        for name in ['a', 'b', 'c']:
+            self.cache.put(name, payload)
+            os.utime(self.cache._path(name), ns=(0, time.time_ns() - {'a': 3, 'b': 2, 'c': 1}[name] * 10 ** 9))
+        self.assertIsNotNone(self.cache.get('a'))  # Now the most recently used
+        self.cache.evict(max_bytes=2 * os.path.getsize(self.cache._path('a')))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+    def test_pipeline_steps_use_the_cache(self):
+        imputer = MissingDataImputer(fill_cols=['TotalPremium', 'Province'], cache=self.cache).fit(self.data)
+        capper = OutlierCapper(['TotalPremium'], cache=self.cache).fit(self.data)
+        tester = ABHypothesisTesting(self.data, cache=self.cache)
+        table = tester._contingency_table('Province', 'Gender')
+        self.assertEqual(self.cache.misses, 3)
+
+        # Editing a column none of the steps read keeps every entry valid
+        edited = self.data.assign(Gender=self.data['Gender'])
+        edited['Other'] = 1
+        again = MissingDataImputer(fill_cols=['TotalPremium', 'Province'], cache=self.cache).fit(edited)
+        capper_again = OutlierCapper(['TotalPremium'], cache=self.cache).fit(edited)
+        table_again = ABHypothesisTesting(edited, cache=self.cache)._contingency_table('Province', 'Gender')
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 3))
+        self.assertDictEqual(again.fill_values_, imputer.fill_values_)
+        pd.testing.assert_series_equal(capper_again.upper_, capper.upper_)
+        self.assertEqual((table_again != table).nnz, 0)
+
+if __name__ == '__main__':
+    unittest.main()
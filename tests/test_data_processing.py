@@ -1,6 +1,9 @@
 import unittest
+import os
+import tempfile
+import numpy as np
 import pandas as pd
-from scripts.data_processing import DataProcessing  # Update the import path as needed
+from scripts.data_processing import CategoricalEncoder, DataProcessing, MissingDataImputer, MissingDataProfiler, OutlierCapper, SparseEncoder  # Update the import path as needed
 
 class TestDataProcessing(unittest.TestCase):
     def setUp(self):
@@ -80,5 +83,182 @@ class TestDataProcessing(unittest.TestCase):
         self.assertIn('A', result.columns)
         self.assertIn('B', result.columns)
 
+    def test_handle_missing_data_categorical(self):
+        """
+        Test the `handle_missing_data` method on categorical columns, ensuring
+        they are filled with their mode, or 'Unknown' when entirely missing.
+        """
+        df = pd.DataFrame({
+            'E': pd.Categorical(['x', None, 'x', 'y']),
+            'F': pd.Categorical([None, None, None, None]),
+        })
+        result = DataProcessing(df).handle_missing_data('low', ['E', 'F'])
+
+        self.assertListEqual(result['E'].tolist(), ['x', 'x', 'x', 'y'])
+        self.assertListEqual(result['F'].tolist(), ['Unknown'] * 4)
+
+    def test_imputer_reuses_fitted_values(self):
+        """
+        Test that a fitted `MissingDataImputer` applies the statistics learned
+        at fit time to new data instead of recomputing them.
+        """
+        imputer = MissingDataImputer(fill_cols=['A', 'B']).fit(self.df)
+        self.assertEqual(imputer.fill_values_['A'], 2.0)  # median of 1, 2, 4
+        self.assertEqual(imputer.fill_values_['B'], 'x')  # first of the tied modes
+
+        new_batch = pd.DataFrame({'A': [None, 100.0], 'B': [None, 'q']})
+        result = imputer.transform(new_batch)
+        self.assertListEqual(result['A'].tolist(), [2.0, 100.0])
+        self.assertListEqual(result['B'].tolist(), ['x', 'q'])
+
+    def test_imputer_from_summary(self):
+        """
+        Test that `MissingDataImputer.from_summary` drops columns above the
+        threshold and imputes the others in one pass.
+        """
+        summary = self.processor.missing_data_summary()
+        imputer = MissingDataImputer.from_summary(summary, high_threshold=40)
+        self.assertListEqual(imputer.drop_cols, ['C'])
+
+        result = imputer.fit_transform(self.df)
+        self.assertNotIn('C', result.columns)
+        self.assertFalse(result.isnull().any().any())
+
+    def test_profiler_tolerates_dtype_drift_between_chunks(self):
+        """
+        Test that a column inferred as numeric in one chunk and as text in the next
+        is still profiled, with the non-numeric values left out of its median.
+        """
+        first = pd.DataFrame({'Amount': [1, 3, None]})
+        second = pd.DataFrame({'Amount': ['1,000', '2', None]})
+        profile = MissingDataProfiler().update(first).update(second)
+
+        self.assertEqual(profile.summary().loc['Amount', 'Missing Count'], 2)
+        self.assertAlmostEqual(profile.fill_values(['Amount'])['Amount'], 2.0, delta=0.05)
+
+    def test_imputer_from_summary_bucket_boundaries(self):
+        """
+        Test that `from_summary` keeps the original buckets: exactly 50% missing is
+        imputed, above it is dropped, and exactly 20% missing is left untouched.
+        """
+        df = pd.DataFrame({
+            'low': [None, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0],
+            'boundary': [None, None, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0],
+            'moderate': [None] * 5 + [5.0, 6.0, 7.0, 8.0, 9.0],
+            'high': [None] * 6 + [6.0, 7.0, 8.0, 9.0],
+        })
+        imputer = MissingDataImputer.from_summary(DataProcessing(df).missing_data_summary())
+        self.assertListEqual(imputer.drop_cols, ['high'])
+        self.assertListEqual(sorted(imputer.fill_cols), ['low', 'moderate'])
+
+        result = imputer.fit_transform(df)
+        self.assertEqual(result['boundary'].isnull().sum(), 2)
+        self.assertFalse(result[['low', 'moderate']].isnull().any().any())
+
+    def test_profiler_matches_in_memory_summary(self):
+        """
+        Test that `MissingDataProfiler` streamed over chunks produces the same
+        summary as `missing_data_summary`, and that per-file profiles merge.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'sample.txt')
+            self.df.to_csv(path, sep='|', index=False)
+            profile = MissingDataProfiler.from_file(path, chunksize=1)
+
+        pd.testing.assert_frame_equal(profile.summary(), self.processor.missing_data_summary())
+
+        merged = MissingDataProfiler().update(self.df.iloc[:2]).merge(MissingDataProfiler().update(self.df.iloc[2:]))
+        pd.testing.assert_frame_equal(merged.summary(), self.processor.missing_data_summary())
+
+    def test_profiler_to_imputer(self):
+        """
+        Test that the profile yields a fitted imputer without another pass over the data.
+        """
+        imputer = MissingDataProfiler().update(self.df).to_imputer(high_threshold=40)
+        self.assertListEqual(imputer.drop_cols, ['C'])
+        self.assertEqual(imputer.fill_values_['A'], 2.0)
+        self.assertEqual(imputer.fill_values_['B'], 'x')
+        self.assertFalse(imputer.transform(self.df).isnull().any().any())
+
+    def test_outlier_capper(self):
+        """
+        Test that `OutlierCapper` clips to the IQR fences, leaves missing values
+        untouched, and reapplies the fitted fences to a new batch.
+        """
+        df = pd.DataFrame({
+            'P': [1.0, 2.0, 3.0, 4.0, 100.0, None],
+            'Q': np.array([-50, 10, 11, 12, 13, 14], dtype='int64'),
+        })
+        capper = OutlierCapper(['P', 'Q'])
+        result = capper.fit_transform(df, copy=True)
+
+        # Q1 = 2, Q3 = 4 for P, so the upper fence is 4 + 1.5 * 2 = 7
+        self.assertEqual(capper.upper_['P'], 7.0)
+        self.assertListEqual(result['P'].tolist()[:5], [1.0, 2.0, 3.0, 4.0, 7.0])
+        self.assertTrue(np.isnan(result['P'].iloc[5]))
+        self.assertEqual(result['Q'].iloc[0], capper.lower_['Q'])
+        self.assertEqual(df['P'].iloc[4], 100.0)  # copy=True leaves the input alone
+
+        new_batch = pd.DataFrame({'P': [-1000.0, 5.0], 'Q': [0, 1000]})
+        capped = capper.transform(new_batch)
+        self.assertListEqual(capped['P'].tolist(), [capper.lower_['P'], 5.0])
+        self.assertListEqual(capped['Q'].tolist(), [capper.lower_['Q'], capper.upper_['Q']])
+
+    def test_categorical_encoder(self):
+        """
+        Test that `CategoricalEncoder` reuses the fitted categories on a new batch, maps
+        missing and unseen values to -1, and splits datetimes into year and month.
+        """
+        df = pd.DataFrame({
+            'Province': pd.Categorical(['Gauteng', 'Limpopo', None]),
+            'IsVATRegistered': [True, False, True],
+            'TransactionMonth': pd.to_datetime(['2015-01-01', '2015-02-01', '2014-12-01']),
+            'SumInsured': [1.0, 2.0, 3.0],
+        })
+        encoder = CategoricalEncoder()
+        encoded = encoder.fit_transform(df)
+        self.assertListEqual(list(encoded.columns), ['Province', 'IsVATRegistered', 'TransactionMonth_year',
+                                                     'TransactionMonth_month', 'SumInsured'])
+        self.assertListEqual(encoded['Province'].tolist(), [0, 1, -1])
+        self.assertListEqual(encoded['TransactionMonth_month'].tolist(), [1, 2, 12])
+
+        new_batch = pd.DataFrame({'Province': ['Limpopo', 'Free State'], 'IsVATRegistered': [False, True],
+                                  'TransactionMonth': ['2016-03-01', '2016-04-01'], 'SumInsured': [4.0, 5.0]})
+        encoded = encoder.transform(new_batch)
+        self.assertListEqual(encoded['Province'].tolist(), [1, -1])
+        self.assertListEqual(encoded['IsVATRegistered'].tolist(), [0, 1])
+        self.assertListEqual(encoded['TransactionMonth_year'].tolist(), [2016, 2016])
+
+    def test_sparse_encoder(self):
+        """
+        Test that `SparseEncoder` one-hot encodes low-cardinality columns, target or frequency
+        encodes high-cardinality ones, and keeps the fitted layout for new batches.
+        """
+        df = pd.DataFrame({
+            'Province': pd.Categorical(['Gauteng', 'Limpopo', None, 'Gauteng']),
+            'PostalCode': ['2000', '2000', '122', '7100'],
+            'SumInsured': [0.0, 2.0, 3.0, 4.0],
+        })
+        y = [10.0, 20.0, 30.0, 40.0]
+        encoder = SparseEncoder(max_onehot=2, smoothing=0, n_folds=4)
+        matrix = encoder.fit_transform(df, y)
+        self.assertEqual(matrix.format, 'csr')
+        self.assertListEqual(encoder.feature_names_, ['Province=Gauteng', 'Province=Limpopo', 'PostalCode_target', 'SumInsured'])
+        # With one row per fold, each training row is encoded from the other rows only:
+        # the other '2000' row, or the mean of the rest for a postal code seen once
+        np.testing.assert_allclose(matrix.toarray(), [[1, 0, 20, 0], [0, 1, 10, 2], [0, 0, 70 / 3, 3], [1, 0, 20, 4]])
+        self.assertEqual(matrix.nnz, 11)  # The zero SumInsured is stored explicitly
+
+        # New data is encoded with the means of all training rows
+        np.testing.assert_array_equal(encoder.transform(df).toarray(), [[1, 0, 15, 0], [0, 1, 15, 2], [0, 0, 30, 3], [1, 0, 40, 4]])
+
+        new_batch = pd.DataFrame({'SumInsured': [5.0], 'PostalCode': ['9999'], 'Province': ['Free State'], 'Other': [1]})
+        np.testing.assert_array_equal(encoder.transform(new_batch).toarray(), [[0, 0, 25, 5]])
+
+        frequencies = SparseEncoder(max_onehot=2, high_cardinality='frequency').fit_transform(df)
+        np.testing.assert_array_equal(frequencies[:, 2].toarray().ravel(), [0.5, 0.5, 0.25, 0.25])
+        with self.assertRaises(ValueError):
+            SparseEncoder(max_onehot=2).fit(df)  # Target encoding needs y
+
 if __name__ == '__main__':
     unittest.main()
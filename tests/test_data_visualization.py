@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from scripts.data_visualization import DataVisualizer
+
+class TestDataVisualization(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        self.data = pd.DataFrame({
+            'TotalPremium': rng.exponential(50, n),
+            'SumInsured': rng.exponential(1000, n),
+            'CoverType': pd.Categorical(rng.choice(['Own Damage', 'Windscreen', 'Theft'], n)),
+            'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape'], n)),
+            'make': pd.Categorical(rng.choice(['TOYOTA', 'VW'], n)),
+            'VehicleType': pd.Categorical(rng.choice(['Passenger Vehicle', 'Bus'], n)),
+        })
+        self.visualizer = DataVisualizer(self.data)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_figure_jobs_carry_aggregates(self):
+        jobs = self.visualizer.figure_jobs(['TotalPremium', 'SumInsured'], ['Own Damage', 'Theft'], self.tmp_dir.name)
+        self.assertEqual(len(jobs), 4)
+        boxes = jobs[1]['data']['stats']
+        self.assertAlmostEqual(boxes[0]['med'], self.data['TotalPremium'].median())
+        cover_counts = jobs[3]['data']['cover_counts']
+        self.assertSetEqual(set(cover_counts['CoverType']), {'Own Damage', 'Theft'})
+        self.assertEqual(cover_counts['count'].sum(), self.data['CoverType'].isin(['Own Damage', 'Theft']).sum())
+
+    def test_render_dvc_plots_serial_and_parallel(self):
+        # Every output is written and no figure is left open in this process
+        for workers in [1, 2]:
+            with mock.patch('matplotlib.use') as use_backend:  # The caller's backend is left alone
+                paths = self.visualizer.render_dvc_plots(['TotalPremium', 'SumInsured'], ['Own Damage', 'Theft'],
+                                                         output_dir=os.path.join(self.tmp_dir.name, str(workers)), max_workers=workers)
+            use_backend.assert_not_called()
+            self.assertEqual(len(paths), 4)
+            for path in paths:
+                self.assertGreater(os.path.getsize(path), 0)
+            self.assertListEqual(plt.get_fignums(), [])
+
+    def test_summaries_follow_data(self):
+        # Replacing the data (e.g. by capping outliers) discards the cached summaries
+        before = self.visualizer.summaries.box_stats('TotalPremium')[0]
+        self.visualizer.cap_all_outliers(['TotalPremium'])
+        after = self.visualizer.summaries.box_stats('TotalPremium')[0]
+        self.assertEqual(len(after['fliers']), 0)
+        self.assertGreater(len(before['fliers']), 0)
+
+    def test_univariate_analysis_closes_figures(self):
+        self.visualizer.univariate_analysis(num_cols=['TotalPremium'], cat_cols=['Province'])
+        self.assertListEqual(plt.get_fignums(), [])
+
+    def test_large_scatter_and_pairplot_use_density_and_cached_sample(self):
+        self.visualizer.scatter_plot('SumInsured', 'TotalPremium', max_points=100)
+        self.visualizer.scatter_plot('SumInsured', 'TotalPremium', hue_col='Province', max_points=100)
+        sample = self.visualizer.summaries.sample(100, strata='Province')
+        self.assertIs(self.visualizer.summaries.sample(100, strata='Province'), sample)
+        self.assertSetEqual(set(sample['Province']), {'Gauteng', 'Western Cape'})
+
+        grid = self.visualizer.plot_pairplot(['SumInsured', 'TotalPremium'], max_points=100)
+        self.assertEqual(len(grid.data), 100)
+        plt.close('all')
+        self.assertListEqual(plt.get_fignums(), [])
+
+    def test_from_file_reservoir_sample(self):
+        path = os.path.join(self.tmp_dir.name, 'data.parquet')
+        self.data.to_parquet(path, index=False)
+        visualizer = DataVisualizer.from_file(path, columns=['TotalPremium', 'Province'], sample_size=50)
+        self.assertEqual(len(visualizer.data), 50)
+        self.assertListEqual(list(visualizer.data.columns), ['TotalPremium', 'Province'])
+
+    def test_correlation_matrix_saves_before_show(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        try:
+            os.makedirs('Screenshots')
+            self.visualizer.correlation_matrix(['TotalPremium', 'SumInsured'])
+            image = plt.imread('Screenshots/correlation_heatmap.png')
+        finally:
+            os.chdir(cwd)
+        self.assertGreater(image[..., :3].std(), 0)  # Not a blank canvas
+        self.assertListEqual(plt.get_fignums(), [])
+
+if __name__ == '__main__':
+    unittest.main()
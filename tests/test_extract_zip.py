@@ -2,7 +2,10 @@ import unittest
 import os
 import zipfile
 import pandas as pd
-from scripts.extract_zip import extract_file_from_zip, load_txt_from_zip, load_data
+from scripts.extract_zip import (
+    extract_file_from_zip, load_txt_from_zip, load_data,
+    stream_txt_from_zip, extract_member, write_columnar_cache,
+)
 
 class TestExtractZip(unittest.TestCase):
     def setUp(self):
@@ -92,5 +95,79 @@ class TestExtractZip(unittest.TestCase):
         self.assertEqual(df.shape, (2, 3))  # Expect 2 rows and 3 columns
         self.assertListEqual(list(df.columns), ["id", "name", "value"])  # Verify column names
 
+    def test_stream_txt_from_zip(self):
+        """
+        Test the `stream_txt_from_zip` function to ensure that the TXT member is
+        parsed in chunks directly from the archive without extracting it.
+        """
+        chunks = list(stream_txt_from_zip(self.sample_zip_path, self.test_txt, chunksize=1))
+
+        # Each chunk holds one row and nothing is written to the extraction directory
+        self.assertEqual(len(chunks), 2)
+        self.assertListEqual(list(chunks[0].columns), ["id", "name", "value"])
+        self.assertEqual(os.listdir(self.extracted_dir), [])
+        self.assertListEqual(pd.concat(chunks)["value"].tolist(), [100, 200])
+
+    def test_extract_member(self):
+        """
+        Test the `extract_member` function to ensure the member is copied
+        byte-for-byte to the requested path.
+        """
+        output_path = os.path.join(self.extracted_dir, "copy.txt")
+        extract_member(self.sample_zip_path, self.test_txt, output_path)
+
+        with open(output_path) as extracted, open(self.sample_txt_path) as original:
+            self.assertEqual(extracted.read(), original.read())
+
+    def test_write_columnar_cache(self):
+        """
+        Test the `write_columnar_cache` function to ensure the streamed chunks
+        are written to a single Parquet file with every row preserved.
+        """
+        output_path = os.path.join(self.extracted_dir, "sample.parquet")
+        rows = write_columnar_cache(self.sample_zip_path, self.test_txt, output_path, chunksize=1)
+
+        self.assertEqual(rows, 2)
+        df = pd.read_parquet(output_path)
+        self.assertEqual(df.shape, (2, 3))
+        self.assertListEqual(df["name"].tolist(), ["John", "Doe"])
+
+    def test_write_columnar_cache_sparse_column(self):
+        """
+        Test that a column that is all-missing in the first chunk and filled in a later
+        one is written with one string type instead of failing on the later chunk.
+        """
+        sparse_txt_path = os.path.join(self.test_dir, "sparse.txt")
+        with open(sparse_txt_path, "w") as f:
+            f.write("id|CrossBorderNote\n1|\n2|\n3|No\n4|1.5\n")
+        with zipfile.ZipFile(self.sample_zip_path, "a") as zipf:
+            zipf.write(sparse_txt_path, "sparse.txt")
+
+        output_path = os.path.join(self.extracted_dir, "sparse.parquet")
+        rows = write_columnar_cache(self.sample_zip_path, "sparse.txt", output_path, chunksize=2)
+
+        self.assertEqual(rows, 4)
+        df = pd.read_parquet(output_path)
+        self.assertListEqual(df["CrossBorderNote"].tolist()[2:], ["No", "1.5"])
+        self.assertTrue(df["CrossBorderNote"].iloc[:2].isnull().all())
+
+    def test_write_columnar_cache_capital_outstanding(self):
+        """
+        Test that CapitalOutstanding keeps one float type when a digit-only chunk is
+        followed by a chunk with thousands separators.
+        """
+        capital_txt_path = os.path.join(self.test_dir, "capital.txt")
+        with open(capital_txt_path, "w") as f:
+            f.write("PolicyID|CapitalOutstanding\n1|119300\n2|0\n3|1,000\n4|\n")
+        with zipfile.ZipFile(self.sample_zip_path, "a") as zipf:
+            zipf.write(capital_txt_path, "capital.txt")
+
+        output_path = os.path.join(self.extracted_dir, "capital.parquet")
+        write_columnar_cache(self.sample_zip_path, "capital.txt", output_path, chunksize=2)
+
+        df = pd.read_parquet(output_path)
+        self.assertEqual(df["CapitalOutstanding"].dtype, "float64")
+        self.assertListEqual(df["CapitalOutstanding"].tolist()[:3], [119300.0, 0.0, 1000.0])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,10 @@
 import unittest
+import os
+import tempfile
 import pandas as pd
 import numpy as np
 from scipy import stats
-from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.hypothesis_testing import ABHypothesisTesting, GroupMoments, TESTS, _resample, adjust_p_values
 
 class TestABHypothesisTesting(unittest.TestCase):
 
@@ -75,6 +77,197 @@ class TestABHypothesisTesting(unittest.TestCase):
         self.assertIsInstance(results['Margin Differences Between Postal Codes'], str)
         self.assertIsInstance(results['Risk Differences Between Women and Men'], str)
 
+    def test_from_file_reads_required_columns(self):
+        # Test that only the columns used by the tests are loaded from a Parquet intermediate
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'data.parquet')
+            self.data.to_parquet(path, index=False)
+            ab_test = ABHypothesisTesting.from_file(path)
+        self.assertListEqual(list(ab_test.data.columns), ABHypothesisTesting.REQUIRED_COLUMNS)
+
+    def test_gender_test_does_not_mutate_data(self):
+        # The gender test must not filter self.data for the tests that follow it
+        self.data.loc[0, 'Gender'] = 'Not Specified'
+        before = self.ab_test.data.copy()
+        self.ab_test._risk_between_genders()
+        pd.testing.assert_frame_equal(self.ab_test.data, before)
+
+    def test_run_tests_structured_results(self):
+        # Test that run_tests returns statistic, p-value, n and timing for every test
+        results = self.ab_test.run_tests()
+        self.assertListEqual(list(results), list(TESTS))
+        provinces = results['Risk Differences Across Provinces']
+        self.assertEqual(provinces['method'], 'chi-squared')
+        self.assertEqual(provinces['n'], len(self.data))
+        self.assertIsInstance(provinces['p_value'], float)
+        self.assertGreaterEqual(provinces['seconds'], 0)
+        self.assertEqual(results['Risk Differences Between Women and Men']['n'], 6)
+
+    def test_run_tests_parallel_matches_serial(self):
+        # Test that process-pool execution over shared columns gives the same numbers
+        serial = self.ab_test.run_tests()
+        parallel = self.ab_test.run_tests(parallel=True, max_workers=2)
+        for name in TESTS:
+            self.assertEqual(parallel[name]['statistic'], serial[name]['statistic'])
+            self.assertEqual(parallel[name]['p_value'], serial[name]['p_value'])
+            self.assertEqual(parallel[name]['n'], serial[name]['n'])
+
+    def test_sparse_chi_squared_matches_dense(self):
+        # The sparse chi-squared path must agree with scipy on the dense crosstab
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'PostalCode': rng.choice(['1', '2', '3', '4', '5'], 2000),
+            'TotalPremium': rng.integers(0, 40, 2000).astype(float),
+        })
+        ab_test = ABHypothesisTesting(data)
+        table = ab_test._contingency_table('PostalCode', 'TotalPremium')
+        self.assertTrue(hasattr(table, 'tocoo'))  # stays a sparse matrix
+
+        chi2, p_value = ab_test._chi_squared_test('PostalCode', 'TotalPremium')
+        expected_chi2, expected_p, _, _ = stats.chi2_contingency(pd.crosstab(data['PostalCode'], data['TotalPremium']))
+        self.assertAlmostEqual(chi2, expected_chi2)
+        self.assertAlmostEqual(p_value, expected_p)
+
+    def test_chi_squared_with_quantile_bins(self):
+        # Binning the metric into quantile buckets gives a feature x bins table
+        ab_test = ABHypothesisTesting(self.data, metric_bins=3)
+        table = ab_test._contingency_table('Province', 'TotalPremium', bins=3)
+        self.assertEqual(table.shape, (3, 3))
+        self.assertEqual(table.sum(), len(self.data))
+        chi2, p_value = ab_test._chi_squared_test('Province', 'TotalPremium')
+        expected_chi2, expected_p, _, _ = stats.chi2_contingency(table.toarray())
+        self.assertAlmostEqual(chi2, expected_chi2)
+        self.assertAlmostEqual(p_value, expected_p)
+
+    def test_pairwise_margin_tests(self):
+        # Every pair of postal codes is tested, matching the two-group t-test
+        results = self.ab_test.pairwise_margin_tests(correction='bonferroni')
+        self.assertEqual(len(results), 3)
+        self.assertListEqual(results[['group_a', 'group_b']].values.tolist(), [['123', '456'], ['123', '789'], ['456', '789']])
+
+        group_a = self.ab_test._segment_data('PostalCode', value='123')
+        group_b = self.ab_test._segment_data('PostalCode', value='456')
+        t_stat, p_value = self.ab_test._t_test(group_a, group_b, 'TotalPremium')
+        self.assertAlmostEqual(results.loc[0, 'statistic'], t_stat)
+        self.assertAlmostEqual(results.loc[0, 'p_value'], p_value)
+        self.assertAlmostEqual(results.loc[0, 'p_adjusted'], min(1.0, 3 * p_value))
+
+    def test_pairwise_margin_tests_one_vs_rest(self):
+        # Each group is compared with all remaining rows using z-tests for large groups
+        rng = np.random.default_rng(1)
+        data = pd.DataFrame({'PostalCode': rng.integers(0, 4, 400), 'TotalPremium': rng.normal(100, 10, 400)})
+        results = ABHypothesisTesting(data).pairwise_margin_tests(mode='one_vs_rest')
+        rest = data.loc[data['PostalCode'] != 0, 'TotalPremium']
+        group = data.loc[data['PostalCode'] == 0, 'TotalPremium']
+        expected = (group.mean() - rest.mean()) / np.sqrt(group.var() / len(group) + rest.var() / len(rest))
+        self.assertEqual(results.loc[0, 'test'], 'z-test')
+        self.assertAlmostEqual(results.loc[0, 'mean_b'], rest.mean())
+        self.assertAlmostEqual(results.loc[0, 'statistic'], expected)
+
+    def test_group_moments_merge_matches_full_data(self):
+        # Moments merged chunk by chunk give the same tests as the full rows
+        rng = np.random.default_rng(2)
+        data = pd.DataFrame({'PostalCode': rng.integers(0, 6, 900), 'TotalPremium': rng.normal(1e6, 10, 900)})
+        data.loc[::11, 'TotalPremium'] = np.nan
+        moments = GroupMoments(pairs=[('PostalCode', 'TotalPremium')])
+        for start in range(0, len(data), 250):
+            moments.merge(GroupMoments(pairs=[('PostalCode', 'TotalPremium')]).update(data.iloc[start:start + 250]))
+        expected = ABHypothesisTesting(data).pairwise_margin_tests(mode='one_vs_rest')
+        pd.testing.assert_frame_equal(moments.pairwise_tests(mode='one_vs_rest'), expected, check_dtype=False)
+
+    def test_adjust_p_values(self):
+        p_values = [0.01, 0.04, 0.03, np.nan]
+        np.testing.assert_allclose(adjust_p_values(p_values, 'holm'), [0.03, 0.06, 0.06, np.nan])
+        np.testing.assert_allclose(adjust_p_values(p_values, 'bonferroni'), [0.03, 0.12, 0.09, np.nan])
+        np.testing.assert_allclose(adjust_p_values(p_values, 'fdr_bh'), [0.03, 0.04, 0.04, np.nan])
+
+    def test_segment_data_uses_cached_group_index(self):
+        # Repeated segmentation reuses one group index per feature
+        self.ab_test._segment_data('Province', value='A')
+        index = self.ab_test._group_index['Province']
+        result = self.ab_test._segment_data('Province', value='B')
+        self.assertIs(self.ab_test._group_index['Province'], index)
+        pd.testing.assert_frame_equal(result, self.data[self.data['Province'] == 'B'])
+
+        # Unknown values give an empty segment; no filter returns the data itself
+        self.assertTrue(self.ab_test._segment_data('Province', value='Z').empty)
+        self.assertIs(self.ab_test._segment_data('Province'), self.ab_test.data)
+
+        # Replacing the data drops the cached index
+        self.ab_test.data = self.data.iloc[:2]
+        self.assertDictEqual(self.ab_test._group_index, {})
+
+    def test_segment_data_copies_only_requested_columns(self):
+        # The tests take only the metric column of each segment
+        result = self.ab_test._segment_data('Province', value='B', columns=['TotalPremium'])
+        pd.testing.assert_frame_equal(result, self.data.loc[self.data['Province'] == 'B', ['TotalPremium']])
+        self.assertListEqual(list(self.ab_test._segment_data('Province', columns=['TotalPremium']).columns), ['TotalPremium'])
+
+    def test_segment_data_exclude_keeps_missing_values(self):
+        # Excluding values keeps rows with a missing feature, like ~isin()
+        data = self.data.copy()
+        data.loc[2, 'Gender'] = None
+        ab_test = ABHypothesisTesting(data)
+        result = ab_test._segment_data('Gender', exclude_values=['Female'])
+        pd.testing.assert_frame_equal(result, data[~data['Gender'].isin(['Female'])])
+
+    def test_check_identical_values_is_memoized(self):
+        data = self.data.assign(Constant=7)
+        ab_test = ABHypothesisTesting(data)
+        self.assertTrue(ab_test._check_identical_values('Constant'))
+        self.assertDictEqual(ab_test._identical, {'Constant': True})
+
+    def test_permutation_test(self):
+        # Only 2 of the 20 possible splits of 1..6 into two groups of three (the observed
+        # split and its mirror image) give an absolute mean difference of 3, so p = 0.1
+        group_a = pd.DataFrame({'TotalPremium': [1.0, 2.0, 3.0]})
+        group_b = pd.DataFrame({'TotalPremium': [4.0, 5.0, 6.0]})
+        diff, p_value = self.ab_test._permutation_test(group_a, group_b, 'TotalPremium', n_resamples=20_000, random_state=0)
+        self.assertEqual(diff, -3.0)
+        self.assertAlmostEqual(p_value, 0.1, delta=0.01)
+
+    def test_resampling_is_reproducible_across_workers(self):
+        # Batches are seeded independently of how they are scheduled
+        group_a = self.ab_test._segment_data('Gender', value='Male')
+        group_b = self.ab_test._segment_data('Gender', value='Female')
+        kwargs = dict(n_resamples=500, memory_budget=1024, random_state=42)
+        serial = self.ab_test._bootstrap_test(group_a, group_b, 'TotalPremium', **kwargs)
+        parallel = self.ab_test._bootstrap_test(group_a, group_b, 'TotalPremium', n_jobs=2, **kwargs)
+        self.assertEqual(serial, parallel)
+
+        diff, p_value, (lower, upper) = serial
+        self.assertEqual(diff, -500.0)
+        self.assertLessEqual(lower, diff)
+        self.assertGreaterEqual(upper, diff)
+        self.assertTrue(0 < p_value <= 1)
+
+    def test_binned_resampling_matches_exact(self):
+        # Binning a continuous metric keeps the spread of the resampling distribution
+        rng = np.random.default_rng(0)
+        values_a, values_b = rng.lognormal(5, 1, 3000), rng.lognormal(5.05, 1, 2000)
+        for kind in ('permutation', 'bootstrap'):
+            exact = _resample(kind, values_a, values_b, 4000, 2**20, 1, 0, max_bins=None)
+            binned = _resample(kind, values_a, values_b, 4000, 2**20, 1, 0, max_bins=64)
+            self.assertAlmostEqual(binned.std() / exact.std(), 1, delta=0.05)
+            self.assertAlmostEqual(binned.mean(), exact.mean(), delta=0.1 * exact.std())
+
+    def test_run_tests_resampling_methods(self):
+        # Resampling methods replace the t-/z-tests and keep the structured result shape
+        t_results = self.ab_test.run_tests()
+        for method in ('permutation', 'bootstrap'):
+            results = self.ab_test.run_tests(method=method)
+            self.assertListEqual(list(results), list(TESTS))
+            for name, result in results.items():
+                self.assertSetEqual(set(result), set(t_results[name]))
+            genders = results['Risk Differences Between Women and Men']
+            self.assertEqual(genders['method'], method)
+            self.assertEqual(genders['statistic'], -500.0)
+            self.assertEqual(genders['n'], 6)
+            self.assertTrue(0 < genders['p_value'] <= 1)
+            self.assertEqual(results['Risk Differences Across Provinces']['method'], 'chi-squared')
+        with self.assertRaises(ValueError):
+            self.ab_test.run_tests(method='anova')
+
 if __name__ == '__main__':
     # Run the test suite
     unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'cache', 'data_processing', 'data_visualization', 'extract_zip', 'hypothesis_testing', 'incremental', 'instrumentation',
+    'model_artifacts', 'model_building', 'model_selection', 'plot_summaries', 'sampling', 'schema', 'scoring',
+    'shared_data', 'sketches',
+]
+
+# Libraries that take seconds to import and must only be loaded when first used
+HEAVY = ['sklearn', 'xgboost', 'shap', 'matplotlib', 'seaborn', 'scipy.stats']
+
+# Cold import of any pipeline module, pandas and numpy included
+BUDGET_SECONDS = 1.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import scripts.{module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_in_fresh_interpreter(module):
+    output = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestImports(unittest.TestCase):
+    def test_heavy_dependencies_are_loaded_lazily(self):
+        for module in MODULES:
+            with self.subTest(module=module):
+                self.assertListEqual(import_in_fresh_interpreter(module)['loaded'], [])
+
+    def test_import_time_budget(self):
+        for module in ['data_processing', 'data_visualization', 'hypothesis_testing', 'model_building']:
+            with self.subTest(module=module):
+                # Best of two, so a cold disk cache does not fail the check
+                seconds = min(import_in_fresh_interpreter(module)['seconds'] for _ in range(2))
+                self.assertLess(seconds, BUDGET_SECONDS)
+
+    def test_importing_visualization_leaves_rcparams_alone(self):
+        code = ("import matplotlib; before = dict(matplotlib.rcParams); import scripts.data_visualization; "
+                "print(dict(matplotlib.rcParams) == before)")
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'True')
+
+    def test_model_registry_is_built_on_first_access(self):
+        from scripts import model_building
+        self.assertListEqual(list(model_building.MODEL_REGISTRY), ['Linear Regression', 'Random Forest', 'XGBoost'])
+        self.assertIs(model_building.MODEL_REGISTRY, model_building.MODEL_REGISTRY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from scripts.data_processing import DataProcessing
+from scripts.hypothesis_testing import ABHypothesisTesting
+from scripts.incremental import IncrementalState, month_partitions, write_month_partitions
+
+class TestIncrementalState(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 3000
+        self.data = pd.DataFrame({
+            'TransactionMonth': (np.datetime64('2015-01') + rng.integers(0, 4, n)).astype('datetime64[ns]'),
+            'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)),
+            'PostalCode': rng.choice([1, 2, 3], n).astype('int16'),
+            'Gender': pd.Categorical(np.where(rng.random(n) < 0.1, None, rng.choice(['Male', 'Female'], n))),
+            'CoverType': pd.Categorical(rng.choice(['Own Damage', 'Windscreen'], n)),
+            'VehicleType': pd.Categorical(rng.choice(['Bus', 'Passenger Vehicle'], n)),
+            'make': pd.Categorical(rng.choice(['TOYOTA', 'VW'], n)),
+            'TotalPremium': np.where(rng.random(n) < 0.05, np.nan, rng.exponential(50, n)),
+            'TotalClaims': np.where(rng.random(n) < 0.9, 0.0, rng.exponential(1000, n)),
+        })
+        self.tmp = tempfile.TemporaryDirectory()
+        self.partitions = os.path.join(self.tmp.name, 'partitions')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, data):
+        path = os.path.join(self.tmp.name, 'delivery.parquet')
+        data.to_parquet(path, index=False)
+        return write_month_partitions(path, self.partitions, chunksize=500)
+
+    def test_new_months_merge_into_saved_state(self):
+        early = self.data[self.data['TransactionMonth'] < '2015-03-01']
+        self._write(early)
+        state = IncrementalState(os.path.join(self.tmp.name, 'state'))
+        self.assertListEqual(state.ingest_partitions(self.partitions), ['2015-01', '2015-02'])
+        state.save()
+
+        self._write(self.data[self.data['TransactionMonth'] >= '2015-03-01'])
+        state = IncrementalState.load(state.directory)
+        self.assertListEqual(state.ingest_partitions(self.partitions), ['2015-03', '2015-04'])
+        self.assertListEqual(state.ingest_partitions(self.partitions), [])
+        self.assertEqual(state.rows, len(self.data))
+
+        # Same statistics as one pass over every row
+        pd.testing.assert_frame_equal(state.aggregates.profile.summary(), DataProcessing(self.data).missing_data_summary(),
+                                      check_dtype=False)
+        expected = ABHypothesisTesting(self.data).pairwise_margin_tests(feature='Province', mode='one_vs_rest')
+        pd.testing.assert_frame_equal(state.aggregates.moments.pairwise_tests(feature='Province', mode='one_vs_rest'),
+                                      expected, check_dtype=False)
+        self.assertEqual(state.aggregates.plots.value_counts('CoverType').sum(), len(self.data))
+
+    def test_state_json_lists_ingested_months(self):
+        state = IncrementalState(os.path.join(self.tmp.name, 'state'))
+        state.ingest([self.data.iloc[:1000], self.data.iloc[1000:]])
+        state.save()
+        with open(os.path.join(state.directory, 'state.json')) as f:
+            saved = json.load(f)
+        self.assertListEqual(list(saved['months']), ['2015-01', '2015-02', '2015-03', '2015-04'])
+        self.assertEqual(saved['rows'], len(self.data))
+
+    def test_already_ingested_months_are_skipped(self):
+        state = IncrementalState(os.path.join(self.tmp.name, 'state'))
+        state.ingest([self.data[self.data['TransactionMonth'] < '2015-02-01']])
+        self.assertListEqual(state.ingest([self.data]), ['2015-02', '2015-03', '2015-04'])
+        self.assertEqual(state.rows, len(self.data))
+
+    def test_month_partitions(self):
+        rows = self._write(self.data)
+        self.assertListEqual(list(month_partitions(self.partitions)), ['2015-01', '2015-02', '2015-03', '2015-04'])
+        self.assertEqual(sum(rows.values()), len(self.data))
+        january = pd.read_parquet(month_partitions(self.partitions)['2015-01'])
+        self.assertTrue((january['TransactionMonth'] < '2015-02-01').all())
+
+
+if __name__ == '__main__':
+    unittest.main()
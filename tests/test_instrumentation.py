@@ -0,0 +1,79 @@
+import unittest
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from scripts.data_processing import DataProcessing
+from scripts.instrumentation import CALLS, instrument_class, instrumented, peak_rss_mb, reset_metrics, reset_peak_rss, summarize_calls, write_metrics
+from scripts.model_building import evaluate_model
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        reset_metrics()
+        self.data = pd.DataFrame({'TotalPremium': [1.0, None, 3.0], 'Province': ['Gauteng', None, 'Limpopo']})
+
+    def tearDown(self):
+        reset_metrics()
+
+    def test_calls_record_time_memory_and_rows(self):
+        @instrumented(name='allocate')
+        def allocate(values, size):
+            return np.ones(size).sum()
+
+        allocate(np.zeros((7, 2)), 2_000_000)
+        record = CALLS[-1]
+        self.assertEqual(record['name'], 'allocate')
+        self.assertEqual(record['rows'], 7)
+        self.assertGreaterEqual(record['wall_seconds'], 0)
+        self.assertGreaterEqual(record['cpu_seconds'], 0)
+        if os.path.exists('/proc/self/status'):
+            self.assertGreater(record['peak_rss_mb'], 0)
+
+    @unittest.skipUnless(os.path.exists('/proc/self/clear_refs'), 'peak RSS can only be reset on Linux')
+    def test_reset_peak_rss(self):
+        # The peak covers a large allocation until it is reset
+        block = np.ones(50_000_000)
+        del block
+        before = peak_rss_mb()
+        reset_peak_rss()
+        self.assertLess(peak_rss_mb(), before - 200)
+
+    def test_public_methods_are_instrumented(self):
+        # Nested instrumented calls are recorded too; properties and private methods are not
+        DataProcessing(self.data).missing_data_summary()
+        evaluate_model(None, None, np.array([1.0, 2.0]), predictions=np.array([1.0, 2.0]))
+        names = [call['name'] for call in CALLS]
+        self.assertListEqual(names, ['DataProcessing.missing_data_summary', 'evaluate_model'])
+        self.assertEqual(CALLS[0]['rows'], 3)  # From self.data
+
+        @instrument_class
+        class Example:
+            def public(self):
+                return self._private()
+
+            def _private(self):
+                return 1
+
+            @classmethod
+            def build(cls):
+                return cls()
+
+        Example.build().public()
+        self.assertListEqual([call['name'] for call in CALLS][2:], ['Example.build', 'Example.public'])
+
+    def test_write_metrics_aggregates_per_name(self):
+        for _ in range(3):
+            DataProcessing(self.data).missing_data_summary()
+        self.assertEqual(summarize_calls(list(CALLS)), summarize_calls())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics', 'stage.json')
+            write_metrics(path)
+            with open(path) as f:
+                metrics = json.load(f)
+        self.assertEqual(metrics['DataProcessing.missing_data_summary']['calls'], 3)
+        self.assertEqual(metrics['DataProcessing.missing_data_summary']['rows'], 3)
+        self.assertEqual(len(CALLS), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+from scripts.model_artifacts import CompactForest, artifact_size, benchmark_load, load_model, save_model
+
+class TestModelArtifacts(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(500, 4)), columns=['SumInsured', 'kilowatts', 'Cylinders', 'cubiccapacity'])
+        self.y = 3 * self.X['SumInsured'] + np.sin(self.X['kilowatts']) + rng.normal(scale=0.1, size=500)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_compact_forest_matches_sklearn(self):
+        # float32 thresholds rounded down keep every split decision, so predictions are identical
+        for model in [RandomForestRegressor(n_estimators=10, random_state=0), DecisionTreeRegressor(random_state=0)]:
+            model.fit(self.X, self.y)
+            for threshold_dtype in ['float32', 'float64']:
+                forest = CompactForest.from_sklearn(model, threshold_dtype=threshold_dtype)
+                np.testing.assert_allclose(forest.predict(self.X, batch_size=128), model.predict(self.X), rtol=1e-12)
+                self.assertEqual(forest.threshold.dtype, threshold_dtype)
+
+    def test_compact_forest_handles_missing_values(self):
+        X = self.X.copy()
+        X.loc[X.index[::5], 'SumInsured'] = np.nan
+        model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, self.y)
+        np.testing.assert_allclose(CompactForest.from_sklearn(model).predict(X), model.predict(X), rtol=1e-12)
+
+    def test_save_and_load_round_trip(self):
+        forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(self.X, self.y)
+        for model in [forest, XGBRegressor(n_estimators=10).fit(self.X, self.y), LinearRegression().fit(self.X, self.y)]:
+            path = save_model(model, os.path.join(self.tmp_dir.name, type(model).__name__))
+            loaded = load_model(path)
+            np.testing.assert_allclose(loaded.predict(self.X), model.predict(self.X), rtol=1e-6)
+
+        loaded = load_model(os.path.join(self.tmp_dir.name, 'RandomForestRegressor'))
+        self.assertIsInstance(loaded.threshold, np.memmap)
+        pickle_path = os.path.join(self.tmp_dir.name, 'forest.pkl')
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(forest, f)
+        self.assertLess(artifact_size(os.path.join(self.tmp_dir.name, 'RandomForestRegressor')), artifact_size(pickle_path))
+
+    def test_benchmark_load(self):
+        path = save_model(DecisionTreeRegressor(random_state=0).fit(self.X, self.y), os.path.join(self.tmp_dir.name, 'tree'))
+        stats = benchmark_load(path, n_rows=10)
+        for key in ['load_seconds', 'first_predict_seconds', 'rss_mb', 'size_mb']:
+            self.assertGreater(stats[key], 0)
+
+if __name__ == '__main__':
+    unittest.main()
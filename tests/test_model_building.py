@@ -0,0 +1,117 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+from scripts.cache import StageCache
+from scripts.data_processing import SparseEncoder
+from scripts.model_building import evaluate_model, fast_shap_values, linear_regression, random_forest, train_models, xgboost_model
+
+class TestModelBuilding(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['SumInsured', 'kilowatts', 'Cylinders'])
+        y = pd.Series(2 * X['SumInsured'] - X['kilowatts'] + rng.normal(scale=0.1, size=200), name='TotalPremium')
+        self.X_train, self.X_test = X.iloc[:150], X.iloc[150:]
+        self.y_train, self.y_test = y.iloc[:150], y.iloc[150:]
+        self.registry = {
+            'Linear Regression': (LinearRegression, {}),
+            'Decision Tree': (DecisionTreeRegressor, {'random_state': 0, 'max_depth': 3}),
+        }
+
+    def test_evaluate_model_uses_cached_predictions(self):
+        # Passing predictions skips model.predict entirely
+        predictions = np.asarray(self.y_test)
+        metrics = evaluate_model(None, self.X_test, self.y_test, predictions=predictions)
+        self.assertEqual(metrics['mse'], 0.0)
+        self.assertEqual(metrics['r2'], 1.0)
+
+    def test_train_models_serial(self):
+        models, predictions, comparison = train_models(self.X_train, self.y_train, self.X_test, self.y_test,
+                                                       registry=self.registry, max_workers=1)
+        self.assertListEqual(list(comparison.index), list(self.registry))
+        for col in ['mse', 'r2', 'fit_seconds', 'predict_seconds', 'wall_seconds', 'peak_rss_mb', 'n_jobs']:
+            self.assertIn(col, comparison.columns)
+        self.assertEqual(models['Linear Regression'].n_jobs, comparison.loc['Linear Regression', 'n_jobs'])
+        self.assertTrue((comparison['peak_rss_mb'] > 0).all())  # Resident memory, not just Python allocations
+        np.testing.assert_allclose(predictions['Linear Regression'], models['Linear Regression'].predict(self.X_test))
+        self.assertGreater(comparison.loc['Linear Regression', 'r2'], 0.99)
+
+    def test_train_models_parallel_matches_serial(self):
+        # Workers read the memory-mapped data and return the same fits
+        _, serial, serial_table = train_models(self.X_train, self.y_train, self.X_test, self.y_test,
+                                               registry=self.registry, max_workers=1)
+        _, parallel, parallel_table = train_models(self.X_train, self.y_train, self.X_test, self.y_test,
+                                                   registry=self.registry, max_workers=2)
+        for name in self.registry:
+            np.testing.assert_allclose(parallel[name], serial[name])
+        pd.testing.assert_series_equal(parallel_table['mse'], serial_table['mse'])
+
+    def test_train_models_reuses_cached_fits(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = StageCache(cache_dir)
+            _, first, first_table = train_models(self.X_train, self.y_train, self.X_test, self.y_test,
+                                                 registry=self.registry, max_workers=1, cache=cache)
+            registry = {**self.registry, 'Deeper Tree': (DecisionTreeRegressor, {'random_state': 0, 'max_depth': 5})}
+            _, second, table = train_models(self.X_train, self.y_train, self.X_test, self.y_test,
+                                            registry=registry, max_workers=1, cache=cache)
+            self.assertEqual(len(cache._entries()), 3)
+            self.assertListEqual(list(table.index), list(registry))
+            for name in self.registry:
+                # Cached candidates are not refit: they keep the timings of their first fit
+                np.testing.assert_array_equal(second[name], first[name])
+                self.assertEqual(table.loc[name, 'fit_seconds'], first_table.loc[name, 'fit_seconds'])
+
+    def test_models_accept_sparse_design_matrix(self):
+        rng = np.random.default_rng(1)
+        data = pd.DataFrame({'make': rng.choice(['TOYOTA', 'VW', 'BMW'], size=200), 'kilowatts': rng.normal(size=200)})
+        y = (data['make'] == 'BMW') * 3.0 + data['kilowatts']
+        X = SparseEncoder().fit_transform(data, y)
+        X_train, X_test, y_train, y_test = X[:150], X[150:], y.iloc[:150], y.iloc[150:]
+        for fit in (linear_regression, random_forest, xgboost_model):
+            _, mse = fit(X_train, y_train, X_test, y_test)
+            self.assertLess(mse, 0.1)
+        _, predictions, comparison = train_models(X_train, y_train, X_test, y_test, registry=self.registry, max_workers=2)
+        self.assertGreater(comparison.loc['Linear Regression', 'r2'], 0.99)
+
+    def test_fast_shap_values_are_additive(self):
+        # Tree SHAP values plus the expected value reproduce the model's predictions
+        for model in [XGBRegressor(n_estimators=20, max_depth=3), RandomForestRegressor(n_estimators=10, random_state=0)]:
+            model.fit(self.X_train, self.y_train)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                values, sample, importance = fast_shap_values(model, self.X_train, sample_size=60, batch_size=25,
+                                                              output_path=os.path.join(tmp_dir, 'shap.npy'))
+                self.assertEqual(values.shape, (60, 3))
+                totals = values.sum(axis=1)
+                residual = model.predict(sample) - totals
+                np.testing.assert_allclose(residual, residual[0], atol=1e-3)
+                self.assertEqual(importance.index[0], 'SumInsured')
+                np.testing.assert_allclose(importance.sort_index(), np.abs(values).mean(axis=0)[np.argsort(sample.columns)], rtol=1e-5)
+                del values
+
+    def test_fast_shap_values_stratify_by_predictions(self):
+        # By default every decile of the model's predictions is represented in the sample
+        model = DecisionTreeRegressor(max_depth=6, random_state=0).fit(self.X_train, self.y_train)
+        deciles = pd.Series(pd.qcut(model.predict(self.X_train), 10, labels=False, duplicates='drop'), index=self.X_train.index)
+        _, sample, _ = fast_shap_values(model, self.X_train, sample_size=20)
+        self.assertSetEqual(set(deciles[sample.index]), set(deciles))
+        _, sample, _ = fast_shap_values(model, self.X_train, sample_size=20, strata=self.X_train['SumInsured'] > 0)
+        self.assertLessEqual(abs(len(sample) - 20), 1)
+
+    def test_fast_shap_values_parallel_matches_serial(self):
+        model = RandomForestRegressor(n_estimators=10, random_state=0).fit(self.X_train, self.y_train)
+        serial, _, _ = fast_shap_values(model, self.X_train, sample_size=60, batch_size=25)
+        self.assertNotIsInstance(serial, np.memmap)  # Without a path nothing is left on disk
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parallel, _, _ = fast_shap_values(model, self.X_train, sample_size=60, batch_size=25, max_workers=2,
+                                              output_path=os.path.join(tmp_dir, 'shap.npy'))
+            self.assertIsInstance(parallel, np.memmap)
+            np.testing.assert_allclose(parallel, serial)
+            del parallel
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from scripts.model_selection import ResultCache, XGBoostFolds, cross_validate, successive_halving
+
+class TestModelSelection(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(300, 3)), columns=['SumInsured', 'kilowatts', 'Cylinders'])
+        self.y = 2 * self.X['SumInsured'] - self.X['kilowatts'] ** 2 + rng.normal(scale=0.1, size=300)
+        self.configs = [
+            {'max_depth': 1, 'eta': 0.05, 'seed': 0},
+            {'max_depth': 3, 'eta': 0.3, 'seed': 0},
+            {'max_depth': 4, 'eta': 0.1, 'seed': 0},
+        ]
+
+    def test_successive_halving_discards_configurations(self):
+        best, history = successive_halving(self.X, self.y, self.configs, n_splits=3, min_rounds=10,
+                                           max_rounds=90, factor=3, n_jobs=1)
+        self.assertEqual(history[history['rung'] == 0].shape[0], 3)
+        self.assertEqual(history[history['rung'] == 1].shape[0], 1)
+        self.assertListEqual(history['num_boost_round'].tolist(), [10, 10, 10, 30])
+        self.assertNotEqual(best, self.configs[0])
+
+    def test_cached_results_are_not_refit(self):
+        # A repeated (or extended) search on the same data reuses every finished fold
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            first = XGBoostFolds(self.X, self.y, n_splits=3, cache=cache, n_jobs=1)
+            expected = first.evaluate(self.configs, 20)
+            self.assertEqual(first.fits, 9)
+
+            second = XGBoostFolds(self.X, self.y, n_splits=3, cache=cache, n_jobs=1)
+            pd.testing.assert_frame_equal(second.evaluate(self.configs, 20), expected)
+            self.assertEqual(second.fits, 0)
+
+    def test_early_stopped_fits_satisfy_larger_budgets(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            config = [{'max_depth': 6, 'eta': 1.0, 'seed': 0}]
+            folds = XGBoostFolds(self.X, self.y, n_splits=3, cache=cache, n_jobs=1)
+            first = folds.evaluate(config, 500, early_stopping_rounds=5)
+            self.assertLess(first.loc[0, 'best_iteration'], 400)
+            fits = folds.fits
+            pd.testing.assert_frame_equal(folds.evaluate(config, 1000, early_stopping_rounds=5), first)
+            self.assertEqual(folds.fits, fits)
+
+    def test_cross_validate_sklearn_estimator(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            result = cross_validate(LinearRegression, {}, self.X, self.y, n_splits=3, cache_dir=cache_dir)
+            self.assertEqual(len(result['fold_mse']), 3)
+            self.assertAlmostEqual(result['mse'], np.mean(result['fold_mse']))
+            self.assertDictEqual(cross_validate(LinearRegression, {}, self.X, self.y, n_splits=3, cache_dir=cache_dir), result)
+
+if __name__ == '__main__':
+    unittest.main()
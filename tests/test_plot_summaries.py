@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+import pandas as pd
+from matplotlib.cbook import boxplot_stats
+from scipy.stats import gaussian_kde
+from scripts.plot_summaries import PlotAggregates, PlotSummaries, binned_kde
+
+class TestPlotSummaries(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        self.data = pd.DataFrame({
+            'TotalPremium': np.where(rng.random(n) < 0.05, np.nan, rng.exponential(50, n)),
+            'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)),
+            'CoverType': pd.Categorical(rng.choice(['Own Damage', 'Windscreen'], n)),
+        })
+        self.summaries = PlotSummaries(self.data)
+
+    def test_binned_kde_matches_gaussian_kde(self):
+        values = self.data['TotalPremium'].dropna().to_numpy()
+        coords, density = binned_kde(values, gridsize=100, cut=2)
+        expected = gaussian_kde(values)(coords)
+        self.assertLess(np.abs(density - expected).max(), 0.01 * expected.max())
+
+    def test_box_stats_match_matplotlib(self):
+        stats = self.summaries.box_stats('TotalPremium', by='Province')
+        self.assertListEqual([group['label'] for group in stats], ['Gauteng', 'Limpopo', 'Western Cape'])
+        values = self.data.loc[self.data['Province'] == 'Limpopo', 'TotalPremium'].dropna().to_numpy()
+        expected = boxplot_stats(values)[0]
+        for key in ['q1', 'med', 'q3', 'whislo', 'whishi', 'mean']:
+            self.assertAlmostEqual(stats[1][key], expected[key])
+        np.testing.assert_array_equal(stats[1]['fliers'], np.unique(expected['fliers']))
+        self.assertEqual(self.summaries.box_stats('TotalPremium')[0]['label'], 'TotalPremium')
+
+    def test_histogram_and_counts(self):
+        hist = self.summaries.histogram('TotalPremium', bins=30)
+        self.assertEqual(hist['counts'].sum(), self.data['TotalPremium'].notna().sum())
+        self.assertEqual(len(hist['kde_x']), 200)
+        counts = self.summaries.grouped_counts('Province', 'CoverType', hue_values=['Windscreen'])
+        self.assertEqual(counts['count'].sum(), (self.data['CoverType'] == 'Windscreen').sum())
+        self.assertEqual(self.summaries.value_counts('Province').sum(), len(self.data))
+
+    def test_summaries_are_cached(self):
+        first = self.summaries.violin_stats('TotalPremium', by='CoverType')
+        self.assertIs(self.summaries.violin_stats('TotalPremium', by='CoverType'), first)
+        self.assertAlmostEqual(first[0]['median'], self.data.loc[self.data['CoverType'] == 'Own Damage', 'TotalPremium'].median())
+
+class TestPlotAggregates(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        n = 3000
+        self.data = pd.DataFrame({
+            'TotalPremium': np.where(rng.random(n) < 0.05, np.nan, rng.exponential(50, n)),
+            'SumInsured': rng.lognormal(10, 1, n),
+            'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape', 'Limpopo'], n)),
+            'CoverType': pd.Categorical(rng.choice(['Own Damage', 'Windscreen'], n)),
+            'VehicleType': pd.Categorical(rng.choice(['Bus', 'Passenger Vehicle'], n)),
+            'make': pd.Categorical(np.where(rng.random(n) < 0.1, None, 'TOYOTA')),
+        })
+        self.data.loc[::13, 'SumInsured'] = np.nan
+        self.aggregates = PlotAggregates(numeric_cols=['TotalPremium', 'SumInsured'])
+        for start in range(0, n, 700):
+            part = PlotAggregates(numeric_cols=['TotalPremium', 'SumInsured'], random_state=start)
+            self.aggregates.merge(part.update(self.data.iloc[start:start + 700]))
+        self.summaries = PlotSummaries(self.data)
+
+    def test_counts_and_correlation_are_exact(self):
+        cols = ['TotalPremium', 'SumInsured']
+        pd.testing.assert_frame_equal(self.aggregates.correlation(cols), self.summaries.correlation(cols), check_names=False)
+        self.assertDictEqual(self.aggregates.value_counts('CoverType').to_dict(), self.summaries.value_counts('CoverType').to_dict())
+        self.assertDictEqual(self.aggregates.count_by('Province', 'make').to_dict(), self.summaries.count_by('Province', 'make').to_dict())
+        expected = self.summaries.grouped_counts('Province', 'VehicleType').astype({'Province': object, 'VehicleType': object})
+        pd.testing.assert_frame_equal(self.aggregates.grouped_counts('Province', 'VehicleType'), expected)
+
+    def test_box_stats_are_close(self):
+        approximate = self.aggregates.box_stats('TotalPremium', by='Province')
+        exact = self.summaries.box_stats('TotalPremium', by='Province')
+        self.assertListEqual([group['label'] for group in approximate], [group['label'] for group in exact])
+        for got, expected in zip(approximate, exact):
+            for key in ['q1', 'med', 'q3']:
+                self.assertAlmostEqual(got[key], expected[key], delta=0.02 * expected['q3'])
+            self.assertAlmostEqual(got['mean'], expected['mean'])
+
+    def test_violin_stats_cover_every_group(self):
+        stats = self.aggregates.violin_stats('TotalPremium', by='CoverType')
+        self.assertListEqual(sorted(group['label'] for group in stats), ['Own Damage', 'Windscreen'])
+
+    def test_numeric_columns_follow_the_schema_and_must_match_on_merge(self):
+        # An all-missing chunk (inferred as object) gets the same numeric columns as a full one
+        first = PlotAggregates().update(self.data.iloc[:700].assign(SumInsured=None))
+        second = PlotAggregates(random_state=1).update(self.data.iloc[700:1400])
+        self.assertListEqual(first.numeric_cols, ['TotalPremium', 'SumInsured'])
+        first.merge(second)
+        with self.assertRaises(ValueError):
+            first.merge(PlotAggregates(numeric_cols=['TotalPremium']).update(self.data.iloc[1400:]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.sampling import ReservoirSample, stratified_sample
+
+class TestSampling(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({'row': np.arange(1000), 'Province': np.where(np.arange(1000) < 2, 'rare', 'common')})
+
+    def test_stratified_sample_keeps_every_stratum(self):
+        sample = stratified_sample(self.data, 100, strata='Province')
+        self.assertEqual(len(sample), 101)  # 998 * 0.1 rounds to 100 common rows, 2 * 0.1 is raised to one rare row
+        self.assertTrue(sample.index.is_monotonic_increasing)
+        self.assertEqual((sample['Province'] == 'rare').sum(), 1)
+
+    def test_reservoir_sample_is_bounded_and_uniform(self):
+        reservoir = ReservoirSample(100, random_state=0)
+        for start in range(0, 1000, 64):
+            reservoir.update(self.data.iloc[start:start + 64])
+        sample = reservoir.sample()
+        self.assertEqual(len(sample), 100)
+        self.assertEqual(reservoir.count, 1000)
+        self.assertTrue(sample['row'].is_monotonic_increasing)  # Arrival order
+        self.assertTrue(sample['row'].is_unique)
+        # Roughly half of the sample comes from each half of the stream
+        self.assertTrue(30 < (sample['row'] < 500).sum() < 70)
+
+    def test_reservoir_samples_merge(self):
+        # Merging the samples of two halves gives a sample of the whole stream
+        first, second = ReservoirSample(50, random_state=1), ReservoirSample(50, random_state=2)
+        first.update(self.data.iloc[:500])
+        second.update(self.data.iloc[500:])
+        merged = first.merge(second).sample()
+        self.assertEqual(len(merged), 50)
+        self.assertEqual(first.count, 1000)
+        self.assertTrue((merged['row'] >= 500).any() and (merged['row'] < 500).any())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from scripts.schema import (
+    read_options, read_typed_csv, memory_footprint, dataset_columns, load_dataset,
+    iter_dataset, numeric_columns, parse_amount, CONVERTERS, DTYPES,
+)
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        """
+        Write a small pipe-delimited file that uses a subset of the
+        MachineLearningRating_v3 columns plus one column outside the schema.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "sample.txt")
+        sample_data = (
+            "PolicyID|TransactionMonth|Province|Gender|kilowatts|TotalPremium|Extra\n"
+            "1|2015-03-01 00:00:00|Gauteng|Male|75|21.9|a\n"
+            "2|2015-04-01 00:00:00|Western Cape||85|0.0|b\n"
+            "3|2015-05-01 00:00:00|Gauteng|Female|90|512.8|c\n"
+        )
+        with open(self.file_path, "w") as f:
+            f.write(sample_data)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_options_restricts_to_columns(self):
+        """
+        Test that `read_options` only returns dtypes and date columns for the requested columns.
+        """
+        options = read_options(['Province', 'TransactionMonth'])
+        self.assertDictEqual(options['dtype'], {'Province': 'category'})
+        self.assertListEqual(options['parse_dates'], ['TransactionMonth'])
+
+        # Without columns, the full schema is returned
+        self.assertEqual(len(read_options()['dtype']), len(DTYPES) - len(CONVERTERS))
+
+    def test_read_typed_csv(self):
+        """
+        Test that `read_typed_csv` applies categoricals, downcast numerics and parsed dates,
+        and leaves columns outside the schema to inference.
+        """
+        df = read_typed_csv(self.file_path, delimiter='|')
+
+        self.assertIsInstance(df['Province'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(df['Gender'].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['PolicyID'].dtype, 'int32')
+        self.assertEqual(df['kilowatts'].dtype, 'float32')
+        self.assertEqual(df['TotalPremium'].dtype, 'float64')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['TransactionMonth']))
+        self.assertEqual(df['Extra'].dtype, 'object')
+        self.assertEqual(df['Gender'].isnull().sum(), 1)
+
+        # Column projection keeps the schema for the selected columns only
+        df = read_typed_csv(self.file_path, delimiter='|', usecols=['Province', 'TotalPremium'])
+        self.assertListEqual(list(df.columns), ['Province', 'TotalPremium'])
+
+    def test_capital_outstanding_parsed_as_amount(self):
+        """
+        Test that CapitalOutstanding is parsed to float64 whether a chunk holds plain digits,
+        thousands separators or non-numeric text, so that every chunk gets the same dtype.
+        """
+        self.assertEqual(parse_amount('1,000'), 1000.0)
+        self.assertTrue(np.isnan(parse_amount('')))
+        self.assertIn('CapitalOutstanding', CONVERTERS)
+
+        file_path = os.path.join(self.tmp_dir.name, "capital.txt")
+        with open(file_path, "w") as f:
+            f.write("PolicyID|CapitalOutstanding\n1|119300\n2|0\n3|1,000\n4|\n")
+        chunks = list(iter_dataset(file_path, chunksize=2, delimiter='|'))
+        self.assertListEqual([chunk['CapitalOutstanding'].dtype for chunk in chunks], ['float64', 'float64'])
+        self.assertListEqual(chunks[1]['CapitalOutstanding'].tolist()[:1], [1000.0])
+
+    def test_memory_footprint(self):
+        """
+        Test that `memory_footprint` reports one row per column with its dtype.
+        """
+        df = read_typed_csv(self.file_path, delimiter='|')
+        footprint = memory_footprint(df)
+
+        self.assertListEqual(list(footprint.columns), ['dtype', 'Memory (MB)'])
+        self.assertSetEqual(set(footprint.index), set(df.columns))
+        self.assertEqual(footprint.loc['Province', 'dtype'], 'category')
+        self.assertTrue(footprint['Memory (MB)'].is_monotonic_decreasing)
+
+    def test_load_dataset_parquet_projection(self):
+        """
+        Test that Parquet intermediates keep their dtypes and can be read column by column.
+        """
+        parquet_path = os.path.join(self.tmp_dir.name, "sample.parquet")
+        read_typed_csv(self.file_path, delimiter='|').to_parquet(parquet_path, index=False)
+
+        columns = dataset_columns(parquet_path)
+        self.assertListEqual(columns, dataset_columns(self.file_path, delimiter='|'))
+        self.assertListEqual(numeric_columns(columns), ['PolicyID', 'kilowatts', 'TotalPremium'])
+
+        df = load_dataset(parquet_path, columns=['Province', 'TotalPremium'])
+        self.assertListEqual(list(df.columns), ['Province', 'TotalPremium'])
+        self.assertIsInstance(df['Province'].dtype, pd.CategoricalDtype)
+
+    def test_iter_dataset(self):
+        """
+        Test that text and Parquet files stream in typed chunks that add up to the whole file.
+        """
+        parquet_path = os.path.join(self.tmp_dir.name, "sample.parquet")
+        read_typed_csv(self.file_path, delimiter='|').to_parquet(parquet_path, index=False)
+        for path in [self.file_path, parquet_path]:
+            chunks = list(iter_dataset(path, chunksize=2, columns=['PolicyID', 'Province'], delimiter='|'))
+            self.assertListEqual([len(chunk) for chunk in chunks], [2, 1])
+            self.assertListEqual(list(chunks[0].columns), ['PolicyID', 'Province'])
+            self.assertEqual(chunks[0]['PolicyID'].dtype, 'int32')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.ensemble import RandomForestRegressor
+from scripts.data_processing import SparseEncoder
+from scripts.scoring import MicroBatcher, ScoringPipeline, make_server, score_file
+
+class TestScoring(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 400
+        self.data = pd.DataFrame({
+            'UnderwrittenCoverID': np.arange(n, dtype='int32'),
+            'Province': pd.Categorical(rng.choice(['Gauteng', 'Western Cape', None], size=n)),
+            'IsVATRegistered': rng.random(n) < 0.2,
+            'TransactionMonth': pd.to_datetime('2015-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D'),
+            'SumInsured': np.where(rng.random(n) < 0.1, np.nan, rng.exponential(1000, n)),
+            'TotalClaims': rng.exponential(10, n),
+        })
+        self.data['TotalPremium'] = self.data['SumInsured'].fillna(0) / 100 + (self.data['Province'] == 'Gauteng') * 5
+        self.pipeline = ScoringPipeline.fit(self.data, DecisionTreeRegressor(max_depth=4, random_state=0))
+        self.raw = self.data.drop(columns=['TotalPremium'])
+        self.expected = self.pipeline.predict(self.raw)
+
+    def test_pipeline_excludes_identifiers_and_round_trips(self):
+        self.assertNotIn('UnderwrittenCoverID', self.pipeline.features)
+        self.assertNotIn('TotalClaims', self.pipeline.features)
+        self.assertIn('TransactionMonth_year', self.pipeline.features)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'pipeline.pkl')
+            self.pipeline.save(path)
+            np.testing.assert_array_equal(ScoringPipeline.load(path).predict(self.raw), self.expected)
+
+    def test_sparse_encoder_pipeline_round_trips(self):
+        # A forest trained on the CSR design matrix is saved compactly and scored from raw rows
+        pipeline = ScoringPipeline.fit(self.data, RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0),
+                                       encoder=SparseEncoder(max_onehot=1))
+        self.assertIn('Province_target', pipeline.features)
+        self.assertIn('TransactionMonth_year', pipeline.features)
+        expected = pipeline.predict(self.raw)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'pipeline.pkl')
+            pipeline.save(path)
+            np.testing.assert_allclose(ScoringPipeline.load(path).predict(self.raw), expected)
+
+    def test_score_file_streams_in_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline_path = os.path.join(tmp, 'pipeline.pkl')
+            self.pipeline.save(pipeline_path)
+            input_path = os.path.join(tmp, 'rows.parquet')
+            self.raw.to_parquet(input_path, index=False)
+            for workers, output in [(1, 'serial.csv'), (2, 'parallel.parquet')]:
+                output_path = os.path.join(tmp, output)
+                stats = score_file(pipeline_path, input_path, output_path, chunksize=64, max_workers=workers)
+                self.assertEqual(stats['rows'], len(self.raw))
+                self.assertGreater(stats['rows_per_second'], 0)
+                scored = pd.read_parquet(output_path) if output.endswith('.parquet') else pd.read_csv(output_path)
+                np.testing.assert_array_equal(scored['UnderwrittenCoverID'], self.raw['UnderwrittenCoverID'])
+                np.testing.assert_allclose(scored['PredictedPremium'], self.expected)
+
+    def test_micro_batcher_groups_concurrent_requests(self):
+        batcher = MicroBatcher(self.pipeline, max_batch_size=64, max_wait_ms=20)
+        records = json.loads(self.raw.head(40).to_json(orient='records', date_format='iso'))
+        results = [None] * len(records)
+
+        def request(i):
+            results[i] = batcher.predict([records[i]])[0]
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(records))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        np.testing.assert_allclose(results, self.expected[:40])
+
+    def test_micro_batcher_isolates_bad_requests(self):
+        # A malformed request fails on its own; the valid request in the same batch still scores
+        batcher = MicroBatcher(self.pipeline, max_batch_size=64, max_wait_ms=200)
+        good = json.loads(self.raw.head(1).to_json(orient='records', date_format='iso'))
+        bad = [{**good[0], 'SumInsured': 'abc'}]
+        good_future, bad_future = batcher.submit(good), batcher.submit(bad)
+        self.assertAlmostEqual(good_future.result()[0], self.expected[0])
+        with self.assertRaises(TypeError):
+            bad_future.result()
+        batcher.close()
+
+    def test_http_endpoint(self):
+        server = make_server(self.pipeline, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            record = json.loads(self.raw.head(1).to_json(orient='records', date_format='iso'))[0]
+            request = urllib.request.Request(f'http://127.0.0.1:{server.server_address[1]}/predict',
+                                             data=json.dumps(record).encode(), headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request) as response:
+                body = json.loads(response.read())
+            self.assertAlmostEqual(body['predictions'][0], self.expected[0])
+        finally:
+            server.shutdown()
+            server.batcher.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import os
+import numpy as np
+import pandas as pd
+from scripts.shared_data import SharedFrame
+
+class TestSharedFrame(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'Province': pd.Categorical(['A', 'B', None, 'A']),
+            'Gender': ['Male', None, 'Female', 'Male'],
+            'TotalPremium': [1.5, 2.5, np.nan, 4.0],
+            'PostalCode': np.array([1, 2, 3, 4], dtype='int16'),
+            'TransactionMonth': pd.to_datetime(['2015-01-01', '2015-02-01', '2015-03-01', '2015-04-01']),
+        })
+
+    def test_round_trip(self):
+        # Every column type comes back with the same values
+        with SharedFrame(self.data) as shared:
+            loaded = shared.load()
+            self.assertListEqual(list(loaded.columns), list(self.data.columns))
+            for col in ['TotalPremium', 'PostalCode', 'TransactionMonth']:
+                self.assertEqual(loaded[col].dtype, self.data[col].dtype)
+                np.testing.assert_array_equal(np.asarray(loaded[col]), self.data[col].to_numpy())
+            self.assertListEqual(loaded['Province'].astype(object).tolist(), ['A', 'B', np.nan, 'A'])
+            self.assertListEqual(loaded['Gender'].astype(object).tolist(), ['Male', np.nan, 'Female', 'Male'])
+
+    def test_numeric_columns_are_memory_mapped(self):
+        # Numeric columns are views of the mapped files, not copies, and the files are removed on close
+        shared = SharedFrame(self.data, columns=['TotalPremium'])
+        loaded = shared.load()
+        self.assertIsInstance(loaded['TotalPremium'].to_numpy().base, np.memmap)
+        shared.close()
+        self.assertFalse(os.path.exists(shared.directory))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scripts.sketches import QuantileSketch, FrequencySketch
+
+class TestQuantileSketch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = rng.lognormal(3, 2, 50_000) * np.where(rng.random(50_000) < 0.1, -1, 1)
+
+    def test_exact_mode_matches_pandas(self):
+        # Few distinct values are tracked exactly, so the median matches pandas
+        values = [4, 4, 2, np.nan, 5, 4, 2, 6]
+        sketch = QuantileSketch()
+        sketch.update(values)
+        self.assertEqual(sketch.count, 7)
+        self.assertEqual(sketch.quantile(0.5), pd.Series(values).median())
+        self.assertEqual(sketch.quantile(0.25), pd.Series(values).quantile(0.25))
+
+    def test_bucketed_quantiles_within_relative_accuracy(self):
+        sketch = QuantileSketch(relative_accuracy=0.01, max_exact=100)
+        for chunk in np.array_split(self.values, 5):
+            sketch.update(chunk)
+        self.assertIsNone(sketch.exact)
+        for q in [0.05, 0.5, 0.95]:
+            expected = np.quantile(self.values, q)
+            self.assertLess(abs(sketch.quantile(q) - expected), 0.03 * abs(expected))
+
+    def test_merge_equals_single_pass(self):
+        single = QuantileSketch(max_exact=100)
+        single.update(self.values)
+        left, right = QuantileSketch(max_exact=100), QuantileSketch(max_exact=100)
+        left.update(self.values[:50])  # still exact when merged
+        right.update(self.values[50:])
+        merged = left.merge(right)
+        self.assertEqual(merged.count, single.count)
+        self.assertAlmostEqual(merged.quantile(0.5), single.quantile(0.5))
+
+class TestFrequencySketch(unittest.TestCase):
+    def test_mode_and_merge(self):
+        left, right = FrequencySketch(), FrequencySketch()
+        left.update(pd.Series(['a', 'b', 'b', None], dtype='category'))
+        right.update(['a', 'a', 'c'])
+        merged = left.merge(right)
+        self.assertEqual(merged.count, 6)
+        self.assertEqual(merged.mode(), 'a')
+        self.assertTrue(merged.is_exact)
+
+    def test_capacity_keeps_heavy_hitters(self):
+        sketch = FrequencySketch(capacity=3)
+        sketch.update(['x'] * 50 + ['y'] * 20 + list('abcdefgh'))
+        self.assertFalse(sketch.is_exact)
+        self.assertLessEqual(len(sketch.counts), 3)
+        self.assertEqual(sketch.mode(), 'x')
+        with self.assertRaises(ValueError):
+            sketch.quantile(0.5)
+
+if __name__ == '__main__':
+    unittest.main()